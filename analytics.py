@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+#     대시보드 집계 (집계 큐브 / 지점 × 월 손익표)
+#     - 큐브는 로딩 시 원장에서 한 번만 만들고, 차트/KPI 는 원장 대신 큐브를 필터링해 집계
+#     - 큐브 행 순서는 원장에서 키가 처음 나타난 순서 (unique() 기반 색상 매핑 순서를 유지)
+#     - 손익표는 필터된 큐브에서 만들어 지출/순수익/시뮬레이션 섹션이 공유
+#     - 일별 매출 큐브(날짜순)는 일별 매출 탐색용. 일/주/월 집계와 이동평균은 서버에서 이 큐브로 계산
+# ==============================================================================
+
+# --- 분석용 카테고리 정의 ---
+VARIABLE_COST_ITEMS = ['식자재', '소모품']
+DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS = ['배달비']
+FIXED_COST_ITEMS = ['인건비', '광고비', '고정비']
+ALL_POSSIBLE_EXPENSE_CATEGORIES = list(set(VARIABLE_COST_ITEMS + DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS + FIXED_COST_ITEMS))
+DELIVERY_CHANNELS = ['배달매출', '포장매출']
+HALL_CHANNEL = '홀매출'
+
+# 소계/합계류 항목 (시뮬레이션 기준값에서 제외)
+SUMMARY_PATTERN = r"소계|총계|합계|전체|총액|이월금액|일계"
+
+MONTH_CUBE_KEYS = ['지점명', '연월', '분류', '항목1', '요약행']
+WEEKDAY_CUBE_KEYS = ['지점명', '연월', '분류', '항목1', '요일']
+DAY_CUBE_KEYS = ['지점명', '연월', '항목1', '날짜']
+CUBE_NAMES = ('month', 'weekday', 'day')
+
+def summary_mask(col):
+    """SUMMARY_PATTERN 에 해당하는 행 마스크. 범주형 컬럼은 범주 목록에만 검사 후 코드로 펼침"""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        codes = col.cat.codes.to_numpy()
+        hit = pd.Series(col.cat.categories.astype(str)).str.contains(SUMMARY_PATTERN, na=False, regex=True).to_numpy()
+        return pd.Series(hit[codes] & (codes >= 0), index=col.index)
+    return col.astype(str).str.contains(SUMMARY_PATTERN, na=False, regex=True)
+
+def build_month_cube(df):
+    """지점명 × 연월 × 분류 × 항목1 (× 요약행 여부) 별 금액 합계, 행 수, 시작일/종료일"""
+    keyed = df[['지점명', '연월', '분류', '항목1', '날짜', '금액']].assign(요약행=summary_mask(df['항목1']) | summary_mask(df['항목2']))
+    cube = keyed.groupby(MONTH_CUBE_KEYS, observed=True, sort=False).agg(
+        금액=('금액', 'sum'), 건수=('금액', 'size'), 시작일=('날짜', 'min'), 종료일=('날짜', 'max')
+    ).reset_index()
+    cube['월'] = pd.Categorical(cube['연월'].dt.strftime('%Y년 %m월'), categories=df['월'].cat.categories, ordered=True)
+    return cube
+
+def build_weekday_cube(df):
+    """요일 분석용: 지점명 × 연월 × 분류 × 항목1 × 요일 별 금액 합계"""
+    return df.groupby(WEEKDAY_CUBE_KEYS, observed=True, sort=False)['금액'].sum().reset_index()
+
+def build_day_cube(df):
+    """일별 매출 탐색용: 매출 행의 지점명 × 항목1(채널) × 날짜 별 금액 합계 (날짜순)"""
+    sales = df[df['분류'] == '매출']
+    cube = sales.groupby(DAY_CUBE_KEYS, observed=True, sort=False)['금액'].sum().reset_index()
+    return cube.sort_values('날짜', kind='stable', ignore_index=True)
+
+def cubes_version(cubes):
+    """큐브 내용 해시 (데이터 버전). 같은 데이터면 다시 로딩해도 같은 값이라 차트 캐시 키로 씀"""
+    return '-'.join(f"{int(pd.util.hash_pandas_object(cubes[name], index=False).sum()):016x}" for name in CUBE_NAMES)
+
+def build_cubes(df):
+    if df.empty:
+        cubes = {'month': pd.DataFrame(columns=MONTH_CUBE_KEYS + ['금액', '건수', '시작일', '종료일', '월']),
+                 'weekday': pd.DataFrame(columns=WEEKDAY_CUBE_KEYS + ['금액']),
+                 'day': pd.DataFrame(columns=DAY_CUBE_KEYS + ['금액'])}
+    else:
+        cubes = {'month': build_month_cube(df), 'weekday': build_weekday_cube(df), 'day': build_day_cube(df)}
+    cubes['version'] = cubes_version(cubes)
+    return cubes
+
+def branch_month_mask(df, keys):
+    """(지점명, 연월) 쌍 목록에 해당하는 행 마스크"""
+    index = pd.MultiIndex.from_arrays([df['지점명'].astype(str), df['연월']])
+    return pd.Series(index.isin(keys), index=df.index)
+
+def splice_cubes(cubes, ledger, keys):
+    """
+    부분 새로고침: keys((지점명, 연월) 쌍)에 해당하는 큐브 행만 새 원장에서 다시 집계해 교체
+    나머지 행은 그대로 두고 범주/월 라벨만 새 원장 기준으로 맞춤
+    """
+    keys = pd.MultiIndex.from_tuples(list(keys), names=['지점명', '연월'])
+    if ledger.empty:
+        return build_cubes(ledger)
+    affected = ledger[branch_month_mask(ledger, keys)]
+    fresh = {'month': build_month_cube(affected), 'weekday': build_weekday_cube(affected), 'day': build_day_cube(affected)}
+    spliced = {}
+    for name in CUBE_NAMES:
+        old = cubes[name]
+        kept = old[~branch_month_mask(old, keys)] if not old.empty else old
+        for col in kept.columns:
+            if isinstance(fresh[name][col].dtype, pd.CategoricalDtype) and col != '월':
+                kept = kept.assign(**{col: kept[col].astype(str).astype(fresh[name][col].dtype)})
+        spliced[name] = pd.concat([kept, fresh[name]], ignore_index=True)
+    spliced['day'] = spliced['day'].sort_values('날짜', kind='stable', ignore_index=True)
+    spliced['month']['월'] = pd.Categorical(spliced['month']['연월'].dt.strftime('%Y년 %m월'), categories=ledger['월'].cat.categories, ordered=True)
+    spliced['version'] = cubes_version(spliced)
+    return spliced
+
+def cube_view_mask(cube, branches, start_month, end_month):
+    """사이드바 선택(지점 + 연속 월 범위)에 해당하는 큐브 행 마스크"""
+    return cube['지점명'].isin(branches) & (cube['연월'] >= start_month) & (cube['연월'] <= end_month)
+
+def safe_ratio(numerator, denominator):
+    return (numerator / denominator.replace(0, 1e-9)).fillna(0)
+
+def build_pnl_table(매출, 지출):
+    """
+    지점 × 월 손익표와 지출 항목 목록을 반환. 지출/순수익/시뮬레이션 섹션이 같은 표를 씀
+    - 매출이 없는 지점-월(지출만 있는 달)도 행으로 남기고 매출월=False 로 표시 (차트는 매출월 행만 사용)
+    - 매출 구분(총/홀/배달+포장), 지출 항목별 금액, 홀/배달 매출 비중(공통비 배분용), 순수익/순수익률,
+      손익분기점, 식자재/인건비 원가율
+    """
+    keys = ['지점명', '월']
+    parts = [
+        매출.groupby(keys, observed=True)['금액'].sum().rename('총매출'),
+        매출[매출['항목1'].isin(DELIVERY_CHANNELS)].groupby(keys, observed=True)['금액'].sum().rename('배달매출_총액'),
+        매출[매출['항목1'] == HALL_CHANNEL].groupby(keys, observed=True)['금액'].sum().rename('홀매출_총액'),
+    ]
+    expenses = 지출.groupby(keys + ['항목1'], observed=True)['금액'].sum().unstack(fill_value=0)
+    expenses.columns = expenses.columns.astype(str)
+    cost_items = list(expenses.columns) + [c for c in ALL_POSSIBLE_EXPENSE_CATEGORIES if c not in expenses.columns]
+    pnl = pd.concat(parts + [expenses], axis=1).reindex(columns=['총매출', '배달매출_총액', '홀매출_총액'] + cost_items).fillna(0)
+    pnl = pnl.reset_index().sort_values(['월', '지점명'], ignore_index=True)
+    pnl['매출월'] = pnl['총매출'] > 0
+
+    # 순수익 (전체 / 홀 / 배달+포장): 공통비는 매출 비중으로 배분, 배달비는 배달+포장 전용
+    common_costs = pnl[[c for c in FIXED_COST_ITEMS + VARIABLE_COST_ITEMS if c in pnl.columns]].sum(axis=1)
+    pnl['총지출'] = pnl[[c for c in ALL_POSSIBLE_EXPENSE_CATEGORIES if c in pnl.columns]].sum(axis=1)
+    pnl['총순수익'] = pnl['총매출'] - pnl['총지출']
+    pnl['총순수익률'] = pnl['총순수익'] / pnl['총매출'].replace(0, 1e-9) * 100
+    pnl['홀매출_분석용'] = pnl['홀매출_총액']
+    pnl['홀매출_비중'] = safe_ratio(pnl['홀매출_분석용'], pnl['총매출'])
+    pnl['홀순수익'] = pnl['홀매출_분석용'] - common_costs * pnl['홀매출_비중']
+    pnl['홀순수익률'] = (pnl['홀순수익'] / pnl['홀매출_분석용'].replace(0, 1e-9) * 100).fillna(0)
+    pnl['배달매출_분석용'] = pnl['배달매출_총액']
+    pnl['배달매출_비중'] = safe_ratio(pnl['배달매출_분석용'], pnl['총매출'])
+    pnl['배달순수익'] = pnl['배달매출_분석용'] - (common_costs * pnl['배달매출_비중'] + pnl.get('배달비', 0))
+    pnl['배달순수익률'] = (pnl['배달순수익'] / pnl['배달매출_분석용'].replace(0, 1e-9) * 100).fillna(0)
+
+    # 손익분기점
+    pnl['총변동비_계산'] = pnl[[c for c in VARIABLE_COST_ITEMS + DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS if c in pnl.columns]].sum(axis=1)
+    pnl['총고정비_계산'] = pnl[[c for c in FIXED_COST_ITEMS if c in pnl.columns]].sum(axis=1)
+    pnl['공헌이익률'] = (1 - pnl['총변동비_계산'] / pnl['총매출'].replace(0, 1e-9)).fillna(0)
+    pnl['손익분기점_매출'] = (pnl['총고정비_계산'] / pnl['공헌이익률'].replace(0, 1e-9)).replace([float('inf'), -float('inf')], 0).fillna(0)
+    pnl['안전여유매출액'] = pnl['총매출'] - pnl['손익분기점_매출']
+
+    # 원가율
+    pnl['식자재_원가율'] = safe_ratio(pnl['식자재'], pnl['총매출']) * 100
+    pnl['인건비_원가율'] = safe_ratio(pnl['인건비'], pnl['총매출']) * 100
+    return pnl, cost_items
+
+def allocate_costs(pnl, items, share_col):
+    """
+    공통비 배분: 지출 항목 행렬 × 매출 비중 벡터를 한 번에 곱한 뒤 월별로 한 번 합산
+    반환: 차트용 긴 형식 [월, 금액, 항목1] (항목 순서 → 월 순서)
+    """
+    allocated = pnl[items].mul(pnl[share_col], axis=0)
+    monthly = allocated.groupby(pnl['월'], observed=True).sum()
+    return monthly.melt(var_name='항목1', value_name='금액', ignore_index=False).reset_index()[['월', '금액', '항목1']]
+
+# --- 일별 매출 탐색 (일/주/월 재집계, 이동평균, 차트 전송용 다운샘플링) ---
+def daily_sales_frame(day_cube, by=None):
+    """날짜 × 계열(by 컬럼 값, 없으면 '전체') 일별 매출. 매출이 없는 날도 0 으로 채워 날짜가 연속"""
+    if by is None:
+        daily = day_cube.groupby('날짜')['금액'].sum().to_frame('전체')
+    else:
+        daily = day_cube.groupby(['날짜', by], observed=True)['금액'].sum().unstack(fill_value=0)
+        daily.columns = daily.columns.astype(str)
+    if daily.empty:
+        return daily
+    return daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq='D'), fill_value=0)
+
+def resample_sales(daily, freq, window=1):
+    """
+    일별 매출 → freq('D' 일, 'W' 주(월요일 시작), 'M' 월) 합계, window > 1 이면 window 구간 이동평균
+    기간 양 끝의 주/월은 데이터가 있는 날만 합산
+    """
+    if freq in ('W', 'M'):
+        period = daily.index.to_period('W-SUN' if freq == 'W' else 'M')
+        daily = daily.groupby(period.start_time).sum()
+    return daily.rolling(window, min_periods=1).mean() if window > 1 else daily
+
+def minmax_downsample(values, max_points):
+    """
+    점 수가 max_points 를 넘으면 구간(max_points/2 개)마다 최솟값/최댓값 위치만 남긴 인덱스 (날짜순)
+    평균/간격 추출과 달리 급등/급락 지점이 사라지지 않음
+    """
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max(1, max_points // 2)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = values
+    blocks = padded.reshape(buckets, size)
+    filled = ~np.isnan(blocks).all(axis=1)
+    starts = np.flatnonzero(filled) * size
+    return np.unique(np.concatenate([starts + np.nanargmin(blocks[filled], axis=1), starts + np.nanargmax(blocks[filled], axis=1)]))
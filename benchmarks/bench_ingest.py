@@ -0,0 +1,123 @@
+"""
+수집 파이프라인 벤치마크 (목록 조회 → 다운로드 → 파싱 → 추출 → DataFrame 생성)
+
+    python -m benchmarks.bench_ingest [--sizes small,medium,large] [--repeat 1] [--parse-workers N]
+                                      [--output benchmarks/results/ingest.json] [--baseline 이전결과.json]
+
+크기별로 benchmarks.generate_workbooks 의 합성 데이터셋을 임시 폴더에 만들고, load_initial_dataset() 와 같은
+data_loader.refresh_from_source 경로를 로컬 데이터 소스로 실행해 단계별 시간을 JSON 으로 저장
+- cold: 빈 저장소에서 전체 수집 (스냅샷 저장 포함)
+- warm: 변경 없는 상태에서 재동기화 (목록 조회 + 원장 생성만)
+--baseline 을 주면 같은 크기의 이전 결과와 단계별로 비교해 출력
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from data_loader import DOWNLOAD_WORKERS, PARSE_WORKERS, LocalDataSource, new_sync_store, new_timings, refresh_from_source
+from benchmarks.generate_workbooks import generate_dataset
+
+# 크기 이름: (지점 수, 개월 수, 정산표 시트당 지출 행 수)
+SIZES = {
+    'small': (2, 6, 20),
+    'medium': (5, 12, 40),
+    'large': (10, 24, 60),
+}
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'ingest.json')
+STAGES = ['list_s', 'download_s', 'parse_s', 'extract_s', 'sync_s', 'snapshot_s', 'build_s', 'total_s']
+
+def environment():
+    return {
+        'python': platform.python_version(), 'pandas': pd.__version__, 'platform': platform.platform(),
+        'cpu_count': os.cpu_count(), 'timestamp': datetime.now().isoformat(timespec='seconds'),
+    }
+
+def timed_refresh(store, source, loader_config):
+    timings = new_timings()
+    started = time.perf_counter()
+    df, file_counts, processed_rows, file_stats = refresh_from_source(store, source, loader_config, timings)
+    timings['total_s'] = time.perf_counter() - started
+    timings['ledger_rows'] = len(df)
+    return timings
+
+def best_run(runs):
+    return min(runs, key=lambda timings: timings['total_s'])
+
+def run_size(name, branches, months, rows, repeat, loader_config, work_dir):
+    data_dir = os.path.join(work_dir, name)
+    generate_started = time.perf_counter()
+    file_count = generate_dataset(data_dir, branches, months, rows)
+    generate_s = time.perf_counter() - generate_started
+    source = LocalDataSource(data_dir)
+    cold_runs, warm_runs = [], []
+    for i in range(repeat):
+        snapshot_dir = os.path.join(work_dir, f'snapshot-{name}-{i}')
+        store = new_sync_store()
+        try:
+            cold_runs.append(timed_refresh(store, source, dict(loader_config, snapshot_dir=snapshot_dir)))
+            warm_runs.append(timed_refresh(store, source, dict(loader_config, snapshot_dir=snapshot_dir)))
+        finally:
+            if store['parse_pool'] is not None: store['parse_pool'].shutdown()
+    return {
+        'size': name, 'branches': branches, 'months': months, 'rows': rows, 'files': file_count,
+        'data_bytes': sum(int(file['size']) for file in source.list_files()), 'generate_s': generate_s,
+        'cold': best_run(cold_runs), 'warm': best_run(warm_runs),
+    }
+
+def print_run(result):
+    cold, warm = result['cold'], result['warm']
+    print(f"[{result['size']}] 지점 {result['branches']} × {result['months']}개월, 파일 {result['files']}개 "
+          f"({result['data_bytes'] / 1e6:.1f} MB), 원장 {cold['ledger_rows']:,}행")
+    print(" " * 7 + " ".join(f"{stage[:-2]:>9}" for stage in STAGES))
+    for label, timings in (('cold', cold), ('warm', warm)):
+        print(f"  {label:<5}" + " ".join(f"{timings[stage]:>9.3f}" for stage in STAGES))
+
+def print_comparison(results, baseline):
+    previous = {run['size']: run for run in baseline.get('runs', [])}
+    for result in results:
+        base = previous.get(result['size'])
+        if base is None: continue
+        print(f"[{result['size']}] 기준 대비 (현재/기준)")
+        for label in ('cold', 'warm'):
+            ratios = [f"{stage[:-2]} {result[label][stage] / base[label][stage]:.2f}x" for stage in STAGES if base[label].get(stage)]
+            print(f"  {label:<5}" + ", ".join(ratios))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="small,medium,large", help=f"쉼표로 구분 ({', '.join(SIZES)})")
+    parser.add_argument("--repeat", type=int, default=1, help="크기별 반복 횟수 (가장 빠른 실행을 기록)")
+    parser.add_argument("--download-workers", type=int, default=DOWNLOAD_WORKERS)
+    parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    loader_config = {'download_workers': args.download_workers, 'parse_workers': args.parse_workers}
+    work_dir = tempfile.mkdtemp(prefix='bench-ingest-')
+    try:
+        results = []
+        for name in args.sizes.split(','):
+            branches, months, rows = SIZES[name.strip()]
+            results.append(run_size(name.strip(), branches, months, rows, args.repeat, loader_config, work_dir))
+            print_run(results[-1])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {'environment': environment(), 'loader': loader_config, 'runs': results}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            print_comparison(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
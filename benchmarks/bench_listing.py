@@ -0,0 +1,54 @@
+"""
+Drive 목록 조회 벤치마크 (폴더별 재귀 조회 vs 레벨 단위 일괄 조회)
+
+    python -m benchmarks.bench_listing [--branches 20] [--months 36] [--latency 0.05]
+
+benchmarks.fake_drive 의 가짜 Drive 에 요청 지연을 주고, 두 방식의 요청 수와 소요 시간, 결과 경로 일치 여부를 출력
+"""
+import argparse
+import time
+
+from data_loader import DRIVE_FILE_FIELDS, DRIVE_FOLDER_MIME_TYPE, list_drive_tree
+from benchmarks.fake_drive import make_drive_layout
+
+def legacy_list_files_recursive(service, folder_id, path_prefix=""):
+    # 기존 구현 (폴더마다 1회 요청, 첫 페이지만 사용)
+    files = []
+    results = service.files().list(q=f"'{folder_id}' in parents and trashed=false", fields=DRIVE_FILE_FIELDS).execute()
+    for item in results.get('files', []):
+        item_path = f"{path_prefix}/{item['name']}" if path_prefix else item['name']
+        if item.get('mimeType') == DRIVE_FOLDER_MIME_TYPE:
+            files.extend(legacy_list_files_recursive(service, item['id'], item_path))
+        else:
+            item['path'] = item_path
+            files.append(item)
+    return files
+
+def measure(lister, service):
+    service.request_count = 0
+    start = time.perf_counter()
+    files = lister(service, 'root')
+    return time.perf_counter() - start, service.request_count, files
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--branches', type=int, default=20)
+    parser.add_argument('--months', type=int, default=36)
+    parser.add_argument('--latency', type=float, default=0.05, help='요청당 지연(초)')
+    args = parser.parse_args()
+
+    service = make_drive_layout(args.branches, args.months, latency=args.latency)
+    legacy_s, legacy_requests, legacy_files = measure(legacy_list_files_recursive, service)
+    batched_s, batched_requests, batched_files = measure(list_drive_tree, service)
+    expected = args.branches * args.months * 2
+    print(f"파일 {expected:,}개 / 지점 {args.branches} / 월 {args.months} / 요청 지연 {args.latency * 1000:.0f}ms")
+    print(f"  legacy  : {legacy_requests:5d} 요청  {legacy_s:7.2f} s  파일 {len(legacy_files):,}개 (100개 초과 폴더는 첫 페이지만)")
+    print(f"  batched : {batched_requests:5d} 요청  {batched_s:7.2f} s  파일 {len(batched_files):,}개")
+    if len(batched_files) != expected:
+        raise SystemExit("batched 목록이 전체 파일 수와 다릅니다")
+    legacy_paths = {f['path'] for f in legacy_files}
+    if not legacy_paths <= {f['path'] for f in batched_files}:
+        raise SystemExit("batched 목록에 legacy 경로가 빠져 있습니다")
+
+if __name__ == '__main__':
+    main()
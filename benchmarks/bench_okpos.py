@@ -0,0 +1,94 @@
+"""
+OKPOS 일별 매출 추출 벤치마크 (기존 행 단위 루프 vs 열 단위 벡터화)
+
+    python -m benchmarks.bench_okpos [--years 5] [--repeat 3]
+
+여러 해 분량의 합성 OKPOS 시트를 만들어 두 구현의 출력이 동일한지 확인한 뒤 소요 시간을 비교
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from extractors import (
+    OKPOS_DATA_START_ROW, OKPOS_COL_DATE, OKPOS_COL_DAY_OF_WEEK, OKPOS_COL_DINE_IN_SALES,
+    OKPOS_COL_TAKEOUT_SALES, OKPOS_COL_DELIVERY_SALES, extract_okpos_table
+)
+
+WEEKDAYS = ['월', '화', '수', '목', '금', '토', '일']
+
+def legacy_extract_okpos_table(df, 지점명):
+    # 벡터화 이전 구현 (비교 기준)
+    out = []
+    for i in range(OKPOS_DATA_START_ROW, df.shape[0]):
+        date_cell = df.iloc[i, OKPOS_COL_DATE]
+        if pd.isna(date_cell) or str(date_cell).strip() == '' or '합계' in str(date_cell): break
+        try:
+            if isinstance(date_cell, (int, float)):
+                날짜 = (pd.to_datetime('1899-12-30') + pd.to_timedelta(date_cell, 'D')).strftime('%Y-%m-%d')
+            else:
+                날짜 = pd.to_datetime(str(date_cell).replace("소계:", "").strip()).strftime('%Y-%m-%d')
+        except Exception: continue
+        요일_str = str(df.iloc[i, OKPOS_COL_DAY_OF_WEEK]).strip() + "요일"
+        홀매출 = pd.to_numeric(df.iloc[i, OKPOS_COL_DINE_IN_SALES], errors='coerce')
+        포장매출 = pd.to_numeric(df.iloc[i, OKPOS_COL_TAKEOUT_SALES], errors='coerce')
+        배달매출 = pd.to_numeric(df.iloc[i, OKPOS_COL_DELIVERY_SALES], errors='coerce')
+        if pd.notna(홀매출) and 홀매출 > 0: out.append([날짜, 지점명, '매출', '홀매출', 요일_str, 홀매출])
+        if pd.notna(포장매출) and 포장매출 > 0: out.append([날짜, 지점명, '매출', '포장매출', 요일_str, 포장매출])
+        if pd.notna(배달매출) and 배달매출 > 0: out.append([날짜, 지점명, '매출', '배달매출', 요일_str, 배달매출])
+    return out
+
+def make_okpos_sheet(years, seed=0):
+    """pd.read_excel(header=None) 결과와 같은 모양의 합성 OKPOS 시트 (날짜 형식/결측/0원 행 혼합)"""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range('2020-01-01', periods=int(365.25 * years), freq='D')
+    n_cols = OKPOS_COL_DELIVERY_SALES + 4
+    rows = [[None] * n_cols for _ in range(OKPOS_DATA_START_ROW)]
+    rows[2][0] = '일자별 매출 현황'
+    for i, day in enumerate(days):
+        row = [None] * n_cols
+        kind = i % 4
+        if kind == 0:
+            row[OKPOS_COL_DATE] = day.strftime('%Y-%m-%d')
+        elif kind == 1:
+            row[OKPOS_COL_DATE] = float((day - pd.Timestamp('1899-12-30')).days)
+        elif kind == 2:
+            row[OKPOS_COL_DATE] = f"소계:{day.strftime('%Y-%m-%d')}"
+        else:
+            row[OKPOS_COL_DATE] = day.to_pydatetime()
+        row[OKPOS_COL_DAY_OF_WEEK] = WEEKDAYS[day.weekday()]
+        for col in (OKPOS_COL_DINE_IN_SALES, OKPOS_COL_TAKEOUT_SALES, OKPOS_COL_DELIVERY_SALES):
+            draw = rng.random()
+            row[col] = None if draw < 0.05 else 0 if draw < 0.15 else int(rng.integers(10_000, 3_000_000))
+        if i % 97 == 0:
+            row[OKPOS_COL_DATE] = '2020-13-45'  # 파싱 불가 → 건너뜀
+        rows.append(row)
+    rows.append(['합계'] + [None] * (n_cols - 1))
+    rows.append(['출력일시', None])
+    return pd.DataFrame(rows, dtype=object)
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=float, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_okpos_sheet(args.years)
+    legacy_s, legacy_rows = best_of(lambda: legacy_extract_okpos_table(df, '벤치점'), args.repeat)
+    vector_s, vector_rows = best_of(lambda: extract_okpos_table(df, '벤치점'), args.repeat)
+    if legacy_rows != vector_rows:
+        raise SystemExit(f"출력 불일치: legacy {len(legacy_rows)}행 / vectorized {len(vector_rows)}행")
+    print(f"시트 {df.shape[0]:,}행 → 추출 {len(vector_rows):,}행 (출력 동일)")
+    print(f"  legacy     : {legacy_s * 1000:9.1f} ms")
+    print(f"  vectorized : {vector_s * 1000:9.1f} ms  ({legacy_s / vector_s:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+시뮬레이션 시나리오 벤치마크 (기존 단일 시나리오 루프 vs 배열 엔진)
+
+    python -m benchmarks.bench_scenarios [--scenarios 10000] [--repeat 3] [--seed 0]
+
+무작위 조건(기준값과 같은 매출, 조정률 0 등 경계값 포함)으로 두 구현의 결과가 칸마다 정확히 같은지 확인한 뒤
+시나리오 N 개를 계산하는 시간을 비교
+"""
+import argparse
+import time
+import numpy as np
+
+from analytics import VARIABLE_COST_ITEMS, DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS, FIXED_COST_ITEMS, ALL_POSSIBLE_EXPENSE_CATEGORIES
+from simulation import evaluate_scenarios
+
+def _is_close(a, b, tol=1e-9):
+    return abs(float(a) - float(b)) <= tol
+
+def legacy_scenario(base_total_revenue, base_delivery_takeout_revenue, base_costs, sim_revenue, sim_hall_ratio_pct, royalty_rate, cost_adjustments):
+    # 배열 엔진 이전 구현 (streamlit_app 시뮬레이션 실행 버튼, 비교 기준)
+    sim_delivery_ratio_pct = 100.0 - sim_hall_ratio_pct
+    if base_total_revenue > 0 and not _is_close(sim_revenue, base_total_revenue):
+        live_total_revenue_growth = sim_revenue / base_total_revenue
+    else:
+        live_total_revenue_growth = 1.0
+    _est_delivery_takeout = sim_revenue * (sim_delivery_ratio_pct / 100.0)
+    if base_delivery_takeout_revenue > 0 and not _is_close(_est_delivery_takeout, base_delivery_takeout_revenue):
+        live_delivery_takeout_revenue_growth = _est_delivery_takeout / base_delivery_takeout_revenue
+    else:
+        live_delivery_takeout_revenue_growth = 1.0
+
+    sim_costs = {}
+    for item in VARIABLE_COST_ITEMS:
+        if item in base_costs:
+            gf = float(live_total_revenue_growth)
+            adj = float(cost_adjustments.get(item, 0.0))
+            factor = gf * (1 + adj / 100.0) if not (_is_close(gf, 1.0) and _is_close(adj, 0.0)) else 1.0
+            sim_costs[item] = float(base_costs[item]) * factor
+    for item in DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS:
+        if item in base_costs:
+            gf = float(live_delivery_takeout_revenue_growth)
+            adj = float(cost_adjustments.get(item, 0.0))
+            factor = gf * (1 + adj / 100.0) if not (_is_close(gf, 1.0) and _is_close(adj, 0.0)) else 1.0
+            sim_costs[item] = float(base_costs[item]) * factor
+    for item in FIXED_COST_ITEMS:
+        if item in base_costs:
+            adj = float(cost_adjustments.get(item, 0.0))
+            factor = (1 + adj / 100.0) if not _is_close(adj, 0.0) else 1.0
+            sim_costs[item] = float(base_costs[item]) * factor
+    defined = set(VARIABLE_COST_ITEMS) | set(DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS) | set(FIXED_COST_ITEMS)
+    for item in base_costs:
+        if item not in defined:
+            adj = float(cost_adjustments.get(item, 0.0))
+            factor = (1 + adj / 100.0) if not _is_close(adj, 0.0) else 1.0
+            sim_costs[item] = float(base_costs[item]) * factor
+    royalty_rate = float(royalty_rate)
+    sim_costs['로열티'] = float(sim_revenue) * (royalty_rate / 100.0)
+
+    sim_total_cost = float(sum(sim_costs.values()))
+    sim_profit = float(sim_revenue - sim_total_cost)
+    sim_profit_margin = float((sim_profit / sim_revenue * 100.0) if sim_revenue > 0 else 0.0)
+    return sim_costs, sim_total_cost, sim_profit, sim_profit_margin
+
+def make_base(rng):
+    base_costs = {item: float(rng.uniform(1e6, 2e7)) for item in ALL_POSSIBLE_EXPENSE_CATEGORIES + ['기타비용']}
+    return {'base_total_revenue': 86_109_567.66666667, 'base_delivery_takeout_revenue': 51_000_123.3, 'base_costs': base_costs}
+
+def make_scenarios(rng, n, base):
+    revenue = rng.uniform(0, 150_000_000, n).round(-5)
+    revenue[::7] = base['base_total_revenue']  # 기준 매출 그대로 (성장계수 1.0)
+    revenue[::11] = 0.0
+    hall = rng.uniform(0, 100, n).round(1)
+    hall[::5] = (1 - base['base_delivery_takeout_revenue'] / base['base_total_revenue']) * 100
+    royalty = rng.uniform(0, 10, n).round(1)
+    adjustments = {}
+    for item in base['base_costs']:
+        adj = rng.uniform(-50, 50, n).round(1)
+        adj[rng.random(n) < 0.5] = 0.0
+        adjustments[item] = adj
+    return {'revenue': revenue, 'hall_ratio_pct': hall, 'royalty_rate': royalty, 'adjustments': adjustments}
+
+def run_legacy(base, scenarios):
+    n = len(scenarios['revenue'])
+    return [legacy_scenario(**base, sim_revenue=float(scenarios['revenue'][i]), sim_hall_ratio_pct=float(scenarios['hall_ratio_pct'][i]),
+                            royalty_rate=float(scenarios['royalty_rate'][i]),
+                            cost_adjustments={item: float(adj[i]) for item, adj in scenarios['adjustments'].items()})
+            for i in range(n)]
+
+def check_identical(legacy, batch):
+    # 부동소수까지 완전히 같은지 (허용오차 없이 비교)
+    for i, (costs, total_cost, profit, margin) in enumerate(legacy):
+        row = (batch['total_cost'][i], batch['profit'][i], batch['profit_margin'][i])
+        if row != (total_cost, profit, margin) or any(batch['costs'][item][i] != cost for item, cost in costs.items()):
+            raise AssertionError(f"시나리오 {i} 결과 불일치: {row} != {(total_cost, profit, margin)}")
+        if list(batch['costs']) != list(costs):
+            raise AssertionError(f"비용 항목 순서 불일치: {list(batch['costs'])} != {list(costs)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    base = make_base(rng)
+    scenarios = make_scenarios(rng, args.scenarios, base)
+    check_identical(run_legacy(base, scenarios), evaluate_scenarios(**base, **scenarios))
+    print(f"시나리오 {args.scenarios:,}개: 결과 동일")
+
+    for label, fn in (('legacy', lambda: run_legacy(base, scenarios)), ('batch', lambda: evaluate_scenarios(**base, **scenarios))):
+        best = float('inf')
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        print(f"  {label:<7}{best * 1000:>10.1f} ms")
+
+if __name__ == "__main__":
+    main()
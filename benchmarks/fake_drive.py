@@ -0,0 +1,82 @@
+"""
+Google Drive v3 files() API 의 로컬 대역 (목록 조회 전용)
+
+실제 API 처럼 q 의 "'<id>' in parents" 조건과 pageSize/pageToken 페이지 처리를 흉내 내고,
+요청마다 지연(latency)을 주면서 요청 수를 센다. 네트워크 없이 목록 조회 비용을 재는 데 사용
+"""
+import re
+import threading
+import time
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+XLSX_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+MAX_PAGE_SIZE = 1000
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+class _Files:
+    def __init__(self, service):
+        self._service = service
+
+    def list(self, q='', fields=None, pageSize=100, pageToken=None, **kwargs):
+        return _Request(lambda: self._service._list(q, pageSize, pageToken))
+
+class FakeDriveService:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.request_count = 0
+        self._items = {}
+        self._children = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def files(self):
+        return _Files(self)
+
+    def add(self, parent_id, name, folder=False, **meta):
+        with self._lock:
+            self._next_id += 1
+            item_id = f"{'fld' if folder else 'fil'}{self._next_id:06d}"
+        item = {'id': item_id, 'name': name, 'mimeType': FOLDER_MIME_TYPE if folder else XLSX_MIME_TYPE, 'parents': [parent_id], **meta}
+        self._items[item_id] = item
+        self._children.setdefault(parent_id, []).append(item_id)
+        return item_id
+
+    def add_path(self, root_id, path, **meta):
+        # 'a/b/c.xlsx' 형태 경로를 폴더를 만들어 가며 추가
+        parent_id = root_id
+        *folders, file_name = path.split('/')
+        for folder in folders:
+            existing = [i for i in self._children.get(parent_id, []) if self._items[i]['name'] == folder and self._items[i]['mimeType'] == FOLDER_MIME_TYPE]
+            parent_id = existing[0] if existing else self.add(parent_id, folder, folder=True)
+        return self.add(parent_id, file_name, **meta)
+
+    def _list(self, q, page_size, page_token):
+        with self._lock:
+            self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+        parent_ids = re.findall(r"'([^']+)' in parents", q)
+        matched = [dict(self._items[i]) for parent_id in parent_ids for i in self._children.get(parent_id, [])]
+        start = int(page_token or 0)
+        end = start + min(page_size or 100, MAX_PAGE_SIZE)
+        response = {'files': matched[start:end]}
+        if end < len(matched):
+            response['nextPageToken'] = str(end)
+        return response
+
+def make_drive_layout(branches=20, months=36, latency=0.0, root_id='root'):
+    """정산표/<지점>/<yy.mm>.xlsx, OKPOS/<지점>/<yy.mm>.xlsx 구조의 가짜 Drive"""
+    service = FakeDriveService(latency=latency)
+    for b in range(branches):
+        for m in range(months):
+            year, month = 20 + m // 12, m % 12 + 1
+            for top in ('정산표', 'OKPOS'):
+                service.add_path(root_id, f"{top}/지점{b:02d}/{year:02d}.{month:02d}.xlsx",
+                                 modifiedTime=f"20{year:02d}-{month:02d}-28T00:00:00.000Z", md5Checksum=f"{b}-{m}-{top}", size='20480')
+    return service
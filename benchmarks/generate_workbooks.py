@@ -0,0 +1,128 @@
+"""
+벤치마크용 합성 엑셀 생성기 (OKPOS 일별 매출 / 월별 시트 정산표 / 대전공장 정산표)
+
+    python -m benchmarks.generate_workbooks OUT_DIR [--branches 5] [--months 12] [--rows 40] [--seed 0]
+
+extractors 의 열 상수로 실제 파일과 같은 배치를 만들고, 로컬 데이터 소스가 읽는 폴더 구조로 저장
+    OUT_DIR/OKPOS/<지점명>/<yy.mm>.xlsx      (한 달치 일별 매출, 마지막에 합계 행)
+    OUT_DIR/정산표/<지점명>/<yyyy>.xlsx      (시트 이름 yy.mm, 항목별 지출 + 빈 행 + 합계 행)
+    OUT_DIR/정산표/대전공장/<yyyy>.xlsx      (B열 '총매출' / C열 금액 포함, OKPOS 없음)
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from extractors import (
+    OKPOS_DATA_START_ROW, OKPOS_COL_DATE, OKPOS_COL_DAY_OF_WEEK, OKPOS_COL_DINE_IN_SALES,
+    OKPOS_COL_TAKEOUT_SALES, OKPOS_COL_DELIVERY_SALES, SETTLEMENT_DATA_START_ROW, SETTLEMENT_EXPENSE_COLUMNS
+)
+
+WEEKDAYS = ['월', '화', '수', '목', '금', '토', '일']
+FACTORY_BRANCH = '대전공장'
+START_MONTH = '2023-01'
+
+# 분류별 품목 후보 (식자재에는 김/면/다시마 '품목(규격)' 이 섞여 있음)
+SETTLEMENT_ITEMS = {
+    "인건비": ['홍길동', '김철수', '이영희', '박민수', '최지우', '정하늘'],
+    "식자재": ['김(조미김)', '면(우동면)', '다시마(10kg)', '쌀', '양파', '대파', '돼지고기', '닭고기', '식용유', '간장'],
+    "소모품": ['세제', '위생장갑', '포장용기', '물티슈', '키친타월'],
+    "광고비": ['배민광고', '쿠팡이츠광고', '전단지', 'SNS광고'],
+    "고정비": ['월세', '관리비', '전기', '가스', '수도', '배달대행료', '배달수수료', '인터넷'],
+}
+OKPOS_HEADER_ROWS = [(0, ['일자별 매출현황']), (2, ['조회기간']), (OKPOS_DATA_START_ROW - 2, ['일자', '요일'])]
+
+def branch_names(count):
+    # 마지막 지점은 대전공장 (정산표에 총매출 행이 있는 변형)
+    names = [f'지점{i + 1:02d}' for i in range(max(count - 1, 0))]
+    return names + [FACTORY_BRANCH] if count else names
+
+def month_range(months):
+    return list(pd.period_range(START_MONTH, periods=months, freq='M'))
+
+def write_okpos_workbook(path, month, rng):
+    workbook = xlsxwriter.Workbook(path)
+    ws = workbook.add_worksheet('Sheet1')
+    for row, values in OKPOS_HEADER_ROWS:
+        ws.write_row(row, 0, values)
+    ws.write(OKPOS_DATA_START_ROW - 2, OKPOS_COL_DINE_IN_SALES, '홀')
+    ws.write(OKPOS_DATA_START_ROW - 2, OKPOS_COL_TAKEOUT_SALES, '포장')
+    ws.write(OKPOS_DATA_START_ROW - 2, OKPOS_COL_DELIVERY_SALES, '배달')
+    days = pd.date_range(month.start_time, month.end_time.normalize(), freq='D')
+    totals = np.zeros(3)
+    for i, day in enumerate(days):
+        row = OKPOS_DATA_START_ROW + i
+        # 채널별 매출 (가끔 0 → 추출 대상에서 빠짐), 중간 열은 실제 파일처럼 다른 집계값으로 채움
+        sales = rng.integers(0, 2_000_000, size=3) * (rng.random(3) > 0.05)
+        totals += sales
+        ws.write(row, OKPOS_COL_DATE, day.strftime('%Y-%m-%d'))
+        ws.write(row, OKPOS_COL_DAY_OF_WEEK, WEEKDAYS[day.dayofweek])
+        ws.write_row(row, OKPOS_COL_DAY_OF_WEEK + 1, rng.integers(0, 100, size=OKPOS_COL_DINE_IN_SALES - OKPOS_COL_DAY_OF_WEEK - 1).tolist())
+        for col, value in zip((OKPOS_COL_DINE_IN_SALES, OKPOS_COL_TAKEOUT_SALES, OKPOS_COL_DELIVERY_SALES), sales):
+            ws.write(row, col, int(value))
+    total_row = OKPOS_DATA_START_ROW + len(days)
+    ws.write(total_row, OKPOS_COL_DATE, '합계')
+    for col, value in zip((OKPOS_COL_DINE_IN_SALES, OKPOS_COL_TAKEOUT_SALES, OKPOS_COL_DELIVERY_SALES), totals):
+        ws.write(total_row, col, int(value))
+    workbook.close()
+
+def write_settlement_sheet(ws, rows, rng, factory=False):
+    ws.write(0, 1, '월 정산표')
+    if factory:
+        ws.write(1, 1, '총매출')
+        ws.write(1, 2, int(rng.integers(50_000_000, 90_000_000)))
+    for category, item_col, amount_col in SETTLEMENT_EXPENSE_COLUMNS:
+        ws.write(SETTLEMENT_DATA_START_ROW - 1, item_col, category)
+        ws.write(SETTLEMENT_DATA_START_ROW - 1, amount_col, '금액')
+        # 분류마다 길이가 다른 목록 (첫 분류는 항상 rows 행을 채워 빈 행 기준이 rows 뒤가 되도록 함)
+        options = SETTLEMENT_ITEMS[category]
+        length = rows if item_col == SETTLEMENT_EXPENSE_COLUMNS[0][1] else int(rng.integers(rows // 2, rows + 1))
+        for i in range(length):
+            ws.write(SETTLEMENT_DATA_START_ROW + i, item_col, options[i % len(options)])
+            ws.write(SETTLEMENT_DATA_START_ROW + i, amount_col, int(rng.integers(10_000, 3_000_000)))
+    # 빈 행 다음의 합계 행은 추출 범위 밖이어야 함
+    total_row = SETTLEMENT_DATA_START_ROW + rows + 1
+    for _, item_col, amount_col in SETTLEMENT_EXPENSE_COLUMNS:
+        ws.write(total_row, item_col, '합계')
+        ws.write(total_row, amount_col, int(rng.integers(1_000_000, 50_000_000)))
+
+def write_settlement_workbook(path, months, rows, rng, factory=False):
+    workbook = xlsxwriter.Workbook(path)
+    for month in months:
+        write_settlement_sheet(workbook.add_worksheet(month.strftime('%y.%m')), rows, rng, factory)
+    workbook.close()
+
+def generate_dataset(out_dir, branches=5, months=12, rows=40, seed=0):
+    """합성 데이터셋을 out_dir 에 쓰고 생성한 파일 수를 반환"""
+    rng = np.random.default_rng(seed)
+    periods = month_range(months)
+    written = 0
+    for 지점명 in branch_names(branches):
+        factory = 지점명 == FACTORY_BRANCH
+        settlement_dir = os.path.join(out_dir, '정산표', 지점명)
+        os.makedirs(settlement_dir, exist_ok=True)
+        for year, year_months in pd.Series(periods).groupby([p.year for p in periods]):
+            write_settlement_workbook(os.path.join(settlement_dir, f'{year}.xlsx'), list(year_months), rows, rng, factory)
+            written += 1
+        if factory: continue
+        okpos_dir = os.path.join(out_dir, 'OKPOS', 지점명)
+        os.makedirs(okpos_dir, exist_ok=True)
+        for month in periods:
+            write_okpos_workbook(os.path.join(okpos_dir, f"{month.strftime('%y.%m')}.xlsx"), month, rng)
+            written += 1
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir")
+    parser.add_argument("--branches", type=int, default=5, help="지점 수 (마지막 지점은 대전공장)")
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--rows", type=int, default=40, help="정산표 시트당 지출 행 수")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    written = generate_dataset(args.out_dir, args.branches, args.months, args.rows, args.seed)
+    print(f"{args.out_dir}: 파일 {written}개 생성")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+import io
+import os
+import json
+import time
+import shutil
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+from pandas.api.types import union_categoricals
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseDownload
+from google.oauth2 import service_account
+
+from extractors import get_engine, classify_file, parse_workbook
+
+# ==============================================================================
+#     데이터 수집 파이프라인
+#     - 데이터 소스: Google Drive 또는 같은 구조(정산표/<지점>/..., OKPOS/<지점>/...)의 로컬 폴더
+#     - 다운로드: 스레드 풀 / 파싱·추출: 프로세스 풀 (extractors.parse_workbook)
+# ==============================================================================
+
+# --- Google Drive 설정 ---
+DRIVE_FOLDER_ID = '13pZg9s5CKv5nn84Zbnk7L6xmiwF_zluR'
+DRIVE_FILE_FIELDS = "nextPageToken, files(id, name, mimeType, parents, modifiedTime, md5Checksum, size)"
+DRIVE_FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+DRIVE_LIST_PAGE_SIZE = 1000
+DRIVE_PARENTS_PER_QUERY = 50  # q 문자열 길이 제한을 넘지 않도록 한 번에 묻는 폴더 수
+DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
+
+# --- 통합 원장 ---
+LEDGER_COLUMNS = ['날짜', '지점명', '분류', '항목1', '항목2', '금액']
+# 로딩 시 한 번만 만드는 파생 컬럼 / 범주형(category)으로 두는 저카디널리티 문자열 컬럼
+LEDGER_CATEGORY_COLUMNS = ['지점명', '분류', '항목1', '항목2', '파일ID']
+WEEKDAY_NAMES = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일']
+
+# --- 로컬 스냅샷 (Parquet, 지점명/연월 파티션) ---
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.snapshot')
+SNAPSHOT_SCHEMA_VERSION = 1
+
+# --- 병렬 처리 기본값 (secrets 의 [loader] 섹션으로 변경 가능) ---
+DOWNLOAD_WORKERS = 8
+PARSE_WORKERS = os.cpu_count() or 1
+
+def new_sync_store():
+    # 파일 ID별 manifest(modifiedTime, md5Checksum, size)와 추출 결과
+    # synced_branches: 한 번이라도 동기화한 지점 (None 이면 전체 지점), snapshot_created_at: 복원한 스냅샷의 저장 시각
+    return {'lock': threading.Lock(), 'manifest': {}, 'files': {}, 'synced_branches': set(), 'snapshot_created_at': None, 'parse_pool': None}
+
+def list_drive_tree(service, folder_id, path_prefix=""):
+    """
+    폴더 트리를 레벨 단위(BFS)로 조회
+    같은 레벨의 폴더들은 "'a' in parents or 'b' in parents ..." 로 묶어 한 번에 묻고, nextPageToken 을 끝까지 따라감
+    파일마다 루트 기준 경로를 'path' 에 채워 경로순으로 반환
+    조회 오류(HttpError)는 그대로 올려 보냄: 일부만 담긴 목록으로 동기화하면 빠진 파일을 삭제로 처리하게 됨
+    """
+    files = []
+    level = {folder_id: path_prefix}
+    seen_folders = {folder_id}
+    while level:
+        next_level = {}
+        parent_ids = list(level)
+        for start in range(0, len(parent_ids), DRIVE_PARENTS_PER_QUERY):
+            chunk = parent_ids[start:start + DRIVE_PARENTS_PER_QUERY]
+            query = "(" + " or ".join(f"'{parent_id}' in parents" for parent_id in chunk) + ") and trashed=false"
+            page_token = None
+            while True:
+                response = service.files().list(q=query, fields=DRIVE_FILE_FIELDS, pageSize=DRIVE_LIST_PAGE_SIZE, pageToken=page_token).execute()
+                for item in response.get('files', []):
+                    parent_id = next((p for p in item.get('parents', []) if p in level), chunk[0])
+                    item_path = f"{level[parent_id]}/{item['name']}" if level[parent_id] else item['name']
+                    if item.get('mimeType') == DRIVE_FOLDER_MIME_TYPE:
+                        if item['id'] not in seen_folders:
+                            seen_folders.add(item['id'])
+                            next_level[item['id']] = item_path
+                    else:
+                        item['path'] = item_path
+                        files.append(item)
+                page_token = response.get('nextPageToken')
+                if not page_token: break
+        level = next_level
+    return sorted(files, key=lambda item: (item['path'], item['id']))
+
+def file_signature(file):
+    return (file.get('modifiedTime'), file.get('md5Checksum'), file.get('size'))
+
+def branch_from_path(file_path):
+    path_parts = [part for part in file_path.split('/') if part]
+    return path_parts[-2] if len(path_parts) >= 2 else "미분류"
+
+def in_branch_scope(branch, branches):
+    # branches 가 None 이면 전체 지점
+    return branches is None or branch in branches
+
+def covers_branches(store, branches):
+    """store 의 추출 결과가 branches(None 이면 전체) 를 모두 동기화한 상태인지"""
+    synced = store['synced_branches']
+    return synced is None or (branches is not None and set(branches) <= synced)
+
+def download_file(drive_service, file_id):
+    fh = io.BytesIO()
+    request = drive_service.files().get_media(fileId=file_id)
+    downloader = MediaIoBaseDownload(fh, request)
+    done = False
+    while not done: _, done = downloader.next_chunk()
+    fh.seek(0)
+    return fh
+
+# ------------------ 데이터 소스 ------------------
+class DataSource:
+    """
+    파일 목록과 내용을 제공하는 수집 대상
+    list_files() 는 id/name/path 와 변경 감지용 modifiedTime/md5Checksum/size 를 담은 dict 목록,
+    read_bytes(file) 는 파일 내용을 반환 (여러 스레드에서 동시에 호출됨)
+    """
+    name = "데이터 소스"
+    fetch_errors = ()  # 이 예외로 실패한 파일은 이번 동기화에서 건너뜀
+
+    def list_files(self):
+        raise NotImplementedError
+
+    def read_bytes(self, file):
+        raise NotImplementedError
+
+class DriveDataSource(DataSource):
+    name = "Google Drive"
+    fetch_errors = (HttpError,)
+
+    def __init__(self, credentials_info, folder_id=DRIVE_FOLDER_ID):
+        self.credentials = service_account.Credentials.from_service_account_info(credentials_info, scopes=DRIVE_SCOPES)
+        self.folder_id = folder_id
+        self._thread_state = threading.local()
+
+    def service(self):
+        # googleapiclient 의 HTTP 객체는 스레드 안전하지 않아 스레드마다 따로 생성
+        if not hasattr(self._thread_state, 'service'):
+            self._thread_state.service = build('drive', 'v3', credentials=self.credentials)
+        return self._thread_state.service
+
+    def list_files(self):
+        return list_drive_tree(self.service(), self.folder_id)
+
+    def read_bytes(self, file):
+        return download_file(self.service(), file['id']).getvalue()
+
+class LocalDataSource(DataSource):
+    name = "로컬 폴더"
+    fetch_errors = (OSError,)
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def list_files(self):
+        files = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames.sort()
+            for file_name in sorted(filenames):
+                full_path = os.path.join(dirpath, file_name)
+                rel_path = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+                stat = os.stat(full_path)
+                files.append({'id': rel_path, 'name': file_name, 'path': rel_path, 'modifiedTime': str(stat.st_mtime_ns), 'md5Checksum': None, 'size': str(stat.st_size)})
+        return files
+
+    def read_bytes(self, file):
+        with open(os.path.join(self.root, file['id']), 'rb') as f:
+            return f.read()
+
+def data_source_from_config(source_config, google_info=None):
+    """secrets 의 [data_source] (type = "drive" | "local", path/folder_id) 로 데이터 소스 생성"""
+    source_type = source_config.get("type", "drive")
+    if source_type == "local":
+        return LocalDataSource(source_config["path"])
+    if source_type == "drive":
+        return DriveDataSource(google_info, source_config.get("folder_id", DRIVE_FOLDER_ID))
+    raise ValueError(f"알 수 없는 데이터 소스 종류: {source_type}")
+
+def rows_to_frame(rows, file_id):
+    df_rows = pd.DataFrame(rows, columns=LEDGER_COLUMNS)
+    df_rows['파일ID'] = file_id
+    df_rows['금액'] = pd.to_numeric(df_rows['금액'], errors='coerce')
+    df_rows.dropna(subset=['금액', '날짜'], inplace=True)
+    df_rows['날짜'] = pd.to_datetime(df_rows['날짜'], errors='coerce')
+    df_rows.dropna(subset=['날짜'], inplace=True)
+    return df_rows[df_rows['금액'] > 0]
+
+def get_parse_pool(store, parse_workers):
+    # spawn: 스레드가 떠 있는 Streamlit 서버 프로세스를 fork 하지 않도록
+    if store.get('parse_pool') is None:
+        store['parse_pool'] = ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context('spawn'))
+    return store['parse_pool']
+
+# 파일별 처리 기록 (파일 처리 요약 표의 열 이름)
+FILE_STATS_COLUMNS = {
+    'path': '파일', 'branch': '지점명', 'kind': '종류', 'bytes': '크기(bytes)', 'download_s': '다운로드(초)',
+    'parse_s': '파싱(초)', 'extract_s': '추출(초)', 'sheets': '시트 수', 'rows': '추출 행 수', 'error': '실패 사유',
+}
+
+def new_file_telemetry(file_path, kind, size=0):
+    return {'path': file_path, 'branch': branch_from_path(file_path), 'kind': kind, 'bytes': size,
+            'download_s': 0.0, 'parse_s': 0.0, 'extract_s': 0.0, 'sheets': 0, 'rows': 0, 'error': None}
+
+def timed_read(source, file):
+    started = time.perf_counter()
+    content = source.read_bytes(file)
+    return content, time.perf_counter() - started
+
+def new_timings():
+    # 단계별 누적 시간(초). download/parse/extract 는 파일별 시간의 합이라 병렬 실행 시 벽시계 시간보다 클 수 있음
+    return {'list_s': 0.0, 'download_s': 0.0, 'parse_s': 0.0, 'extract_s': 0.0, 'sync_s': 0.0, 'build_s': 0.0, 'snapshot_s': 0.0,
+            'files_listed': 0, 'files_fetched': 0, 'files_failed': 0, 'download_bytes': 0}
+
+def sync_files(source, all_files, store, download_workers=DOWNLOAD_WORKERS, parse_workers=PARSE_WORKERS, timings=None, branches=None, file_ids=None):
+    """
+    manifest 와 비교해 신규/변경 파일만 다시 내려받아 추출하고, 소스에서 사라진 파일의 행은 제거
+    다운로드(스레드 풀)와 파싱(프로세스 풀)을 겹쳐 실행하고, 결과는 목록 순서대로 반영
+    branches 를 주면 그 지점(경로의 상위 폴더명) 파일만 내려받고, 다른 지점의 결과는 건드리지 않음
+    file_ids 를 주면 그 파일들만 확인 (부분 새로고침)
+    반환값: 반영된 변경(신규/변경/삭제) 파일 수
+    파일별 실패 사유는 처리 기록에만 남김 (백그라운드 스레드에서도 실행되므로 화면 출력은 세션 쪽에서)
+    """
+    timings = timings if timings is not None else new_timings()
+    manifest, results = store['manifest'], store['files']
+    current_ids = set()
+    pending = []
+    changed = 0
+    for file in all_files:
+        file_id, file_name = file['id'], file['name']
+        current_ids.add(file_id)
+        file_path = file.get('path', file_name)
+        branch = branch_from_path(file_path)
+        if not in_branch_scope(branch, branches) or (file_ids is not None and file_id not in file_ids):
+            continue
+        signature = file_signature(file)
+        if file_id in results and manifest.get(file_id) == signature:
+            continue
+        if not get_engine(file_name):
+            telemetry = new_file_telemetry(file_path, '기타/미지원', int(file.get('size') or 0))
+            results[file_id] = {'kind': '기타/미지원', 'branch': branch, 'frame': None, 'row_count': 0, 'telemetry': telemetry}
+            manifest[file_id] = signature
+            changed += 1
+            continue
+        pending.append((file, signature, (file_name, file_path, branch)))
+
+    parsed, downloads = {}, {}
+    if pending:
+        parse_pool = get_parse_pool(store, parse_workers) if parse_workers > 1 and len(pending) > 1 else None
+        with ThreadPoolExecutor(max_workers=max(1, download_workers)) as download_pool:
+            download_futures = {download_pool.submit(timed_read, source, file): i for i, (file, _, _) in enumerate(pending)}
+            for future in as_completed(download_futures):
+                i = download_futures[future]
+                try:
+                    content, download_s = future.result()
+                except source.fetch_errors as e:
+                    downloads[i] = (0, 0.0, f"다운로드 실패: {e}")
+                    continue
+                downloads[i] = (len(content), download_s, None)
+                timings['download_s'] += download_s
+                timings['download_bytes'] += len(content)
+                timings['files_fetched'] += 1
+                args = (content,) + pending[i][2]
+                parsed[i] = (parse_pool.submit(parse_workbook, *args), args) if parse_pool else (None, parse_workbook(*args))
+
+    for i in sorted(downloads):
+        file, signature, (file_name, file_path, branch) = pending[i]
+        file_id = file['id']
+        size, download_s, download_error = downloads[i]
+        telemetry = new_file_telemetry(file_path, classify_file(file_path), size)
+        telemetry['download_s'] = download_s
+        if download_error is not None:
+            # 내려받지 못한 파일은 실패 기록만 남기고 manifest 는 비워 다음 동기화 때 다시 시도
+            # 이전에 추출한 행이 있으면 (변경된 파일의 재다운로드 실패) 마지막으로 성공한 행을 그대로 유지
+            telemetry['error'] = download_error
+            manifest.pop(file_id, None)
+            timings['files_failed'] += 1
+            previous = results.get(file_id)
+            if previous is not None and previous['frame'] is not None:
+                telemetry['rows'] = previous['row_count']
+                results[file_id] = dict(previous, telemetry=telemetry)
+            else:
+                results[file_id] = {'kind': telemetry['kind'], 'branch': branch, 'frame': None, 'row_count': 0, 'telemetry': telemetry}
+            changed += 1
+            continue
+        future, value = parsed[i]
+        if future is not None:
+            try:
+                value = future.result()
+            except BrokenProcessPool:
+                store['parse_pool'] = None
+                value = parse_workbook(*value)
+        kind, rows, error, stats = value
+        timings['parse_s'] += stats['parse_s']
+        timings['extract_s'] += stats['extract_s']
+        telemetry.update(stats, rows=len(rows), error=error)
+        if error is None:
+            manifest[file_id] = signature
+        else:
+            # 실패한 파일은 manifest 를 갱신하지 않아 다음 동기화 때 다시 시도
+            manifest.pop(file_id, None)
+            timings['files_failed'] += 1
+        started = time.perf_counter()
+        results[file_id] = {
+            'kind': kind or classify_file(file_path), 'branch': branch, 'frame': rows_to_frame(rows, file_id) if rows else None,
+            'row_count': len(rows), 'telemetry': telemetry
+        }
+        timings['build_s'] += time.perf_counter() - started
+        changed += 1
+
+    for removed_id in set(results) - current_ids:
+        results.pop(removed_id, None)
+        manifest.pop(removed_id, None)
+        changed += 1
+    # 부분 새로고침(file_ids)은 지점 전체를 확인한 것이 아니라 동기화 범위에 넣지 않음
+    if file_ids is None:
+        if branches is None:
+            store['synced_branches'] = None
+        elif store['synced_branches'] is not None:
+            store['synced_branches'].update(branches)
+    return changed
+
+def refresh_from_source(store, source, loader_config, timings=None, branches=None):
+    """
+    소스 목록 조회 → 변경 파일 동기화 → (변경 시) 스냅샷 저장 → 통합 원장 생성
+    load_initial_dataset() 와 벤치마크가 공통으로 쓰는 경로. timings 에 단계별 시간을 누적
+    branches 를 주면 그 지점 파일만 동기화해 그 지점 원장만 만듦 (다른 지점의 추출 결과는 store 에 그대로 남음)
+    """
+    timings = timings if timings is not None else new_timings()
+    started = time.perf_counter()
+    all_files = source.list_files()
+    timings['list_s'] += time.perf_counter() - started
+    timings['files_listed'] += len(all_files)
+    snapshot_dir = loader_config.get("snapshot_dir", SNAPSHOT_DIR)
+    with store['lock']:
+        started = time.perf_counter()
+        changed = sync_files(
+            source, all_files, store,
+            download_workers=int(loader_config.get("download_workers", DOWNLOAD_WORKERS)),
+            parse_workers=int(loader_config.get("parse_workers", PARSE_WORKERS)),
+            timings=timings, branches=branches
+        )
+        timings['sync_s'] += time.perf_counter() - started
+        if snapshot_dir and (changed or not has_snapshot(snapshot_dir)):
+            started = time.perf_counter()
+            write_snapshot(store, snapshot_dir)
+            timings['snapshot_s'] += time.perf_counter() - started
+        started = time.perf_counter()
+        result = build_ledger(store, branches)
+        timings['build_s'] += time.perf_counter() - started
+        return result
+
+def select_refresh_targets(store, all_files, branch=None, month=None, file_path=None, branches=None):
+    """
+    부분 새로고침 대상 파일 ID (조건을 여러 개 주면 모두 만족하는 파일)
+    - branch: 그 지점 폴더의 파일 / file_path: 그 경로의 파일
+    - month('YYYY-MM'): 캐시된 행에 그 달이 있는 파일 + 아직 추출한 적 없는 파일
+      (정산표는 연 단위 파일이라 해당 연도 파일 전체를 다시 읽음)
+    """
+    targets = set()
+    for file in all_files:
+        path = file.get('path', file['name'])
+        if not in_branch_scope(branch_from_path(path), branches): continue
+        if file_path is not None and path != file_path: continue
+        if branch is not None and branch_from_path(path) != branch: continue
+        if month is not None and file['id'] in store['files']:
+            frame = store['files'][file['id']]['frame']
+            if frame is None or not (frame['날짜'].dt.strftime('%Y-%m') == month).any(): continue
+        targets.add(file['id'])
+    return targets
+
+def refresh_files(store, source, loader_config, branch=None, month=None, file_path=None, branches=None, timings=None):
+    """
+    관리자 부분 새로고침: 대상 파일만 manifest 와 무관하게 다시 내려받아 추출
+    반환값: (행이 바뀐 파일 ID, 그 파일들의 새 행 목록, 파일 수, 추출 행 수, 파일별 처리 기록)
+    - 바뀐 파일 ID 에는 소스에서 사라져 행을 지운 파일도 포함
+    - 파일 수/행 수/처리 기록은 branches 범위 전체 기준 (원장에 이어 붙일 때 그대로 사용)
+    """
+    timings = timings if timings is not None else new_timings()
+    started = time.perf_counter()
+    all_files = source.list_files()
+    timings['list_s'] += time.perf_counter() - started
+    timings['files_listed'] += len(all_files)
+    snapshot_dir = loader_config.get("snapshot_dir", SNAPSHOT_DIR)
+    with store['lock']:
+        listed_ids = {file['id'] for file in all_files}
+        removed_ids = {file_id for file_id, result in store['files'].items() if file_id not in listed_ids and in_branch_scope(result.get('branch'), branches)}
+        targets = select_refresh_targets(store, all_files, branch, month, file_path, branches)
+        for target_id in targets:
+            store['manifest'].pop(target_id, None)
+        started = time.perf_counter()
+        sync_files(
+            source, all_files, store,
+            download_workers=int(loader_config.get("download_workers", DOWNLOAD_WORKERS)),
+            parse_workers=int(loader_config.get("parse_workers", PARSE_WORKERS)),
+            timings=timings, branches=branches, file_ids=targets
+        )
+        timings['sync_s'] += time.perf_counter() - started
+        if snapshot_dir:
+            started = time.perf_counter()
+            write_snapshot(store, snapshot_dir)
+            timings['snapshot_s'] += time.perf_counter() - started
+        changed_ids = targets | removed_ids
+        frames = [store['files'][changed_id]['frame'] for changed_id in sorted(changed_ids)
+                  if changed_id in store['files'] and store['files'][changed_id]['frame'] is not None]
+        file_counts, processed_rows = ledger_counts(store, branches)
+        return changed_ids, frames, file_counts, processed_rows, build_file_stats(store, branches)
+
+def scoped_results(store, branches=None):
+    return [result for result in store['files'].values() if in_branch_scope(result.get('branch'), branches)]
+
+def ledger_counts(store, branches=None):
+    # 종류별 파일 수 / 추출 행 수 (파일 처리 요약)
+    file_counts = {'OKPOS': 0, '정산표': 0, '기타/미지원': 0}
+    processed_rows = {'OKPOS': 0, '정산표': 0}
+    for result in scoped_results(store, branches):
+        if result['kind'] is None: continue
+        file_counts[result['kind']] += 1
+        if result['kind'] in processed_rows:
+            processed_rows[result['kind']] += result['row_count']
+    return file_counts, processed_rows
+
+def build_ledger(store, branches=None):
+    frames = [result['frame'] for result in scoped_results(store, branches) if result['kind'] is not None and result['frame'] is not None]
+    if not frames: return pd.DataFrame(), {}, {}, build_file_stats(store, branches)
+    file_counts, processed_rows = ledger_counts(store, branches)
+    return finalize_ledger(pd.concat(frames, ignore_index=True)), file_counts, processed_rows, build_file_stats(store, branches)
+
+def finalize_ledger(df):
+    """
+    통합 원장을 대시보드용 스키마로 변환
+    - 지점명/분류/항목1/항목2/파일ID/요일/월: category, 금액: 원 단위 int64
+    - 요일, 연월(Period), 월("2025년 06월") 은 여기서 한 번만 계산
+    """
+    df['항목1'] = df['항목1'].fillna('기타')
+    df['항목2'] = df['항목2'].fillna('기타')
+    for col in LEDGER_CATEGORY_COLUMNS:
+        df[col] = df[col].astype(str).astype('category')
+    df['금액'] = df['금액'].round().astype('int64')
+    df['요일'] = pd.Categorical.from_codes(df['날짜'].dt.dayofweek, categories=WEEKDAY_NAMES, ordered=True)
+    df['연월'] = df['날짜'].dt.to_period('M')
+    df['월'] = month_label_column(df['연월'])
+    return df
+
+def month_label_column(periods):
+    # 연월(Period) → "2025년 06월" 순서형 범주 (실제 있는 달만 범주로 둠)
+    months = pd.period_range(periods.min(), periods.max(), freq='M')
+    month_labels = months.strftime('%Y년 %m월')
+    return pd.Categorical.from_codes(months.get_indexer(periods), categories=month_labels, ordered=True).remove_unused_categories()
+
+def splice_ledger(ledger, file_ids, frames):
+    """
+    원장에서 file_ids 의 행을 빼고 frames(그 파일들의 새 추출 결과)를 변환해 붙인 새 원장
+    나머지 행은 다시 변환하지 않고 범주만 합침 (부분 새로고침)
+    """
+    kept = ledger[~ledger['파일ID'].isin(file_ids)] if not ledger.empty else ledger
+    if not frames:
+        if kept.empty: return pd.DataFrame()
+        kept = kept.reset_index(drop=True)
+        for col in LEDGER_CATEGORY_COLUMNS:
+            kept[col] = kept[col].cat.remove_unused_categories()
+        kept['월'] = month_label_column(kept['연월'])
+        return kept
+    added = finalize_ledger(pd.concat(frames, ignore_index=True))
+    if kept.empty: return added
+    df = pd.concat([kept, added], ignore_index=True)
+    for col in LEDGER_CATEGORY_COLUMNS:
+        df[col] = union_categoricals([kept[col], added[col]], sort_categories=True).remove_unused_categories()
+    df['월'] = month_label_column(df['연월'])
+    return df
+
+def build_file_stats(store, branches=None):
+    """파일별 처리 기록 표 (다운로드 크기/시간, 파싱·추출 시간, 시트 수, 추출 행 수, 실패 사유)"""
+    records = [result['telemetry'] for result in scoped_results(store, branches) if result.get('telemetry')]
+    df_stats = pd.DataFrame(records, columns=list(FILE_STATS_COLUMNS)).rename(columns=FILE_STATS_COLUMNS)
+    df_stats['합계(초)'] = df_stats[['다운로드(초)', '파싱(초)', '추출(초)']].sum(axis=1)
+    return df_stats
+
+# ------------------ 스냅샷 저장/복원 ------------------
+def snapshot_root(snapshot_dir):
+    return os.path.join(snapshot_dir, f"v{SNAPSHOT_SCHEMA_VERSION}")
+
+def has_snapshot(snapshot_dir):
+    return os.path.exists(os.path.join(snapshot_root(snapshot_dir), 'CURRENT'))
+
+def write_snapshot(store, snapshot_dir):
+    """
+    파일별 추출 결과를 지점명/연월 파티션 Parquet 로 저장
+    새 세대(gen-*) 디렉터리에 모두 쓴 뒤 CURRENT 포인터를 교체하므로 읽는 쪽은 항상 완성된 스냅샷만 봄
+    """
+    root = snapshot_root(snapshot_dir)
+    generation = f"gen-{time.time_ns()}"
+    gen_dir = os.path.join(root, generation)
+    os.makedirs(gen_dir, exist_ok=True)
+    frames = [result['frame'] for result in store['files'].values() if result['frame'] is not None]
+    if frames:
+        df_snapshot = pd.concat(frames, ignore_index=True)
+        df_snapshot['연월'] = df_snapshot['날짜'].dt.strftime('%Y-%m')
+        df_snapshot.to_parquet(os.path.join(gen_dir, 'ledger'), partition_cols=['지점명', '연월'], index=False)
+    manifest = {
+        'schema_version': SNAPSHOT_SCHEMA_VERSION,
+        'created_at': time.time(),
+        'synced_branches': None if store['synced_branches'] is None else sorted(store['synced_branches']),
+        'files': {
+            file_id: {
+                'signature': list(store['manifest'][file_id]), 'kind': result['kind'], 'branch': result.get('branch'),
+                'row_count': result['row_count'], 'telemetry': result.get('telemetry')
+            }
+            for file_id, result in store['files'].items() if file_id in store['manifest']
+        }
+    }
+    with open(os.path.join(gen_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    pointer_tmp = os.path.join(root, 'CURRENT.tmp')
+    with open(pointer_tmp, 'w') as f:
+        f.write(generation)
+    os.replace(pointer_tmp, os.path.join(root, 'CURRENT'))
+    for name in os.listdir(root):
+        if name.startswith('gen-') and name != generation:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+def load_snapshot(store, snapshot_dir):
+    """스냅샷을 읽어 sync store 를 채움. 스키마 버전이 다르거나 없으면 False"""
+    root = snapshot_root(snapshot_dir)
+    try:
+        with open(os.path.join(root, 'CURRENT')) as f:
+            gen_dir = os.path.join(root, f.read().strip())
+        with open(os.path.join(gen_dir, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if manifest.get('schema_version') != SNAPSHOT_SCHEMA_VERSION:
+        return False
+    frames_by_file = {}
+    ledger_dir = os.path.join(gen_dir, 'ledger')
+    if os.path.exists(ledger_dir):
+        df_snapshot = pd.read_parquet(ledger_dir)
+        df_snapshot['지점명'] = df_snapshot['지점명'].astype(str)
+        df_snapshot = df_snapshot[LEDGER_COLUMNS + ['파일ID']]
+        frames_by_file = {file_id: frame for file_id, frame in df_snapshot.groupby('파일ID', sort=False)}
+    # synced_branches 가 없는 스냅샷은 전체 동기화 결과
+    synced_branches = manifest.get('synced_branches')
+    store['synced_branches'] = None if synced_branches is None else set(synced_branches)
+    store['snapshot_created_at'] = manifest.get('created_at')
+    for file_id, entry in manifest['files'].items():
+        telemetry = entry.get('telemetry')
+        branch = entry.get('branch') or branch_from_path(telemetry['path'] if telemetry else file_id)
+        store['manifest'][file_id] = tuple(entry['signature'])
+        store['files'][file_id] = {'kind': entry['kind'], 'branch': branch, 'frame': frames_by_file.get(file_id), 'row_count': entry['row_count'], 'telemetry': telemetry}
+    return True
@@ -0,0 +1,239 @@
+import itertools
+import logging
+import threading
+import time
+import weakref
+import pandas as pd
+
+from analytics import build_cubes, splice_cubes
+from data_loader import splice_ledger
+
+# ==============================================================================
+#     프로세스 전역 데이터셋 보관소
+#     - 원장/집계 큐브는 프로세스에 한 벌만 두고 모든 세션이 읽기 전용으로 공유 (세션별 복사본 없음)
+#     - 새 데이터셋은 다 만든 뒤 참조 하나만 바꿔 게시 → 세션은 항상 완성된 한 버전만 봄
+#     - 세션은 lease 로 데이터셋을 빌리고, lease 가 사라지면(세션 종료/새 버전으로 교체) 참조 수가 줄어듦
+#       마지막 lease 까지 사라진 옛 데이터셋은 보관소에 남지 않아 메모리에서 해제됨
+#     - 참조 수는 데이터셋 인스턴스 번호(id)별로 셈. 내용 해시(version)는 같은 내용을 다시 로딩해도 같아 차트 캐시 키로만 씀
+#     - 범위(scope): None 은 전체 지점, 지점 튜플은 권한 지점만 동기화해 만든 데이터셋
+#       전체 데이터셋이 게시되면 지점별 데이터셋을 대신함
+#     - 갱신은 stale-while-revalidate: 기존 데이터셋을 계속 보여주면서 백그라운드 스레드에서 새 버전을 만들어 교체
+#       (데이터셋이 하나도 없는 첫 로딩만 사용자가 기다림)
+# ==============================================================================
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_TICK_SECONDS = 60  # 예약 갱신 스레드가 만료 여부를 확인하는 간격
+
+_dataset_ids = itertools.count(1)  # 데이터셋 인스턴스 번호 (만든 순서대로 증가)
+
+def scope_for(allowed_branches):
+    """권한 지점 목록 → 데이터셋 범위 ("all" 이면 None)"""
+    return None if "all" in allowed_branches else tuple(sorted(allowed_branches))
+
+class Dataset:
+    """한 번의 로딩 결과 (원장, 파일/행 수, 파일별 처리 기록, 집계 큐브). 게시 후에는 수정하지 않음"""
+
+    def __init__(self, ledger, file_counts, processed_rows, file_stats, cubes=None, as_of=None):
+        self.ledger = ledger
+        self.file_counts = file_counts
+        self.processed_rows = processed_rows
+        self.file_stats = file_stats
+        self.cubes = cubes if cubes is not None else build_cubes(ledger)
+        self.version = self.cubes['version']
+        self.id = next(_dataset_ids)
+        self.as_of = as_of if as_of is not None else time.time()
+        self._views = {}
+        self._views_lock = threading.Lock()
+
+    @classmethod
+    def from_ledger(cls, result, as_of=None):
+        # data_loader.build_ledger / refresh_from_source 의 반환값으로 생성
+        return cls(*result, as_of=as_of)
+
+    @property
+    def empty(self):
+        return self.ledger.empty
+
+    def age(self):
+        return time.time() - self.as_of
+
+    def splice(self, file_ids, frames, file_counts, processed_rows, file_stats):
+        """
+        file_ids 의 행만 frames(새 추출 결과)로 바꾼 새 데이터셋 (부분 새로고침)
+        원장은 나머지 행을 그대로 두고, 큐브는 바뀐 (지점명, 연월) 행만 다시 집계
+        """
+        ledger = splice_ledger(self.ledger, file_ids, frames)
+        old_rows = self.ledger[self.ledger['파일ID'].isin(file_ids)] if not self.ledger.empty else self.ledger
+        new_rows = ledger[ledger['파일ID'].isin(file_ids)] if not ledger.empty else ledger
+        keys = {key for df in (old_rows, new_rows) if not df.empty for key in zip(df['지점명'].astype(str), df['연월'])}
+        cubes = splice_cubes(self.cubes, ledger, keys) if not self.ledger.empty else build_cubes(ledger)
+        return Dataset(ledger, file_counts, processed_rows, file_stats, cubes)
+
+    def cubes_for(self, allowed_branches):
+        """권한 지점으로 거른 큐브. 같은 권한의 세션끼리 공유하도록 권한 조합별로 한 번만 만듦"""
+        key = scope_for(allowed_branches)
+        if key is None:
+            return self.cubes
+        with self._views_lock:
+            if key not in self._views:
+                self._views[key] = {
+                    'month': self.cubes['month'][self.cubes['month']['지점명'].isin(key)],
+                    'weekday': self.cubes['weekday'][self.cubes['weekday']['지점명'].isin(key)],
+                    'day': self.cubes['day'][self.cubes['day']['지점명'].isin(key)],
+                    'version': self.version,
+                }
+            return self._views[key]
+
+class DatasetLease:
+    """세션이 들고 있는 데이터셋 참조. 객체가 사라지면 보관소의 참조 수를 돌려줌"""
+
+    def __init__(self, store, dataset):
+        self.dataset = dataset
+        weakref.finalize(self, store._release, dataset.id)
+
+class DatasetStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_locks = {}  # 범위 → 로딩 락 (지점별 로딩이 전체 로딩을 기다리지 않도록 범위마다 따로)
+        self._datasets = {}  # 범위 → 현재 데이터셋
+        self._refs = {}  # 데이터셋 id → 살아 있는 lease 수
+        self._workers = {}  # 범위 → 진행 중인 백그라운드 갱신 스레드
+        self._loaders = {}  # 범위 → 마지막으로 쓴 로딩 함수 (예약 갱신에서 재사용)
+        self._errors = {}  # 범위 → (시각, 마지막 백그라운드 갱신 오류)
+        self._scheduler = None
+
+    def _current(self, scope):
+        candidates = [self._datasets.get(None)] + ([self._datasets.get(scope)] if scope is not None else [])
+        return max((dataset for dataset in candidates if dataset is not None), key=lambda dataset: dataset.as_of, default=None)
+
+    def current(self, scope=None):
+        """scope 를 덮는 가장 최근 데이터셋 (전체 데이터셋이 더 최근이면 전체 데이터셋)"""
+        with self._lock:
+            return self._current(scope)
+
+    def publish(self, dataset, scope=None):
+        # 완성된 데이터셋으로 참조만 교체 (진행 중인 세션 실행은 기존 lease 의 버전을 끝까지 사용)
+        # 이미 더 최근 데이터셋이 게시돼 있으면 (예: 스냅샷보다 백그라운드 동기화가 먼저 끝난 경우) 그대로 둠
+        with self._lock:
+            existing = self._datasets.get(scope)
+            if existing is not None and existing.as_of > dataset.as_of:
+                return existing
+            if scope is None:
+                self._datasets = {None: dataset}
+            else:
+                self._datasets[scope] = dataset
+        return dataset
+
+    def acquire(self, scope=None):
+        with self._lock:
+            dataset = self._current(scope)
+            if dataset is None:
+                return None
+            self._refs[dataset.id] = self._refs.get(dataset.id, 0) + 1
+            return DatasetLease(self, dataset)
+
+    def _release(self, dataset_id):
+        with self._lock:
+            remaining = self._refs.get(dataset_id, 0) - 1
+            if remaining > 0:
+                self._refs[dataset_id] = remaining
+            else:
+                self._refs.pop(dataset_id, None)
+
+    def refresh_if_stale(self, load_fn, max_age, scope=None, reload_fn=None):
+        """
+        scope 를 덮는 데이터셋이 없거나 max_age 초보다 오래됐으면 load_fn() 으로 새로 만들어 게시
+        같은 범위의 여러 세션이 동시에 만료를 발견해도 로딩은 한 번만 실행 (나머지는 끝날 때까지 기다렸다가 결과를 씀)
+        reload_fn: 이후 예약 갱신에서 백그라운드 스레드로 다시 쓸 로딩 함수 (load_fn 이 세션 실행 중에만 쓸 수 있는 경우)
+        """
+        if reload_fn is not None:
+            with self._lock:
+                self._loaders[scope] = reload_fn
+        with self._refresh_lock(scope):
+            current = self.current(scope)
+            if current is not None and current.age() < max_age:
+                return current
+            dataset = load_fn()
+            return self.publish(dataset, scope) if dataset is not None else current
+
+    def _refresh_lock(self, scope):
+        with self._lock:
+            return self._refresh_locks.setdefault(scope, threading.Lock())
+
+    def refresh_async(self, load_fn, scope=None):
+        """
+        백그라운드 스레드에서 load_fn() 으로 새 데이터셋을 만들어 게시 (호출한 세션은 기다리지 않음)
+        같은 범위의 갱신이 이미 진행 중이면 새로 시작하지 않고 False
+        """
+        with self._lock:
+            self._loaders[scope] = load_fn
+            worker = self._workers.get(scope)
+            if worker is not None and worker.is_alive():
+                return False
+            worker = threading.Thread(target=self._run_refresh, args=(load_fn, scope), name=f"dataset-refresh-{scope or 'all'}", daemon=True)
+            self._workers[scope] = worker
+        worker.start()
+        return True
+
+    def _run_refresh(self, load_fn, scope):
+        with self._refresh_lock(scope):
+            try:
+                dataset = load_fn()
+            except Exception as e:
+                # 실패해도 마지막으로 게시된 데이터셋을 계속 사용
+                with self._lock:
+                    self._errors[scope] = (time.time(), str(e))
+                logger.exception("백그라운드 데이터 갱신 오류 (%s)", scope or '전체 지점')
+                return
+            if dataset is not None:
+                self.publish(dataset, scope)
+                with self._lock:
+                    self._errors.pop(scope, None)
+
+    def is_refreshing(self, scope=None):
+        with self._lock:
+            return any(worker.is_alive() for key, worker in self._workers.items() if key is None or key == scope)
+
+    def last_error(self, scope=None):
+        # scope 를 덮는 갱신(전체 지점 갱신 포함)의 가장 최근 (시각, 오류 메시지). 이후 갱신이 성공하면 None
+        with self._lock:
+            candidates = [self._errors.get(None)] + ([self._errors.get(scope)] if scope is not None else [])
+            return max((error for error in candidates if error is not None), key=lambda error: error[0], default=None)
+
+    def start_scheduler(self, interval):
+        """interval 초보다 오래된 게시 데이터셋을 주기적으로 백그라운드 갱신 (접속자가 없어도 최신 상태 유지). 프로세스당 한 번"""
+        with self._lock:
+            if interval <= 0 or (self._scheduler is not None and self._scheduler.is_alive()):
+                return
+            self._scheduler = threading.Thread(target=self._schedule_loop, args=(interval,), name='dataset-refresh-scheduler', daemon=True)
+        self._scheduler.start()
+
+    def _schedule_loop(self, interval):
+        while True:
+            time.sleep(min(interval, SCHEDULER_TICK_SECONDS))
+            with self._lock:
+                due = [(scope, self._loaders[scope]) for scope, dataset in self._datasets.items()
+                       if scope in self._loaders and dataset.age() >= interval]
+            for scope, load_fn in due:
+                self.refresh_async(load_fn, scope)
+
+    def update(self, update_fn, scope=None):
+        """
+        현재 데이터셋을 update_fn(current) 결과로 교체 (부분 새로고침)
+        같은 범위의 로딩/백그라운드 갱신과 겹치지 않도록 범위 로딩 락 안에서 실행
+        """
+        with self._refresh_lock(scope):
+            dataset = update_fn(self.current(scope))
+            return self.publish(dataset, scope) if dataset is not None else self.current(scope)
+
+    def stats(self):
+        # datasets: 범위 → (버전, 게시 시각, 원장 행 수), leases: 데이터셋 id → 살아 있는 lease 수
+        with self._lock:
+            return {
+                'datasets': {scope: (dataset.version, dataset.as_of, len(dataset.ledger)) for scope, dataset in self._datasets.items()},
+                'leases': dict(self._refs),
+            }
+
+def empty_dataset():
+    return Dataset(pd.DataFrame(), {}, {}, pd.DataFrame())
@@ -0,0 +1,255 @@
+import io
+import re
+import time
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# ==============================================================================
+#     정산표 / OKPOS 엑셀 추출기
+#     - 병렬 파싱 워커(별도 프로세스)에서 import 되므로 pandas/openpyxl 외 의존성을 두지 않음
+#     - 시트는 header=None 으로 읽은 모양(열 라벨 = 원래 열 번호)을 전제로 하고, 열은 라벨로 접근
+# ==============================================================================
+
+# --- 파일별 설정 상수 ---
+OKPOS_DATA_START_ROW, OKPOS_COL_DATE, OKPOS_COL_DAY_OF_WEEK, OKPOS_COL_DINE_IN_SALES, OKPOS_COL_TAKEOUT_SALES, OKPOS_COL_DELIVERY_SALES = 7, 0, 1, 34, 36, 38
+SETTLEMENT_DATA_START_ROW, SETTLEMENT_COL_PERSONNEL_NAME, SETTLEMENT_COL_PERSONNEL_AMOUNT, SETTLEMENT_COL_FOOD_ITEM, SETTLEMENT_COL_FOOD_AMOUNT, SETTLEMENT_COL_SUPPLIES_ITEM, SETTLEMENT_COL_SUPPLIES_AMOUNT, SETTLEMENT_COL_AD_ITEM, SETTLEMENT_COL_AD_AMOUNT, SETTLEMENT_COL_FIXED_ITEM, SETTLEMENT_COL_FIXED_AMOUNT = 3, 1, 2, 4, 5, 7, 8, 10, 11, 13, 14
+
+def get_engine(file_name):
+    lowered = file_name.lower()
+    return 'openpyxl' if lowered.endswith('.xlsx') else 'xlrd' if lowered.endswith('.xls') else None
+
+def classify_file(file_path):
+    return 'OKPOS' if "OKPOS" in file_path else '정산표' if "정산표" in file_path else None
+
+# --- 축소 읽기: 추출기가 실제로 쓰는 열만 읽음 ---
+REDUCED_READ = True
+OKPOS_READ_COLUMNS = [OKPOS_COL_DATE, OKPOS_COL_DAY_OF_WEEK, OKPOS_COL_DINE_IN_SALES, OKPOS_COL_TAKEOUT_SALES, OKPOS_COL_DELIVERY_SALES]
+SETTLEMENT_READ_COLUMNS = [SETTLEMENT_COL_PERSONNEL_NAME, SETTLEMENT_COL_PERSONNEL_AMOUNT, SETTLEMENT_COL_FOOD_ITEM, SETTLEMENT_COL_FOOD_AMOUNT, SETTLEMENT_COL_SUPPLIES_ITEM, SETTLEMENT_COL_SUPPLIES_AMOUNT, SETTLEMENT_COL_AD_ITEM, SETTLEMENT_COL_AD_AMOUNT, SETTLEMENT_COL_FIXED_ITEM, SETTLEMENT_COL_FIXED_AMOUNT]
+
+def parse_workbook(content, file_name, file_path, 지점명, reduced_read=REDUCED_READ):
+    """
+    내려받은 파일 내용(bytes)을 파싱해 (종류, 추출 행, 오류 메시지, 처리 통계) 반환
+    프로세스 풀 워커로 실행되므로 예외는 메시지로 바꿔 돌려줌 (오류 전까지 추출된 행은 유지)
+    처리 통계: 시트 수(sheets), 엑셀 읽기 시간(parse_s), 행 추출 시간(extract_s)
+    """
+    rows = []
+    kind = classify_file(file_path)
+    stats = {'sheets': 0, 'parse_s': 0.0, 'extract_s': 0.0}
+    try:
+        fh = io.BytesIO(content)
+        engine_to_use = get_engine(file_name)
+        started = time.perf_counter()
+        if kind == 'OKPOS':
+            df_sheet = read_okpos_sheet(fh, engine_to_use) if reduced_read else pd.read_excel(fh, header=None, engine=engine_to_use)
+            parsed_at = time.perf_counter()
+            stats['parse_s'] += parsed_at - started
+            stats['sheets'] += 1
+            rows.extend(extract_okpos_table(df_sheet, 지점명))
+            stats['extract_s'] += time.perf_counter() - parsed_at
+        elif kind == '정산표':
+            include_sales_log = "대전공장" in file_path
+            for sheet_name, df_sheet in iter_settlement_sheets(fh, engine_to_use, reduced_read, stop_early=not include_sales_log):
+                parsed_at = time.perf_counter()
+                stats['parse_s'] += parsed_at - started
+                stats['sheets'] += 1
+                rows.extend(extract_settlement_sheet(df_sheet, sheet_name, 지점명, include_sales_log=include_sales_log))
+                started = time.perf_counter()
+                stats['extract_s'] += started - parsed_at
+            stats['parse_s'] += time.perf_counter() - started
+    except Exception as e:
+        return kind, rows, str(e), stats
+    return kind, rows, None, stats
+
+def openpyxl_cell_value(cell):
+    # pandas openpyxl 리더와 같은 변환 (빈칸 "", 오류 NaN, 정수로 떨어지는 실수는 int)
+    if cell.value is None:
+        return ""
+    if cell.data_type == 'e':
+        return np.nan
+    if cell.data_type == 'n':
+        val = int(cell.value)
+        return val if val == cell.value else float(cell.value)
+    return cell.value
+
+def read_worksheet_columns(ws, columns, stop_row=None):
+    """
+    openpyxl read-only 워크시트를 행 단위로 흘려 읽되 columns 열만 보관
+    stop_row(행번호, 값) 가 참인 행까지 읽고 멈춤. 결과는 pd.read_excel(header=None) 과 같은 값 변환/열 라벨
+    """
+    ws.reset_dimensions()
+    data, last_row_with_data = [], -1
+    for row_number, row in enumerate(ws.iter_rows(max_col=max(columns) + 1)):
+        values = [openpyxl_cell_value(cell) for cell in row]
+        picked = [values[col] if col < len(values) else "" for col in columns]
+        if any(value != "" for value in picked):
+            last_row_with_data = row_number
+        data.append(picked)
+        if stop_row is not None and stop_row(row_number, picked):
+            break
+    data = data[:last_row_with_data + 1]
+    if not data:
+        return pd.DataFrame(columns=columns)
+    df = TextParser(data, header=None, skip_blank_lines=False).read()
+    df.columns = columns
+    return df
+
+def okpos_stop_row(row_number, values):
+    date_cell = values[0]
+    return row_number >= OKPOS_DATA_START_ROW and (pd.isna(date_cell) or str(date_cell).strip() == '' or '합계' in str(date_cell))
+
+def settlement_stop_row(row_number, values):
+    # 모든 금액 열과 식자재 품목이 빈 행: 지출/김·면·다시마 추출이 모두 여기서 끝남
+    cells = dict(zip(SETTLEMENT_READ_COLUMNS, values))
+    blank = [SETTLEMENT_COL_FOOD_ITEM] + [amount_col for _, _, amount_col in SETTLEMENT_EXPENSE_COLUMNS]
+    return row_number >= SETTLEMENT_DATA_START_ROW and all(cells[col] == "" for col in blank)
+
+def read_excel_columns(read_fn, columns):
+    # 열 번호 목록을 usecols 로 넘기면 열이 모자란 시트에서 ParserError → 있는 열만 읽고 없는 열은 빈 열로 채움 (openpyxl 경로와 같은 열)
+    return read_fn(header=None, usecols=lambda col: col in columns).reindex(columns=columns)
+
+def read_okpos_sheet(fh, engine_to_use):
+    if engine_to_use != 'openpyxl':
+        return read_excel_columns(lambda **kwargs: pd.read_excel(fh, engine=engine_to_use, **kwargs), OKPOS_READ_COLUMNS)
+    from openpyxl import load_workbook
+    wb = load_workbook(fh, read_only=True, data_only=True, keep_links=False)
+    try:
+        return read_worksheet_columns(wb.worksheets[0], OKPOS_READ_COLUMNS, stop_row=okpos_stop_row)
+    finally:
+        wb.close()
+
+def iter_settlement_sheets(fh, engine_to_use, reduced_read=REDUCED_READ, stop_early=False):
+    """(시트명, DataFrame) 순회. 축소 읽기면 SETTLEMENT_READ_COLUMNS 열만 읽음"""
+    if not reduced_read or engine_to_use != 'openpyxl':
+        xls = pd.ExcelFile(fh, engine=engine_to_use)
+        for sheet_name in xls.sheet_names:
+            if reduced_read:
+                yield sheet_name, read_excel_columns(lambda **kwargs: xls.parse(sheet_name, **kwargs), SETTLEMENT_READ_COLUMNS)
+            else:
+                yield sheet_name, xls.parse(sheet_name, header=None)
+        return
+    from openpyxl import load_workbook
+    wb = load_workbook(fh, read_only=True, data_only=True, keep_links=False)
+    try:
+        for ws in wb.worksheets:
+            yield ws.title, read_worksheet_columns(ws, SETTLEMENT_READ_COLUMNS, stop_row=settlement_stop_row if stop_early else None)
+    finally:
+        wb.close()
+
+def sheetname_to_date(sheetname):
+    match = re.match(r"(\d{2})[.\-](\d{1,2})", sheetname)
+    if match: return f"20{match.group(1)}-{match.group(2).zfill(2)}-01"
+    return ""
+
+OKPOS_SALES_COLUMNS = [(OKPOS_COL_DINE_IN_SALES, '홀매출'), (OKPOS_COL_TAKEOUT_SALES, '포장매출'), (OKPOS_COL_DELIVERY_SALES, '배달매출')]
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+
+def okpos_dates(date_cells):
+    """날짜 열 전체를 한 번에 변환: 엑셀 일련번호는 1899-12-30 기준 일수, 문자열은 '소계:' 제거 후 파싱 (실패는 NaT)"""
+    is_serial = date_cells.map(lambda v: isinstance(v, (int, float))).to_numpy(dtype=bool)
+    dates = pd.Series(pd.NaT, index=date_cells.index, dtype='datetime64[ns]')
+    if is_serial.any():
+        serials = pd.to_numeric(date_cells[is_serial], errors='coerce').astype(float)
+        dates[is_serial] = EXCEL_EPOCH + pd.to_timedelta(serials, unit='D', errors='coerce')
+    if not is_serial.all():
+        texts = date_cells[~is_serial].map(str).str.replace("소계:", "", regex=False).str.strip()
+        dates[~is_serial] = pd.to_datetime(texts, errors='coerce', format='mixed')
+    return dates
+
+def extract_okpos_table(df, 지점명):
+    date_cells = df[OKPOS_COL_DATE].iloc[OKPOS_DATA_START_ROW:]
+    # 첫 빈칸/합계 행 직전까지만 사용
+    date_text = date_cells.map(str)
+    stop = date_cells.isna().to_numpy() | date_text.str.strip().eq('').to_numpy() | date_text.str.contains('합계', regex=False).to_numpy()
+    end = int(stop.argmax()) if stop.any() else len(stop)
+    if end == 0: return []
+    body = df.iloc[OKPOS_DATA_START_ROW:OKPOS_DATA_START_ROW + end]
+    dates = okpos_dates(body[OKPOS_COL_DATE])
+    valid = dates.notna().to_numpy()
+    날짜 = dates[valid].dt.strftime('%Y-%m-%d').to_numpy()
+    요일 = (body[OKPOS_COL_DAY_OF_WEEK].map(str).str.strip() + "요일").to_numpy()[valid]
+    # 홀/포장/배달 열을 long 형태로 펼침 (행 우선 순서 = 기존 출력 순서)
+    sales = body[[col for col, _ in OKPOS_SALES_COLUMNS]].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)[valid]
+    row_idx, channel_idx = ((sales > 0) & ~pd.isna(sales)).nonzero()
+    channels = [name for _, name in OKPOS_SALES_COLUMNS]
+    return [
+        [날짜[r], 지점명, '매출', channels[c], 요일[r], sales[r, c]]
+        for r, c in zip(row_idx.tolist(), channel_idx.tolist())
+    ]
+
+SETTLEMENT_EXPENSE_COLUMNS = [
+    ("인건비", SETTLEMENT_COL_PERSONNEL_NAME, SETTLEMENT_COL_PERSONNEL_AMOUNT),
+    ("식자재", SETTLEMENT_COL_FOOD_ITEM, SETTLEMENT_COL_FOOD_AMOUNT),
+    ("소모품", SETTLEMENT_COL_SUPPLIES_ITEM, SETTLEMENT_COL_SUPPLIES_AMOUNT),
+    ("광고비", SETTLEMENT_COL_AD_ITEM, SETTLEMENT_COL_AD_AMOUNT),
+    ("고정비", SETTLEMENT_COL_FIXED_ITEM, SETTLEMENT_COL_FIXED_AMOUNT),
+]
+KIM_MYEON_DASHIMA_PATTERN = "김|면|다시마"
+
+def first_true(mask):
+    return int(mask.argmax()) if mask.any() else len(mask)
+
+def extract_settlement_sheet(df, sheetname, 지점명, include_sales_log=False):
+    """
+    정산표 시트 하나를 한 번에 훑어 아래 행들을 순서대로 반환
+    - (include_sales_log) B열 '총매출' 의 C열 금액 → 납품매출 (대전공장)
+    - 인건비/식자재/소모품/광고비/고정비(배달대행·배달수수료는 배달비) 지출
+    - 식자재 중 김/면/다시마 품목 '품목(규격)' 분리
+    """
+    날짜 = sheetname_to_date(sheetname)
+    if not 날짜: return []
+    present = set(df.columns)
+    out = settlement_sales_log(df, 날짜, 지점명) if include_sales_log else []
+    body = df.iloc[SETTLEMENT_DATA_START_ROW:]
+    if body.empty: return out
+
+    used_cols = sorted({col for _, item_col, amount_col in SETTLEMENT_EXPENSE_COLUMNS for col in (item_col, amount_col) if col in present})
+    missing = {col: body[col].isna().to_numpy() for col in used_cols}
+    # 지출 항목은 모든 금액 열이, 김/면/다시마는 품목·금액 열이 모두 비는 첫 행 직전까지
+    amount_cols = [amount_col for _, _, amount_col in SETTLEMENT_EXPENSE_COLUMNS if amount_col in present]
+    end = first_true(np.logical_and.reduce([missing[col] for col in amount_cols])) if amount_cols else 0
+    item_col, amount_col = SETTLEMENT_COL_FOOD_ITEM, SETTLEMENT_COL_FOOD_AMOUNT
+    food_end = first_true(missing[item_col] & missing[amount_col]) if item_col in present and amount_col in present else 0
+
+    # 필요한 구간의 열만 한 번씩 숫자/문자열로 변환
+    scan = body.iloc[:max(end, food_end)]
+    amounts = {col: pd.to_numeric(scan[col], errors='coerce').to_numpy(dtype=float) for col in used_cols}
+    texts = {col: scan[col].map(str).str.strip().to_numpy() for col in used_cols}
+
+    # 1) 항목별 지출
+    configs = [(cat, item_col, amount_col) for cat, item_col, amount_col in SETTLEMENT_EXPENSE_COLUMNS if item_col in present and amount_col in present]
+    if end and configs:
+        valid = np.column_stack([~missing[cat_item_col][:end] & (amounts[cat_amount_col][:end] > 0) for _, cat_item_col, cat_amount_col in configs])
+        for r, c in zip(*valid.nonzero()):
+            cat, cat_item_col, cat_amount_col = configs[c]
+            항목_str = texts[cat_item_col][r]
+            분류 = "배달비" if cat == "고정비" and ("배달대행" in 항목_str or "배달수수료" in 항목_str) else cat
+            out.append([날짜, 지점명, "지출", 분류, 항목_str, amounts[cat_amount_col][r]])
+
+    # 2) 김/면/다시마 품목
+    if food_end:
+        items = pd.Series(texts[item_col][:food_end])
+        candidate = (~missing[item_col][:food_end] & ~missing[amount_col][:food_end] & (amounts[amount_col][:food_end] > 0)
+                     & items.str.contains(KIM_MYEON_DASHIMA_PATTERN).to_numpy())
+        if candidate.any():
+            parts = items[candidate].str.split('(')
+            항목1 = parts.str[0].str.strip()
+            항목2 = parts.str.get(1).fillna('').astype(str).str.replace(')', '', regex=False).str.strip()
+            keep = (항목1 != '') & (항목2 != '')
+            for r, name, spec in zip(candidate.nonzero()[0][keep.to_numpy()], 항목1[keep], 항목2[keep]):
+                out.append([날짜, 지점명, "식자재", name, spec, amounts[amount_col][r]])
+    return out
+
+def settlement_sales_log(df, 날짜, 지점명):
+    """대전공장 정산표에서 '총매출' 이 포함된 B열 셀을 찾아 C열 금액을 로그 데이터 형식으로 반환"""
+    if not {1, 2} <= set(df.columns): return []
+    b_cells, c_cells = df[1], df[2]
+    hit = b_cells.notna().to_numpy() & b_cells.map(str).str.strip().str.contains('총매출', regex=False).to_numpy() & c_cells.notna().to_numpy()
+    if not hit.any(): return []
+    c_cell = c_cells.iloc[int(hit.argmax())]
+    try:
+        금액 = int(str(c_cell).replace(',', '').replace(' ', ''))
+        return [[날짜, 지점명, '매출', '납품매출', '월매출', 금액]]
+    except Exception as e:
+        print(f"총매출 금액 변환 오류: {e}")
+        return []
@@ -0,0 +1,201 @@
+import numpy as np
+
+from analytics import VARIABLE_COST_ITEMS, DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS, FIXED_COST_ITEMS
+
+# ==============================================================================
+#     시뮬레이션 시나리오 엔진 (배열 연산)
+#     - 조건(매출, 홀매출 비율, 항목별 조정률, 로열티)은 스칼라 또는 배열. 배열끼리는 브로드캐스트되어
+#       한 번 호출로 수천 개 조합을 계산 (민감도 히트맵/토네이도 차트)
+#     - 단일 시나리오도 같은 함수를 씀. 칸마다 기존 단일 계산과 같은 연산을 같은 순서로 적용해 결과가 비트 단위로 같음
+#       (허용오차 비교, 성장계수/조정률 기본값 처리, 비용 합산 순서 포함)
+# ==============================================================================
+
+CLOSE_TOL = 1e-9
+SCENARIO_LEVERS = ('revenue', 'hall_ratio_pct', 'royalty_rate')  # 항목별 조정률 외의 조건 이름
+
+def is_close(a, b, tol=CLOSE_TOL):
+    return np.abs(np.asarray(a, dtype=float) - b) <= tol
+
+def cost_order(base_costs):
+    """
+    시뮬레이션 비용 항목 순서: 매출 비례 → 배달/포장 비례 → 고정 → 기타(정의 밖, 고정 취급) → 로열티
+    총비용도 이 순서로 더함 (합산 순서가 다르면 부동소수 결과가 달라짐)
+    """
+    defined = VARIABLE_COST_ITEMS + DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS + FIXED_COST_ITEMS
+    return [item for item in defined if item in base_costs] + [item for item in base_costs if item not in defined]
+
+def growth_factor(sim_value, base_value):
+    # 기준이 0 이거나 값이 기준과 같으면 1.0 (기준값 그대로)
+    sim_value = np.asarray(sim_value, dtype=float)
+    changed = (base_value > 0) & ~is_close(sim_value, base_value)
+    return np.where(changed, sim_value / (base_value if base_value > 0 else 1.0), 1.0)
+
+def evaluate_scenarios(base_total_revenue, base_delivery_takeout_revenue, base_costs,
+                       revenue, hall_ratio_pct, royalty_rate=0.0, adjustments=None):
+    """
+    시나리오 조건 배열 → 결과 배열 dict
+    - base_*: 활동월 기준 평균 (스칼라), base_costs: 항목 → 기준 비용
+    - revenue / hall_ratio_pct / royalty_rate / adjustments[항목] (%): 스칼라 또는 서로 브로드캐스트 가능한 배열
+    반환: revenue, delivery_revenue(배달/포장 매출), costs(항목 → 비용, 로열티 포함), total_cost, profit, profit_margin
+    (모두 브로드캐스트된 모양)
+    """
+    adjustments = adjustments or {}
+    items = cost_order(base_costs)
+    arrays = np.broadcast_arrays(
+        np.asarray(revenue, dtype=float), np.asarray(hall_ratio_pct, dtype=float), np.asarray(royalty_rate, dtype=float),
+        *[np.asarray(adjustments.get(item, 0.0), dtype=float) for item in items]
+    )
+    revenue, hall_ratio_pct, royalty_rate = arrays[:3]
+    adjustment = dict(zip(items, arrays[3:]))
+
+    delivery_revenue = revenue * ((100.0 - hall_ratio_pct) / 100.0)
+    total_growth = growth_factor(revenue, base_total_revenue)
+    delivery_growth = growth_factor(delivery_revenue, base_delivery_takeout_revenue)
+
+    costs = {}
+    for item in items:
+        adj = adjustment[item]
+        if item in VARIABLE_COST_ITEMS or item in DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS:
+            growth = total_growth if item in VARIABLE_COST_ITEMS else delivery_growth
+            factor = np.where(is_close(growth, 1.0) & is_close(adj, 0.0), 1.0, growth * (1 + adj / 100.0))
+        else:
+            factor = np.where(is_close(adj, 0.0), 1.0, 1 + adj / 100.0)
+        costs[item] = float(base_costs[item]) * factor
+    costs['로열티'] = revenue * (royalty_rate / 100.0)
+
+    total_cost = 0
+    for cost in costs.values():
+        total_cost = total_cost + cost
+    profit = revenue - total_cost
+    profit_margin = np.where(revenue > 0, profit / np.where(revenue > 0, revenue, 1.0) * 100.0, 0.0)
+    return {'revenue': revenue, 'delivery_revenue': delivery_revenue, 'costs': costs,
+            'total_cost': total_cost, 'profit': profit, 'profit_margin': profit_margin}
+
+def with_lever(scenario, lever, values):
+    """
+    scenario(조건 dict: revenue, hall_ratio_pct, royalty_rate, adjustments)에서 조건 하나만 values 로 바꾼 새 조건
+    lever 는 SCENARIO_LEVERS 중 하나 또는 비용 항목 이름(조정률)
+    """
+    changed = dict(scenario, adjustments=dict(scenario.get('adjustments') or {}))
+    if lever in SCENARIO_LEVERS:
+        changed[lever] = values
+    else:
+        changed['adjustments'][lever] = values
+    return changed
+
+def lever_value(scenario, lever):
+    return scenario[lever] if lever in SCENARIO_LEVERS else (scenario.get('adjustments') or {}).get(lever, 0.0)
+
+def sensitivity_grid(base, scenario, x_lever, x_values, y_lever, y_values):
+    """두 조건을 격자로 바꾼 결과 (y × x 모양). base: evaluate_scenarios 의 기준값 인자 dict"""
+    grid = with_lever(with_lever(scenario, x_lever, np.asarray(x_values, dtype=float)[np.newaxis, :]),
+                      y_lever, np.asarray(y_values, dtype=float)[:, np.newaxis])
+    return evaluate_scenarios(**base, **grid)
+
+def tornado(base, scenario, swings):
+    """
+    조건별 낮음/높음 값(swings: lever → (low, high))을 한 번에 계산한 순수익률
+    반환: [(lever, low 순수익률, high 순수익률)] 변동폭이 큰 순 + 현재 조건 순수익률
+    """
+    levers = list(swings)
+    n = 2 * len(levers)
+    batch = dict(scenario, adjustments=dict(scenario.get('adjustments') or {}))
+    for i, lever in enumerate(levers):
+        values = np.full(n, float(lever_value(scenario, lever)))
+        values[2 * i:2 * i + 2] = swings[lever]
+        batch = with_lever(batch, lever, values)
+    margins = evaluate_scenarios(**base, **batch)['profit_margin']
+    current = float(evaluate_scenarios(**base, **scenario)['profit_margin'])
+    rows = [(lever, float(margins[2 * i]), float(margins[2 * i + 1])) for i, lever in enumerate(levers)]
+    return sorted(rows, key=lambda row: abs(row[2] - row[1]), reverse=True), current
+
+# ==============================================================================
+#     몬테카를로 리스크 분석
+#     - 지점별로 활동월(매출 있는 달)의 월간 변동을 추정: 매출(지점 평균 대비 로그 비율), 홀매출 비중(평균 대비 %p),
+#       비용 항목별 충격(지점 평균 대비 비율을 매출/배달매출 변동으로 나눈 값 → 매출 연동분은 엔진 성장계수가 처리)
+#     - 지점별 평균을 빼 중심을 맞춘 뒤 공분산으로 다변량 정규 분포를 맞춤 (매출과 비용의 같은 달 상관 유지)
+#     - 표본은 활동월 수에 비례해 지점을 고르고 한 번에 뽑아 현재 조건에 곱한 뒤 시나리오 엔진 한 번 호출로 계산
+#     - 같은 시드면 같은 결과
+# ==============================================================================
+
+MIN_FIT_MONTHS = 2  # 변동을 추정할 지점의 최소 활동월 수
+
+def fit_monthly_variation(pnl, cost_items):
+    """
+    지점 × 월 손익표(build_pnl_table) → 지점별 (활동월 수, 공분산). 열 순서: 매출, 홀매출 비율, cost_items
+    활동월이 MIN_FIT_MONTHS 보다 적은 지점은 제외
+    """
+    columns = ['revenue', 'hall_ratio_pct'] + list(cost_items)
+    branches = []
+    for _, months in pnl[pnl['매출월']].groupby('지점명', observed=True):
+        if len(months) < MIN_FIT_MONTHS:
+            continue
+        revenue = months['총매출'].to_numpy(dtype=float)
+        revenue_ratio = revenue / revenue.mean()
+        delivery = months['배달매출_총액'].to_numpy(dtype=float)
+        delivery_ratio = delivery / delivery.mean() if delivery.mean() > 0 else np.ones(len(months))
+        hall = months['홀매출_총액'].to_numpy(dtype=float) / revenue * 100.0
+        shocks = [np.log(revenue_ratio), hall]
+        for item in cost_items:
+            cost = months[item].to_numpy(dtype=float) if item in months else np.zeros(len(months))
+            if cost.mean() <= 0:
+                shocks.append(np.ones(len(months)))
+                continue
+            driver = revenue_ratio if item in VARIABLE_COST_ITEMS else delivery_ratio if item in DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS else 1.0
+            shocks.append(np.divide(cost / cost.mean(), driver, out=np.ones(len(months)), where=np.asarray(driver) > 0))
+        shocks = np.column_stack(shocks)
+        branches.append((len(months), np.atleast_2d(np.cov(shocks - shocks.mean(axis=0), rowvar=False))))
+    return {'columns': columns, 'branches': branches}
+
+def sample_scenarios(fit, scenario, n, seed):
+    """
+    현재 조건(scenario)에 지점별 월간 변동 표본 n 개를 적용한 조건 배열
+    - 매출 × exp(충격), 홀매출 비율 + 편차(0~100), 비용 조정률은 (1 + 조정률) × 충격으로 합성
+    """
+    rng = np.random.default_rng(seed)
+    weights = np.array([months for months, _ in fit['branches']], dtype=float)
+    counts = rng.multinomial(n, weights / weights.sum())
+    draws = np.concatenate([rng.multivariate_normal(np.zeros(len(cov)), cov, size=count, method='eigh')
+                            for count, (_, cov) in zip(counts, fit['branches'])])
+    shock = dict(zip(fit['columns'], draws.T))
+    adjustments = dict(scenario.get('adjustments') or {})
+    for item in fit['columns'][2:]:
+        multiplier = (1 + adjustments.get(item, 0.0) / 100.0) * np.maximum(0.0, 1.0 + shock[item])
+        adjustments[item] = (multiplier - 1) * 100.0
+    return dict(scenario,
+                revenue=np.maximum(0.0, scenario['revenue'] * np.exp(shock['revenue'])),
+                hall_ratio_pct=np.clip(scenario['hall_ratio_pct'] + shock['hall_ratio_pct'], 0.0, 100.0),
+                adjustments=adjustments)
+
+def break_even_revenue(result):
+    """
+    시나리오 결과(스칼라 또는 몬테카를로 표본 배열)의 칸별 손익분기 매출 (로열티 포함)
+    고정비 / (1 - 매출 비례 비용률 - 배달/포장 비례 비용률 × 배달/포장 매출 비중)
+    매출 비례 비용과 로열티는 매출로, 배달/포장 비례 비용은 배달/포장 매출로 나눈 비율 (그 칸의 홀매출 비율 그대로)
+    배달/포장 매출이 없는 칸의 배달/포장 비용은 고정비로 취급. 공헌이익률이 0 이하면 inf
+    """
+    revenue = np.asarray(result['revenue'], dtype=float)
+    delivery_revenue = np.asarray(result['delivery_revenue'], dtype=float)
+    costs = result['costs']
+    variable_cost = sum(np.asarray(costs[item], dtype=float) for item in VARIABLE_COST_ITEMS + ['로열티'] if item in costs)
+    delivery_cost = sum(np.asarray(costs[item], dtype=float) for item in DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS if item in costs)
+    has_revenue, has_delivery = revenue > 0, delivery_revenue > 0
+    variable_rate = np.divide(variable_cost, revenue, out=np.zeros_like(revenue), where=has_revenue)
+    delivery_rate = np.divide(delivery_cost, delivery_revenue, out=np.zeros_like(revenue), where=has_delivery)
+    delivery_share = np.divide(delivery_revenue, revenue, out=np.zeros_like(revenue), where=has_revenue)
+    fixed_cost = np.asarray(result['total_cost'], dtype=float) - variable_cost - np.where(has_delivery, delivery_cost, 0.0)
+    contribution = 1 - variable_rate - delivery_rate * delivery_share
+    bep = np.divide(fixed_cost, contribution, out=np.full_like(revenue, np.inf), where=contribution > 0)
+    return bep if bep.ndim else float(bep)
+
+def risk_summary(result):
+    """
+    몬테카를로 결과 배열 → 손실 확률, 순수익률 P10/P50/P90, 손익분기 매출 이상 확률
+    손익분기 매출은 표본마다 그 표본의 비용으로 계산해 그 표본의 매출과 비교 (공헌이익률이 양수면 순이익 >= 0 과 같음)
+    """
+    p10, p50, p90 = np.percentile(result['profit_margin'], [10, 50, 90])
+    return {
+        'loss_probability': float(np.mean(result['profit'] < 0)),
+        'p10': float(p10), 'p50': float(p50), 'p90': float(p90),
+        'above_bep_probability': float(np.mean(result['revenue'] >= break_even_revenue(result))),
+    }
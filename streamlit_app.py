@@ -2,31 +2,42 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import io
+import numpy as np
 import os
-import re
 import traceback
 import time
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaIoBaseDownload
-from google.oauth2 import service_account
+from datetime import datetime, timedelta, timezone
+
+from analytics import (
+    VARIABLE_COST_ITEMS, DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS, FIXED_COST_ITEMS, ALL_POSSIBLE_EXPENSE_CATEGORIES,
+    cube_view_mask, build_pnl_table, allocate_costs, daily_sales_frame, resample_sales, minmax_downsample
+)
+from data_loader import (
+    SNAPSHOT_DIR, new_sync_store, data_source_from_config, refresh_from_source, refresh_files, build_ledger, load_snapshot, covers_branches
+)
+from dataset_store import Dataset, DatasetStore, empty_dataset, scope_for
+from simulation import (
+    MIN_FIT_MONTHS, evaluate_scenarios, sensitivity_grid, tornado, lever_value,
+    fit_monthly_variation, sample_scenarios, break_even_revenue, risk_summary
+)
 
 # ==============================================================================
 #     1. 설정 상수 정의
 # ==============================================================================
-# --- Google Drive 설정 ---
-DRIVE_FOLDER_ID = '13pZg9s5CKv5nn84Zbnk7L6xmiwF_zluR'
-
-# --- 파일별 설정 상수 ---
-OKPOS_DATA_START_ROW, OKPOS_COL_DATE, OKPOS_COL_DAY_OF_WEEK, OKPOS_COL_DINE_IN_SALES, OKPOS_COL_TAKEOUT_SALES, OKPOS_COL_DELIVERY_SALES = 7, 0, 1, 34, 36, 38
-SETTLEMENT_DATA_START_ROW, SETTLEMENT_COL_PERSONNEL_NAME, SETTLEMENT_COL_PERSONNEL_AMOUNT, SETTLEMENT_COL_FOOD_ITEM, SETTLEMENT_COL_FOOD_AMOUNT, SETTLEMENT_COL_SUPPLIES_ITEM, SETTLEMENT_COL_SUPPLIES_AMOUNT, SETTLEMENT_COL_AD_ITEM, SETTLEMENT_COL_AD_AMOUNT, SETTLEMENT_COL_FIXED_ITEM, SETTLEMENT_COL_FIXED_AMOUNT = 3, 1, 2, 4, 5, 7, 8, 10, 11, 13, 14
-
-# --- 분석용 카테고리 정의 ---
-VARIABLE_COST_ITEMS = ['식자재', '소모품']
-DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS = ['배달비']
-FIXED_COST_ITEMS = ['인건비', '광고비', '고정비']
-ALL_POSSIBLE_EXPENSE_CATEGORIES = list(set(VARIABLE_COST_ITEMS + DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS + FIXED_COST_ITEMS))
+# --- 분석용 카테고리 정의: analytics.py (VARIABLE/DELIVERY_SPECIFIC_VARIABLE/FIXED_COST_ITEMS) ---
+DATA_TTL_SECONDS = 600  # 공유 데이터셋을 소스와 다시 맞추는 주기 (만료돼도 기존 데이터를 보여주며 백그라운드에서 갱신)
+KST = timezone(timedelta(hours=9))
+# 일별 매출 탐색: 일/주/월 재집계와 이동평균은 서버에서, 브라우저에는 차트 폭에 맞춘 점 수만 전송
+EXPLORER_FREQS = {'일': 'D', '주': 'W', '월': 'M'}
+EXPLORER_SERIES = {'합계': None, '지점별': '지점명', '채널별': '항목1'}
+EXPLORER_MAX_POINTS = 1200  # 계열당 전송 점 수 상한 (와이드 레이아웃 전체 폭 차트 ≈ 1200px → 픽셀당 1점, 서버는 실제 차트 폭을 모르므로 고정값)
+EXPLORER_WEBGL_POINTS = 2000  # 전송 점 수 합계가 이보다 많으면 SVG 대신 WebGL(Scattergl) 트레이스
+RISK_SAMPLE_SIZES = [10_000, 20_000, 50_000]  # 몬테카를로 표본 수 선택지
+RISK_DEFAULT_SEED = 42
+SENSITIVITY_GRID_POINTS = 41  # 민감도 히트맵 축당 조건 수 (41 × 41 조합을 시나리오 엔진 한 번 호출로 계산)
+# 화면 선택: 전체 보기는 모든 섹션을 한 페이지에, 섹션을 고르면 그 섹션만 계산/렌더링 (차트는 섹션별 캐시에 남아 다시 열 때 재사용)
+ALL_SECTIONS_VIEW = "🗂️ 전체 (한 페이지)"
+SECTIONS = {'sales': "📈 매출 분석", 'explorer': "📅 일별 매출 탐색", 'expense': "💸 지출 분석", 'profit': "💰 순수익 분석", 'simulation': "📊 시뮬레이션 분석"}
 
 # ==============================================================================
 #     2. 모든 함수 정의
@@ -48,20 +59,24 @@ def display_styled_title_box(title_text, **kwargs):
         </div>
     """, unsafe_allow_html=True)
 
+def sync_slider_value(key, source_key):
+    # 슬라이더/숫자 입력 중 바뀐 쪽 값을 공유 값과 다른 쪽 위젯에 반영 (on_change 콜백이라 추가 rerun 없음)
+    value = st.session_state[source_key]
+    st.session_state[key] = st.session_state[f"{key}_slider"] = st.session_state[f"{key}_num"] = value
+
 def custom_slider(label, min_value, max_value, default_value, step, help_text, key, format_str="%.1f"):
     if key not in st.session_state:
         st.session_state[key] = default_value
+    for widget_key in (f"{key}_slider", f"{key}_num"):
+        if widget_key not in st.session_state:
+            st.session_state[widget_key] = st.session_state[key]
     c1, c2 = st.columns([0.7, 0.3])
     with c1:
-        slider_val = st.slider(label, min_value, max_value, st.session_state[key], step, help=help_text, key=f"{key}_slider")
-        if slider_val != st.session_state[key]:
-            st.session_state[key] = slider_val
-            st.rerun()
+        st.slider(label, min_value, max_value, step=step, help=help_text, key=f"{key}_slider",
+                  on_change=sync_slider_value, args=(key, f"{key}_slider"))
     with c2:
-        number_val = st.number_input(" ", min_value, max_value, st.session_state[key], step, label_visibility="collapsed", key=f"{key}_num", format=format_str)
-        if number_val != st.session_state[key]:
-            st.session_state[key] = number_val
-            st.rerun()
+        st.number_input(" ", min_value, max_value, step=step, label_visibility="collapsed", key=f"{key}_num", format=format_str,
+                        on_change=sync_slider_value, args=(key, f"{key}_num"))
     return st.session_state[key]
 
 # ------------------ 로그인 및 데이터 로딩 함수들 ------------------
@@ -72,6 +87,7 @@ def authenticate(password):
             st.session_state.authenticated = True
             st.session_state.user_name = user.get("name")
             st.session_state.allowed_branches = user.get("allowed_branches")
+            st.session_state.is_admin = bool(user.get("admin", False))
             return True
     return False
 
@@ -90,186 +106,318 @@ def show_login_screen():
                     st.error("비밀번호가 틀렸습니다.")
     st.stop()
 
-@st.cache_data(ttl=600)
-def load_all_data_from_drive():
+@st.cache_resource
+def get_sync_store():
+    # 캐시 만료와 무관하게 프로세스 내에 유지되는 파일별 manifest 와 추출 결과
+    return new_sync_store()
+
+@st.cache_resource
+def get_dataset_store():
+    # 모든 세션이 공유하는 읽기 전용 데이터셋 (세션에는 lease 만 둠)
+    return DatasetStore()
+
+def get_data_source():
+    source_config = dict(st.secrets.get("data_source", {}))
+    google_info = dict(st.secrets["google"]) if source_config.get("type", "drive") == "drive" else None
+    return data_source_from_config(source_config, google_info)
+
+def dataset_loader(branches=None):
+    """
+    소스와 동기화해 새 데이터셋을 만드는 함수 (백그라운드 갱신 스레드에서 호출)
+    secrets/캐시 리소스는 여기서(세션 실행 중에) 미리 읽어 두고 스레드에서는 쓰지 않음
+    """
+    source, loader_config, store = get_data_source(), dict(st.secrets.get("loader", {})), get_sync_store()
+    def load():
+        return Dataset.from_ledger(refresh_from_source(store, source, loader_config, branches=branches))
+    return load
+
+def load_initial_dataset(branches=None):
+    """
+    공유 데이터셋이 아직 없을 때의 첫 로딩 (세션이 기다림). 실패하면 None
+    branches 를 주면 그 지점 폴더의 파일만 내려받아 그 지점 데이터셋을 만듦 (권한이 제한된 사용자의 첫 로딩)
+    """
+    source = None
     try:
-        credentials = service_account.Credentials.from_service_account_info(st.secrets["google"], scopes=['https://www.googleapis.com/auth/drive.readonly'])
-        drive_service = build('drive', 'v3', credentials=credentials)
-        all_files = list_files_recursive(drive_service, DRIVE_FOLDER_ID)
-        all_rows = []
-        file_counts = {'OKPOS': 0, '정산표': 0, '기타/미지원': 0}
-        processed_rows = {'OKPOS': 0, '정산표': 0}
-        for file in all_files:
-            file_id, file_name = file['id'], file['name']
-            file_path = file.get('path', file_name)
-            path_parts = [part for part in file_path.split('/') if part]
-            지점명 = path_parts[-2] if len(path_parts) >= 2 else "미분류"
-            try:
-                fh = io.BytesIO()
-                request = drive_service.files().get_media(fileId=file_id)
-                downloader = MediaIoBaseDownload(fh, request)
-                done = False
-                while not done: _, done = downloader.next_chunk()
-                fh.seek(0)
-            except HttpError: continue
-            engine_to_use = 'openpyxl' if file_name.lower().endswith('.xlsx') else 'xlrd' if file_name.lower().endswith('.xls') else None
-            if not engine_to_use:
-                file_counts['기타/미지원'] += 1
-                continue
-            try:
-                rows_before = len(all_rows)
-                if "OKPOS" in file_path:
-                    file_counts['OKPOS'] += 1
-                    df_sheet = pd.read_excel(fh, header=None, engine=engine_to_use)
-                    all_rows.extend(extract_okpos_table(df_sheet, 지점명))
-                    processed_rows['OKPOS'] += (len(all_rows) - rows_before)
-                elif "정산표" in file_path:
-                    file_counts['정산표'] += 1
-                    xls = pd.ExcelFile(fh, engine=engine_to_use)
-                    for sheet_name in xls.sheet_names:
-                        df_sheet = xls.parse(sheet_name, header=None)
-                        if "대전공장" in file_path:
-                            log = extract_daejeon_sales_log(df_sheet, sheet_name, file_path)
-                            if log:
-                                all_rows.extend(log)
-                        all_rows.extend(extract_from_sheet(df_sheet, sheet_name, 지점명))
-                        all_rows.extend(extract_kim_myeon_dashima(df_sheet, sheet_name, 지점명))
-                    processed_rows['정산표'] += (len(all_rows) - rows_before)
-
-            except Exception as e:
-                st.warning(f"😥 '{file_path}' 파일 처리 중 오류 발생: {e}")
-        if not all_rows: return pd.DataFrame(), {}, {}
-        df_통합 = pd.DataFrame(all_rows, columns=['날짜', '지점명', '분류', '항목1', '항목2', '금액'])
-        df_통합['금액'] = pd.to_numeric(df_통합['금액'], errors='coerce')
-        df_통합.dropna(subset=['금액', '날짜'], inplace=True)
-        df_통합['날짜'] = pd.to_datetime(df_통합['날짜'], errors='coerce')
-        df_통합.dropna(subset=['날짜'], inplace=True)
-        return df_통합[df_통합['금액'] > 0].copy(), file_counts, processed_rows
+        source, loader_config = get_data_source(), dict(st.secrets.get("loader", {}))
+        store = get_sync_store()
+        # 프로세스 첫 로딩: 디스크 스냅샷으로 바로 응답하고 소스와의 차이는 백그라운드에서 반영
+        if not store['files']:
+            with store['lock']:
+                restored = not store['files'] and load_snapshot(store, loader_config.get("snapshot_dir", SNAPSHOT_DIR))
+                snapshot_result = build_ledger(store, branches) if restored and covers_branches(store, branches) else None
+            if snapshot_result is not None:
+                get_dataset_store().refresh_async(dataset_loader(), None)
+                return Dataset.from_ledger(snapshot_result, as_of=store['snapshot_created_at'])
+        return Dataset.from_ledger(refresh_from_source(store, source, loader_config, branches=branches))
     except Exception as e:
-        st.error(f"Google Drive 데이터 로딩 중 심각한 오류가 발생했습니다: {e}")
-        return pd.DataFrame(), {}, {}
+        st.error(f"{source.name if source is not None else '데이터 소스'} 데이터 로딩 중 심각한 오류가 발생했습니다: {e}")
+        return None
 
-def get_data():
-    if 'df_all_branches' not in st.session_state or st.session_state.df_all_branches is None:
-        st.toast(f'{st.session_state.get("user_name", "사용자")}님, 환영합니다!', icon='🎉')
-        loading_message = "모든 지점의 데이터를 로딩 중입니다..."
-        if "all" not in st.session_state.get("allowed_branches", []):
-            loading_message = f'{", ".join(st.session_state.allowed_branches)} 지점의 데이터를 로딩 중입니다...'
-        with st.spinner(loading_message):
-            df_all, counts, rows = load_all_data_from_drive()
-            st.session_state.df_all_branches, st.session_state.file_counts, st.session_state.processed_rows = df_all, counts, rows
-        st.rerun()
-    return st.session_state.df_all_branches, st.session_state.file_counts, st.session_state.processed_rows
+def partial_refresh(scope, **target):
+    """
+    관리자 부분 새로고침: 지점/월/파일 대상만 다시 읽어 공유 데이터셋의 원장/큐브에 이어 붙임
+    반환값: 다시 반영한 파일 수
+    """
+    source, loader_config, store = get_data_source(), dict(st.secrets.get("loader", {})), get_sync_store()
+    changed = {'files': 0}
+    def update(current):
+        result = refresh_files(store, source, loader_config, branches=scope, **target)
+        changed['files'] = len(result[0])
+        return current.splice(*result) if current is not None else None
+    get_dataset_store().update(update, scope)
+    return changed['files']
+
+# ------------------ 필터별 집계/차트 캐시 ------------------
+# 키: (데이터 버전, 선택 지점, 월 범위, 권한 지점). 데이터 인자는 _ 접두사라 해시하지 않고 키로만 구분
+# 항목 수가 넘치면 가장 오래 안 쓴 필터부터 제거 (LRU)
+SECTION_CACHE_ENTRIES = 16
+
+@st.cache_data(max_entries=32)
+def get_pnl_table(view_key, _매출, _지출):
+    # 같은 필터면 손익표를 다시 계산하지 않음
+    return build_pnl_table(_매출, _지출)
+
+# 차트는 cache_resource 로 같은 Figure 객체를 돌려줌 (복사/재검증 없음) → 꺼낸 뒤 수정하지 말 것
+@st.cache_resource(max_entries=SECTION_CACHE_ENTRIES)
+def sales_section_figures(view_key, _매출, _요일별_뷰, _colors):
+    """매출 분석 섹션 차트. 데이터가 없는 차트는 None"""
+    figs = dict.fromkeys(['pie1', 'line', 'bar1', 'line_chart', 'bar3'])
+    매출, color_map_항목1_매출, color_map_지점, color_map_월, color_map_요일 = (
+        _매출, _colors['항목1_매출'], _colors['지점'], _colors['월'], _colors['요일'])
+    if not 매출.empty:
+        pie1 = px.pie(
+            매출.groupby('항목1', observed=True)['금액'].sum().reset_index(),
+            names='항목1', values='금액', hole=0,
+            color='항목1', color_discrete_map=color_map_항목1_매출
+        )
+        pie1.update_traces(
+            marker=dict(line=dict(color='#cccccc', width=1)),
+            hovertemplate="항목 : %{label}<br>금액: %{value:,.0f}원<extra></extra>",
+            textinfo='label+percent', texttemplate='%{label}<br>%{percent}', textfont_size=15
+        )
+        pie1.update_layout(
+            legend=dict(orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5),
+            height=550, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
+        )
+        figs['pie1'] = pie1
 
-# ------------------ 데이터 추출 헬퍼 함수들 (이하 생략 - 원본과 동일) ------------------
-def list_files_recursive(service, folder_id, path_prefix=""):
-    files = []
-    try:
-        results = service.files().list(q=f"'{folder_id}' in parents and trashed=false", fields="files(id, name, mimeType, parents)").execute()
-        items = results.get('files', [])
-        for item in items:
-            item_path = f"{path_prefix}/{item['name']}" if path_prefix else item['name']
-            if item.get('mimeType') == 'application/vnd.google-apps.folder':
-                files.extend(list_files_recursive(service, item['id'], item_path))
-            else:
-                item['path'] = item_path
-                files.append(item)
-    except HttpError as e:
-        st.error(f"Google Drive 폴더 접근 오류: {e}")
-    return files
-
-def sheetname_to_date(sheetname):
-    match = re.match(r"(\d{2})[.\-](\d{1,2})", sheetname)
-    if match: return f"20{match.group(1)}-{match.group(2).zfill(2)}-01"
-    return ""
-
-def extract_okpos_table(df, 지점명):
-    out = []
-    for i in range(OKPOS_DATA_START_ROW, df.shape[0]):
-        date_cell = df.iloc[i, OKPOS_COL_DATE]
-        if pd.isna(date_cell) or str(date_cell).strip() == '' or '합계' in str(date_cell): break
-        try:
-            if isinstance(date_cell, (int, float)):
-                날짜 = (pd.to_datetime('1899-12-30') + pd.to_timedelta(date_cell, 'D')).strftime('%Y-%m-%d')
-            else:
-                날짜 = pd.to_datetime(str(date_cell).replace("소계:", "").strip()).strftime('%Y-%m-%d')
-        except Exception: continue
-        요일_str = str(df.iloc[i, OKPOS_COL_DAY_OF_WEEK]).strip() + "요일"
-        홀매출 = pd.to_numeric(df.iloc[i, OKPOS_COL_DINE_IN_SALES], errors='coerce')
-        포장매출 = pd.to_numeric(df.iloc[i, OKPOS_COL_TAKEOUT_SALES], errors='coerce')
-        배달매출 = pd.to_numeric(df.iloc[i, OKPOS_COL_DELIVERY_SALES], errors='coerce')
-        if pd.notna(홀매출) and 홀매출 > 0: out.append([날짜, 지점명, '매출', '홀매출', 요일_str, 홀매출])
-        if pd.notna(포장매출) and 포장매출 > 0: out.append([날짜, 지점명, '매출', '포장매출', 요일_str, 포장매출])
-        if pd.notna(배달매출) and 배달매출 > 0: out.append([날짜, 지점명, '매출', '배달매출', 요일_str, 배달매출])
-    return out
-
-def extract_kim_myeon_dashima(df, sheetname, 지점명):
-    날짜 = sheetname_to_date(sheetname)
-    if not 날짜: return []
-    out = []
-    for i in range(SETTLEMENT_DATA_START_ROW, df.shape[0]):
-        item_cell, amount_cell = df.iloc[i, SETTLEMENT_COL_FOOD_ITEM], df.iloc[i, SETTLEMENT_COL_FOOD_AMOUNT]
-        if pd.isna(item_cell) or pd.isna(amount_cell):
-            if pd.isna(item_cell) and pd.isna(amount_cell): break
-            continue
-        금액 = pd.to_numeric(amount_cell, errors='coerce')
-        if pd.isna(금액) or 금액 <= 0: continue
-        항목_str = str(item_cell).strip()
-        if any(keyword in 항목_str for keyword in ["김", "면", "다시마"]):
-            parts = 항목_str.split('(')
-            항목1 = parts[0].strip()
-            항목2 = parts[1].replace(')', '').strip() if len(parts) > 1 else ""
-            if 항목1 and 항목2:
-                out.append([날짜, 지점명, "식자재", 항목1, 항목2, 금액])
-    return out
-
-def extract_from_sheet(df, sheetname, 지점명):
-    날짜 = sheetname_to_date(sheetname)
-    if not 날짜: return []
-    out = []
-    configs = [
-        ("인건비", SETTLEMENT_COL_PERSONNEL_NAME, SETTLEMENT_COL_PERSONNEL_AMOUNT),
-        ("식자재", SETTLEMENT_COL_FOOD_ITEM, SETTLEMENT_COL_FOOD_AMOUNT),
-        ("소모품", SETTLEMENT_COL_SUPPLIES_ITEM, SETTLEMENT_COL_SUPPLIES_AMOUNT),
-        ("광고비", SETTLEMENT_COL_AD_ITEM, SETTLEMENT_COL_AD_AMOUNT),
-        ("고정비", SETTLEMENT_COL_FIXED_ITEM, SETTLEMENT_COL_FIXED_AMOUNT),
-    ]
-    for i in range(SETTLEMENT_DATA_START_ROW, df.shape[0]):
-        if all(pd.isna(df.iloc[i, c[2]]) for c in configs if len(df.columns) > c[2]): break
-        for cat, item_col, amount_col in configs:
-            if len(df.columns) > item_col and len(df.columns) > amount_col:
-                항목, 금액 = df.iloc[i, item_col], pd.to_numeric(df.iloc[i, amount_col], errors='coerce')
-                if pd.notna(항목) and pd.notna(금액) and 금액 > 0:
-                    항목_str = str(항목).strip()
-                    분류 = "배달비" if cat == "고정비" and ("배달대행" in 항목_str or "배달수수료" in 항목_str) else cat
-                    out.append([날짜, 지점명, "지출", 분류, 항목_str, 금액])
-    return out
-
-def extract_daejeon_sales_log(df, sheetname, filepath):
+        line_data = 매출.groupby(['월', '항목1'], observed=True)['금액'].sum().reset_index()
+        line = px.line(line_data, x='월', y='금액', color='항목1', markers=True, color_discrete_map=color_map_항목1_매출)
+        line.update_traces(
+            text=line_data['금액'].apply(lambda x: f'{x:,.0f}'),
+            texttemplate='%{text}', textposition='top center',
+            hovertemplate="항목 : %{fullData.name}<br>금액: %{y:,.0f}원<extra></extra>"
+        )
+        line.update_layout(
+            height=550, legend=dict(title_text='', orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5),
+            yaxis_tickformat=',', paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
+        )
+        figs['line'] = line
+
+        월별_매출 = 매출.groupby(['지점명', '월'], observed=True)['금액'].sum().reset_index()
+        평균매출_지점별 = 월별_매출.groupby('지점명', observed=True)['금액'].mean().reset_index()
+        bar1 = px.bar(평균매출_지점별, x='지점명', y='금액', text='금액', color='지점명', color_discrete_map=color_map_지점)
+        bar1.update_traces(texttemplate='%{text:,.0f}원', textposition='outside', hovertemplate="지점: %{x}<br>월 평균 매출: %{y:,.0f}원<extra></extra>", textangle=0)
+        bar1.update_layout(height=550, xaxis_tickangle=0, bargap=0.5, showlegend=False, yaxis_tickformat=',', paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        figs['bar1'] = bar1
+
+        monthly_sales = 매출.groupby('월', observed=True)['금액'].sum().reset_index()
+        total_sales_monthly = monthly_sales['금액'].sum()
+        monthly_sales['비중'] = (monthly_sales['금액'] / total_sales_monthly).fillna(0)
+
+        # 첫 번째 월 색상 가져오기 (테마 반영)
+        line_color = next(iter(color_map_월.values())) if color_map_월 else '#1f77b4'
+
+        line_chart = px.line(monthly_sales, x='월', y='금액', markers=True)
+        line_chart.update_traces(
+            mode='lines+markers+text',
+            texttemplate='%{y:,.0f}원',
+            textposition='top center',
+            hovertemplate="월: %{x}<br>금액: %{y:,.0f}원<br>비중: %{customdata[0]:.1%}<extra></extra>",
+            customdata=monthly_sales[['비중']],
+            line=dict(color=line_color, width=2)  # 테마 색상 반영
+        )
+        line_chart.update_layout(
+            height=550,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            xaxis_title="월",
+            yaxis_title="매출 금액 (원)",
+            yaxis_tickformat=',',
+            xaxis={'categoryorder':'array', 'categoryarray':['1월','2월','3월','4월','5월','6월','7월','8월','9월','10월','11월','12월']},
+            showlegend=False
+        )
+        figs['line_chart'] = line_chart
+
+    요일별_매출 = _요일별_뷰[_요일별_뷰['분류'] == '매출']
+    매출_요일별 = 요일별_매출[~((요일별_매출['지점명'] == '대전공장') & (요일별_매출['항목1'] == '납품매출'))]
+    if not 매출_요일별.empty:
+        ordered_weekdays = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일']
+        daily_sales = 매출_요일별.groupby('요일', observed=True)['금액'].sum().reindex(ordered_weekdays).reset_index()
+        total_sales_daily = daily_sales['금액'].sum()
+        daily_sales['비중'] = (daily_sales['금액'] / total_sales_daily).fillna(0)
+        bar3 = px.bar(daily_sales, x='요일', y='금액', color='요일', color_discrete_map=color_map_요일, custom_data=['비중'])
+        bar3.update_traces(marker=dict(line=dict(color='#cccccc', width=1)), texttemplate='%{y:,.0f}원', textposition='outside', hovertemplate="요일: %{x}<br>금액: %{y:,.0f}원<br>비중: %{customdata[0]:.1%}<extra></extra>")
+        bar3.update_layout(height=550, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', xaxis_title="요일", yaxis_title="매출 금액 (원)", xaxis={'categoryorder':'array', 'categoryarray': ordered_weekdays}, showlegend=False)
+        figs['bar3'] = bar3
+    return figs
+
+@st.cache_resource(max_entries=SECTION_CACHE_ENTRIES)
+def expense_section_figures(view_key, _df_expense_analysis, _color_map_항목1_지출):
+    """지출 분석 섹션 차트 (공통비를 홀/배달+포장 매출 비중으로 배분). 데이터가 없는 차트는 None"""
+    df_expense_analysis, color_map_항목1_지출 = _df_expense_analysis, _color_map_항목1_지출
+    figs = dict.fromkeys(['pie_expense_h1', 'line_expense_h2', 'pie_expense_d1', 'line_expense_d2'])
+
+    # 공통비(변동비+고정비)를 홀/배달+포장 매출 비중으로 배분 → 월별 항목별 긴 형식 (비율 차트는 항목별 합계)
+    공통비_배분_항목 = [item for item in (VARIABLE_COST_ITEMS + FIXED_COST_ITEMS) if item in df_expense_analysis.columns]
+    df_홀지출_월별_data = allocate_costs(df_expense_analysis, 공통비_배분_항목, '홀매출_비중')
+    df_temp_line_d = pd.concat([
+        df_expense_analysis.groupby('월', observed=True)['배달비'].sum().reset_index(name='금액').assign(항목1='배달비'),
+        allocate_costs(df_expense_analysis, 공통비_배분_항목, '배달매출_비중')
+    ], ignore_index=True)
+
+    pie_data_h = df_홀지출_월별_data.groupby('항목1', sort=False)['금액'].sum().reset_index()
+    pie_data_h = pie_data_h[pie_data_h['금액'] > 0]
+    if not (pie_data_h.empty or pie_data_h['금액'].sum() == 0):
+        pie_expense_h1 = px.pie(pie_data_h, names='항목1', values='금액', hole=0, color='항목1', color_discrete_map=color_map_항목1_지출)
+        pie_expense_h1.update_traces(marker=dict(line=dict(color='#cccccc', width=1)), hovertemplate="항목 : %{label}<br>금액: %{value:,.0f}원<extra></extra>", textinfo='label+percent', texttemplate='%{label}<br>%{percent}', textfont_size=15)
+        pie_expense_h1.update_layout(legend=dict(orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), height=550, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        figs['pie_expense_h1'] = pie_expense_h1
+    if not (df_홀지출_월별_data.empty or df_홀지출_월별_data['금액'].sum() == 0):
+        line_expense_h2 = px.line(df_홀지출_월별_data, x='월', y='금액', color='항목1', markers=True, color_discrete_map=color_map_항목1_지출)
+        line_expense_h2.update_traces(text=df_홀지출_월별_data['금액'], texttemplate='%{text:,.0f}', textposition='top center', hovertemplate="항목 : %{fullData.name}<br>금액: %{y:,.0f}원<extra></extra>")
+        line_expense_h2.update_layout(height=550, legend=dict(title_text='', orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis_tickformat=',', paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        figs['line_expense_h2'] = line_expense_h2
+
+    pie_data_d = df_temp_line_d.groupby('항목1', sort=False)['금액'].sum().reset_index()
+    pie_data_d = pie_data_d[pie_data_d['금액'] > 0]
+    if not (pie_data_d.empty or pie_data_d['금액'].sum() == 0):
+        pie_expense_d1 = px.pie(pie_data_d, names='항목1', values='금액', hole=0, color='항목1', color_discrete_map=color_map_항목1_지출)
+        pie_expense_d1.update_traces(marker=dict(line=dict(color='#cccccc', width=1)), hovertemplate="항목 : %{label}<br>금액: %{value:,.0f}원<extra></extra>", textinfo='label+percent', texttemplate='%{label}<br>%{percent}', textfont_size=15)
+        pie_expense_d1.update_layout(legend=dict(orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), height=550, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        figs['pie_expense_d1'] = pie_expense_d1
+    if not (df_temp_line_d.empty or df_temp_line_d['금액'].sum() == 0):
+        line_expense_d2 = px.line(df_temp_line_d, x='월', y='금액', color='항목1', markers=True, color_discrete_map=color_map_항목1_지출)
+        line_expense_d2.update_traces(text=df_temp_line_d['금액'], texttemplate='%{text:,.0f}', textposition='top center', hovertemplate="항목 : %{fullData.name}<br>금액: %{y:,.0f}원<extra></extra>")
+        line_expense_d2.update_layout(height=550, legend=dict(title_text='', orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis_tickformat=',', paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        figs['line_expense_d2'] = line_expense_d2
+    return figs
+
+@st.cache_resource(max_entries=SECTION_CACHE_ENTRIES)
+def profit_section_figures(view_key, _df_profit, _color_map_지점, _palette):
+    """순수익 분석 섹션 차트 (공장 포함 손익표, 홀/배달은 공장 제외). 데이터가 없는 차트는 None"""
+    df_profit_analysis_recalc, color_map_지점, chart_colors_palette = _df_profit, _color_map_지점, _palette
+    figs = dict.fromkeys(['line_total_profit_rate', 'line_hall_profit_rate', 'line_delivery_profit_rate', 'fig_bep', 'line_food_cost', 'line_labor_cost'])
+
+    if not (df_profit_analysis_recalc.empty or '총순수익률' not in df_profit_analysis_recalc or df_profit_analysis_recalc['총순수익률'].isnull().all()):
+        line_total_profit_rate = px.line(df_profit_analysis_recalc, x='월', y='총순수익률', color='지점명', markers=True, custom_data=['총순수익'], color_discrete_map=color_map_지점)
+        line_total_profit_rate.update_traces(texttemplate='%{y:.2f}%', textposition='top center', hovertemplate="<b>지점:</b> %{fullData.name}<br><b>월:</b> %{x}<br><b>순수익률:</b> %{y:.2f}%<br><b>순수익:</b> %{customdata[0]:,.0f}원<extra></extra>")
+        line_total_profit_rate.update_layout(height=550, legend=dict(title_text="", orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis=dict(ticksuffix="%", tickformat=",.2f"), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        figs['line_total_profit_rate'] = line_total_profit_rate
+
+    # 공장 제외 후 홀/배달 순수익률 차트
+    df_stores_only = df_profit_analysis_recalc
+    if not df_profit_analysis_recalc.empty:
+        df_stores_only = df_profit_analysis_recalc[~df_profit_analysis_recalc['지점명'].str.contains('공장', na=False)]
+    if not (df_stores_only.empty or '홀순수익률' not in df_stores_only or df_stores_only['홀순수익률'].isnull().all()):
+        line_hall_profit_rate = px.line(df_stores_only, x='월', y='홀순수익률', color='지점명', markers=True, custom_data=['홀순수익'], color_discrete_map=color_map_지점)
+        line_hall_profit_rate.update_traces(texttemplate='%{y:.2f}%', textposition='top center', hovertemplate="<b>지점:</b> %{fullData.name}<br><b>월:</b> %{x}<br><b>순수익률:</b> %{y:.2f}%<br><b>순수익:</b> %{customdata[0]:,.0f}원<extra></extra>")
+        line_hall_profit_rate.update_layout(height=550, legend=dict(title_text="", orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis=dict(ticksuffix="%"), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        figs['line_hall_profit_rate'] = line_hall_profit_rate
+    if not (df_stores_only.empty or '배달순수익률' not in df_stores_only or df_stores_only['배달순수익률'].isnull().all()):
+        line_delivery_profit_rate = px.line(df_stores_only, x='월', y='배달순수익률', color='지점명', markers=True, custom_data=['배달순수익'], color_discrete_map=color_map_지점)
+        line_delivery_profit_rate.update_traces(texttemplate='%{y:.2f}%', textposition='top center', hovertemplate="<b>지점:</b> %{fullData.name}<br><b>월:</b> %{x}<br><b>순수익률:</b> %{y:.2f}%<br><b>순수익:</b> %{customdata[0]:,.0f}원<extra></extra>")
+        line_delivery_profit_rate.update_layout(height=550, legend=dict(title_text="", orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis=dict(ticksuffix="%"), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        figs['line_delivery_profit_rate'] = line_delivery_profit_rate
+
+    if not df_profit_analysis_recalc.empty:
+        df_bep_total = df_profit_analysis_recalc.groupby('월', observed=True).agg(총매출=('총매출', 'sum'), 손익분기점_매출=('손익분기점_매출', 'sum'), 안전여유매출액=('안전여유매출액', 'sum')).reset_index()
+
+        fig_bep = go.Figure()
+        fig_bep.add_trace(go.Bar(x=df_bep_total['월'], y=df_bep_total['총매출'], name='총매출', marker_color=chart_colors_palette[0], text=df_bep_total['총매출']))
+        fig_bep.add_trace(go.Bar(x=df_bep_total['월'], y=df_bep_total['손익분기점_매출'], name='손익분기점 매출', marker_color=chart_colors_palette[1], text=df_bep_total['손익분기점_매출']))
+        fig_bep.add_trace(go.Scatter(x=df_bep_total['월'], y=df_bep_total['안전여유매출액'], mode='lines+markers+text', name='안전여유매출액', marker_color=chart_colors_palette[2], line=dict(width=2), text=df_bep_total['안전여유매출액'], textposition="top center"))
+        fig_bep.update_traces(selector=dict(type='bar'), texttemplate='%{text:,.0f}', textangle=0, hovertemplate="<b>월:</b> %{x}<br><b>%{data.name}:</b> %{y:,.0f}원<extra></extra>")
+        fig_bep.update_traces(selector=dict(type='scatter'), texttemplate='%{text:,.0f}', hovertemplate="<b>월:</b> %{x}<br><b>%{data.name}:</b> %{y:,.0f}원<extra></extra>")
+        fig_bep.update_layout(barmode='group', height=550, legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5), yaxis=dict(tickformat=","), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        figs['fig_bep'] = fig_bep
+
+    if not (df_profit_analysis_recalc.empty or '식자재' not in df_profit_analysis_recalc.columns):
+        line_food_cost = px.line(df_profit_analysis_recalc, x='월', y='식자재_원가율', color='지점명', markers=True, color_discrete_map=color_map_지점)
+        line_food_cost.update_traces(texttemplate='%{y:.2f}%', textposition='top center', hovertemplate="<b>지점:</b> %{fullData.name}<br><b>월:</b> %{x}<br><b>원가율:</b> %{y:.2f}%<extra></extra>")
+        line_food_cost.update_layout(height=550, legend=dict(title_text="", orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis=dict(ticksuffix="%"), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        figs['line_food_cost'] = line_food_cost
+    if not (df_profit_analysis_recalc.empty or '인건비' not in df_profit_analysis_recalc.columns):
+        line_labor_cost = px.line(df_profit_analysis_recalc, x='월', y='인건비_원가율', color='지점명', markers=True, color_discrete_map=color_map_지점)
+        line_labor_cost.update_traces(texttemplate='%{y:.2f}%', textposition='top center', hovertemplate="<b>지점:</b> %{fullData.name}<br><b>월:</b> %{x}<br><b>원가율:</b> %{y:.2f}%<extra></extra>")
+        line_labor_cost.update_layout(height=550, legend=dict(title_text="", orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis=dict(ticksuffix="%"), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        figs['line_labor_cost'] = line_labor_cost
+    return figs
+
+@st.cache_resource(max_entries=SECTION_CACHE_ENTRIES)
+def explorer_figure(view_key, _일별_뷰, freq, by, window, _colors):
+    """일별 매출 탐색 차트와 (원본 점 수, 전송 점 수, WebGL 사용 여부). 데이터가 없으면 차트는 None"""
+    daily = daily_sales_frame(_일별_뷰, by)
+    if daily.empty:
+        return None, (0, 0, False)
+    series = resample_sales(daily, freq, window)
+    picked = {name: minmax_downsample(series[name].to_numpy(dtype=float), EXPLORER_MAX_POINTS) for name in series.columns}
+    sent = sum(len(idx) for idx in picked.values())
+    use_webgl = sent > EXPLORER_WEBGL_POINTS
+    trace = go.Scattergl if use_webgl else go.Scatter
+    fig = go.Figure()
+    for name, idx in picked.items():
+        fig.add_trace(trace(
+            x=series.index[idx], y=series[name].to_numpy()[idx], mode='lines', name=name,
+            line=dict(width=1.5, color=_colors.get(name)),
+            hovertemplate="%{fullData.name}<br>%{x|%Y-%m-%d}<br>매출: %{y:,.0f}원<extra></extra>"
+        ))
+    fig.update_layout(
+        height=550, hovermode='x unified', showlegend=by is not None,
+        legend=dict(title_text='', orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+        yaxis=dict(tickformat=','), xaxis=dict(rangeslider=dict(visible=True)),
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig, (series.size, sent, use_webgl)
+
+def show_section(name):
+    """현재 화면 선택에서 섹션을 그리는지 (전체 보기면 모든 섹션)"""
+    return st.session_state.get("section_view", ALL_SECTIONS_VIEW) in (ALL_SECTIONS_VIEW, SECTIONS[name])
+
+def show_chart(fig, warning):
+    if fig is None:
+        st.warning(warning)
+    else:
+        st.plotly_chart(fig, use_container_width=True)
+
+def get_data():
     """
-    대전공장 정산표에서 '총매출' 항목이 포함된 셀을 찾아 C열 금액을 추출
-    로그 데이터 형식으로 반환
+    이번 실행에서 쓸 공유 데이터셋. 세션에는 데이터 복사본 대신 lease(현재 버전 참조)만 저장
+    새 버전이 게시되면 다음 실행부터 새 버전으로 갈아탐 (실행 도중에는 같은 버전 유지)
     """
-    날짜 = sheetname_to_date(sheetname)
-    if not 날짜:
-        return []
-
-    # 지점명은 경로에서 추출 (예: '정산표/대전공장/25.06.xlsx')
-    parts = filepath.split('/')
-    지점명 = parts[-2] if len(parts) >= 2 else "지점명미상"
-
-    for idx, row in df.iterrows():
-        b_cell = str(row[1]).strip() if pd.notna(row[1]) else ''
-        if '총매출' in b_cell:
-            c_cell = row[2]
-            if pd.notna(c_cell):
-                try:
-                    금액 = int(str(c_cell).replace(',', '').replace(' ', ''))
-                    return [[날짜, 지점명, '매출', '납품매출', '월매출', 금액]]
-                except Exception as e:
-                    print(f"총매출 금액 변환 오류: {e}")
-                    return []
-    return []
+    dataset_store = get_dataset_store()
+    dataset_store.start_scheduler(int(st.secrets.get("loader", {}).get("refresh_interval", DATA_TTL_SECONDS)))
+    scope = scope_for(st.session_state.allowed_branches)
+    lease = st.session_state.get('dataset_lease')
+    if lease is None:
+        st.toast(f'{st.session_state.get("user_name", "사용자")}님, 환영합니다!', icon='🎉')
+        if dataset_store.current(scope) is None:
+            loading_message = "모든 지점의 데이터를 로딩 중입니다..."
+            if "all" not in st.session_state.get("allowed_branches", []):
+                loading_message = f'{", ".join(st.session_state.allowed_branches)} 지점의 데이터를 로딩 중입니다...'
+            with st.spinner(loading_message):
+                dataset_store.refresh_if_stale(lambda: load_initial_dataset(scope), DATA_TTL_SECONDS, scope, reload_fn=dataset_loader(scope))
+        st.session_state.dataset_lease = dataset_store.acquire(scope)
+        if st.session_state.dataset_lease is None:
+            return empty_dataset()
+        st.rerun()
+    # stale-while-revalidate: 만료된 데이터셋도 그대로 쓰고 새 버전은 백그라운드에서 만듦
+    current = dataset_store.current(scope)
+    if current is not None and current.age() >= DATA_TTL_SECONDS:
+        dataset_store.refresh_async(dataset_loader(scope), scope)
+    if current is not None and current is not lease.dataset:
+        st.session_state.dataset_lease = lease = dataset_store.acquire(scope)
+    return lease.dataset
 
 # ==================================================================
 #                       >>> 메인 앱 실행 <<<
@@ -306,52 +454,94 @@ if "authenticated" not in st.session_state:
 if not st.session_state.authenticated:
     show_login_screen()
 
-df_all_branches, file_counts, processed_rows = get_data()
+dataset = get_data()
 
-if df_all_branches.empty:
-    st.error("처리할 데이터가 없습니다. Google Drive 폴더 또는 파일 내용을 확인해주세요.")
+if dataset.empty:
+    st.error("처리할 데이터가 없습니다. 데이터 소스 폴더 또는 파일 내용을 확인해주세요.")
     st.stop()
 
-# 권한 지점 필터
-if "all" in st.session_state.allowed_branches:
-    df = df_all_branches.copy()
-else:
-    df = df_all_branches[df_all_branches['지점명'].isin(st.session_state.allowed_branches)].copy()
+file_counts, processed_rows, file_stats = dataset.file_counts, dataset.processed_rows, dataset.file_stats
 
-# 공통 파생 컬럼 (필터 전)
-df['요일'] = df['날짜'].dt.day_name().map({
-    'Monday': '월요일', 'Tuesday': '화요일', 'Wednesday': '수요일',
-    'Thursday': '목요일', 'Friday': '금요일', 'Saturday': '토요일', 'Sunday': '일요일'
-})
-df['항목1'] = df['항목1'].fillna('기타')
-df['항목2'] = df['항목2'].fillna('기타')
+# 파일별 처리 오류: 로딩은 백그라운드 스레드에서도 실행되어 그때 화면에 쓸 수 없으므로 처리 기록의 실패 사유를 세션에서 표시
+# (데이터셋 버전마다 한 번, 권한 지점의 파일만)
+if st.session_state.get('file_errors_shown_version') != dataset.version:
+    st.session_state.file_errors_shown_version = dataset.version
+    if not file_stats.empty:
+        실패_파일 = file_stats[file_stats['실패 사유'].notna()]
+        if "all" not in st.session_state.allowed_branches:
+            실패_파일 = 실패_파일[실패_파일['지점명'].isin(st.session_state.allowed_branches)]
+        for _, row in 실패_파일.iterrows():
+            st.warning(f"😥 '{row['파일']}' 파일 처리 중 오류 발생: {row['실패 사유']}")
 
-# ✅ B안: 월 범위 슬라이더용 연월 컬럼
-df['연월'] = df['날짜'].dt.to_period('M')
+# 이후 차트/KPI 는 원장 대신 로딩 시 만든 집계 큐브(지점명 × 연월 × 분류 × 항목1, 요일별)에서 조회
+# 권한 지점 필터: 공유 데이터셋에서 권한 조합별로 한 번만 거른 큐브 (같은 권한의 세션끼리 공유)
+cubes = dataset.cubes_for(st.session_state.allowed_branches)
+월별_큐브, 요일별_큐브, 일별_큐브 = cubes['month'], cubes['weekday'], cubes['day']
 
 with st.sidebar:
     st.info(f"**로그인 계정:**\n\n{st.session_state.user_name}")
+
+    # 데이터 기준 시각 / 수동 갱신 (갱신은 백그라운드에서 진행되고 끝나면 다음 조작부터 새 데이터가 보임)
+    dataset_store, data_scope = get_dataset_store(), scope_for(st.session_state.allowed_branches)
+    st.caption(f"🕒 데이터 기준: {datetime.fromtimestamp(dataset.as_of, KST).strftime('%Y-%m-%d %H:%M')}")
+    if dataset_store.is_refreshing(data_scope):
+        st.caption("🔄 최신 데이터를 불러오는 중입니다...")
+    elif dataset_store.last_error(data_scope):
+        st.caption(f"⚠️ 마지막 갱신 실패: {dataset_store.last_error(data_scope)[1]}")
+    if st.button("🔄 데이터 새로고침", use_container_width=True):
+        dataset_store.refresh_async(dataset_loader(data_scope), data_scope)
+        st.toast("백그라운드에서 최신 데이터를 불러옵니다.", icon='🔄')
+
+    # 관리자: 지점/월/파일 단위로 다시 읽어 원장에 바로 반영 (정산표 수정 후 전체 재로딩 없이)
+    if st.session_state.get("is_admin"):
+        with st.expander("🛠️ 부분 새로고침 (관리자)"):
+            # 백그라운드/예약 갱신은 세션 밖에서 실행되어 실패가 화면에 드러나지 않으므로 여기서 확인
+            갱신_오류 = dataset_store.last_error(data_scope)
+            if 갱신_오류:
+                st.warning(f"마지막 백그라운드 갱신 실패 ({datetime.fromtimestamp(갱신_오류[0], KST).strftime('%Y-%m-%d %H:%M')}): {갱신_오류[1]}")
+            대상_종류 = st.radio("대상", ["지점", "월", "파일"], horizontal=True, key="partial_refresh_kind")
+            파일_기록 = dataset.file_stats if not dataset.file_stats.empty else pd.DataFrame(columns=['파일', '지점명'])
+            if 대상_종류 == "지점":
+                target = {'branch': st.selectbox("지점", sorted(파일_기록['지점명'].dropna().unique()), key="partial_refresh_branch")}
+            elif 대상_종류 == "월":
+                target = {'month': st.selectbox("월", [p.strftime('%Y-%m') for p in sorted(dataset.cubes['month']['연월'].unique(), reverse=True)], key="partial_refresh_month")}
+            else:
+                target = {'file_path': st.selectbox("파일", sorted(파일_기록['파일']), key="partial_refresh_file")}
+            if st.button("선택 대상 다시 불러오기", use_container_width=True) and None not in target.values():
+                started = time.perf_counter()
+                with st.spinner("선택한 파일을 다시 불러오는 중입니다..."):
+                    refreshed = partial_refresh(data_scope, **target)
+                st.session_state.partial_refresh_message = f"{refreshed}개 파일을 다시 반영했습니다 ({time.perf_counter() - started:.1f}초)"
+                st.rerun()
+            if st.session_state.get("partial_refresh_message"):
+                st.success(st.session_state.pop("partial_refresh_message"))
     st.markdown("---")
 
-    # 바로가기
-    st.markdown("""
-    <h4>바로가기</h4>
-    <a class="nav-button" href="#sales-analysis">📈 매출 분석</a>
-    <a class="nav-button" href="#expense-analysis">💸 지출 분석</a>
-    <a class="nav-button" href="#profit-analysis">💰 순수익 분석</a>
-    <a class="nav-button" href="#simulation-analysis">📊 시뮬레이션 분석</a>
-    """, unsafe_allow_html=True)
+    # 화면 선택: 전체(한 페이지 + 바로가기) 또는 선택한 섹션 하나만 계산/전송
+    st.markdown("<h4>화면 선택</h4>", unsafe_allow_html=True)
+    선택_화면 = st.radio("화면", [ALL_SECTIONS_VIEW] + list(SECTIONS.values()), key="section_view", label_visibility="collapsed")
+
+    if 선택_화면 == ALL_SECTIONS_VIEW:
+        # 바로가기
+        st.markdown("""
+        <h4>바로가기</h4>
+        <a class="nav-button" href="#sales-analysis">📈 매출 분석</a>
+        <a class="nav-button" href="#daily-sales-explorer">📅 일별 매출 탐색</a>
+        <a class="nav-button" href="#expense-analysis">💸 지출 분석</a>
+        <a class="nav-button" href="#profit-analysis">💰 순수익 분석</a>
+        <a class="nav-button" href="#simulation-analysis">📊 시뮬레이션 분석</a>
+        """, unsafe_allow_html=True)
 
     st.markdown("---")
 
     st.markdown("<h4>지점/기간 선택</h4>", unsafe_allow_html=True)
 
     # 지점 멀티 선택
-    지점목록 = sorted(df['지점명'].unique())
+    지점목록 = sorted(월별_큐브['지점명'].unique())
     선택_지점 = st.multiselect("📍 지점 선택", 지점목록, default=지점목록)
     
     # ✅ 월 범위 슬라이더 (연속 월만 허용)
-    월옵션 = sorted(df['연월'].unique())
+    월옵션 = sorted(월별_큐브['연월'].unique())
     start_month, end_month = st.select_slider(
         "🗓️ 월 범위 선택",
         options=월옵션,
@@ -359,39 +549,33 @@ with st.sidebar:
         format_func=lambda p: f"{p.year%100:02d}년 {p.month:02d}월"
     )
 
-# ✅ 필터: 지점 + 연속 월 범위
-df_filtered = df[
-    df['지점명'].isin(선택_지점) &
-    (df['연월'] >= start_month) &
-    (df['연월'] <= end_month)
-].copy()
-
-# 차트/집계를 위한 월 문자열 재생성 (예: "25년 06월")
-df_filtered['월'] = (
-    df_filtered['연월'].astype(str)
-    .str.replace('-', '년 ', regex=False)
-    .astype(str) + '월'
-)
+# ✅ 필터: 지점(권한 내에서 선택) + 연속 월 범위
+view_mask = cube_view_mask(월별_큐브, 선택_지점, start_month, end_month)
+월별_뷰 = 월별_큐브[view_mask]
 
-if df_filtered.empty:
+if 월별_뷰.empty:
     st.warning("선택하신 조건에 해당하는 데이터가 없습니다. 필터를 조정해주세요.")
     st.stop()
 
-# --- UI 렌더링을 위한 최종 데이터 준비 ---
-매출 = df_filtered[df_filtered['분류'] == '매출'].copy()
-지출 = df_filtered[df_filtered['분류'] == '지출'].copy()
+# --- UI 렌더링을 위한 최종 데이터 준비 (큐브 행 단위) ---
+매출 = 월별_뷰[월별_뷰['분류'] == '매출']
+지출 = 월별_뷰[월별_뷰['분류'] == '지출']
+요일별_뷰 = 요일별_큐브[cube_view_mask(요일별_큐브, 선택_지점, start_month, end_month)]
+
+# 필터별 차트/집계 캐시 키 (데이터 버전이 바뀌면 이전 항목은 더 이상 조회되지 않음)
+view_key = (cubes['version'], tuple(선택_지점), str(start_month), str(end_month), tuple(st.session_state.allowed_branches))
 
 # ✅ 컬러맵은 "선택된 기간/지점" 기준으로 생성 (불필요한 범례 색 줄임)
 chart_colors_palette = ['#964F4C', '#7A6C60', '#B0A696', '#5E534A', '#DED3BF', '#C0B4A0', '#F0E6D8', '#687E8E']
 color_map_항목1_매출 = {cat: chart_colors_palette[i % len(chart_colors_palette)] for i, cat in enumerate(sorted(매출['항목1'].unique()))}
 color_map_항목1_지출 = {cat: chart_colors_palette[i % len(chart_colors_palette)] for i, cat in enumerate(sorted(지출['항목1'].unique()))}
-color_map_월 = {m: chart_colors_palette[i % len(chart_colors_palette)] for i, m in enumerate(sorted(df_filtered['월'].unique()))}
+color_map_월 = {m: chart_colors_palette[i % len(chart_colors_palette)] for i, m in enumerate(sorted(월별_뷰['월'].unique()))}
 color_map_요일 = {d: chart_colors_palette[i % len(chart_colors_palette)] for i, d in enumerate(['월요일','화요일','수요일','목요일','금요일','토요일','일요일'])}
-color_map_지점 = {b: chart_colors_palette[i % len(chart_colors_palette)] for i, b in enumerate(sorted(df_filtered['지점명'].unique()))}
+color_map_지점 = {b: chart_colors_palette[i % len(chart_colors_palette)] for i, b in enumerate(sorted(월별_뷰['지점명'].unique()))}
 
 # --- 헤더 및 분석 기간 표시 ---
-분석최소일 = df_filtered['날짜'].min().strftime('%Y-%m-%d')
-분석최대일 = df_filtered['날짜'].max().strftime('%Y-%m-%d')
+분석최소일 = 월별_뷰['시작일'].min().strftime('%Y-%m-%d')
+분석최대일 = 월별_뷰['종료일'].max().strftime('%Y-%m-%d')
 
 st.markdown(f"""
 <div style='text-align: center; margin-bottom: 1rem; padding: 3rem 2rem; border-radius: 12px; background-color: #ffffff; border: 1px solid #cccccc; box-shadow: 0 4px 12px rgba(0,0,0,0.05);'>
@@ -451,6 +635,9 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 with st.expander("🗂️ 파일 처리 요약 보기"):
+    store_stats = get_dataset_store().stats()
+    st.caption(f"공유 데이터셋 버전 {dataset.version[:8]} · 원장 {len(dataset.ledger):,}행 · "
+               f"이 데이터셋을 보고 있는 세션 {store_stats['leases'].get(dataset.id, 0)}개")
     col1, col2 = st.columns(2)
     with col1:
         st.write("**발견된 파일 수**")
@@ -459,434 +646,204 @@ with st.expander("🗂️ 파일 처리 요약 보기"):
         st.write("**추출된 행 수**")
         st.dataframe(pd.DataFrame.from_dict(processed_rows, orient='index', columns=['행 수']))
 
-st.markdown("<a id='sales-analysis'></a>", unsafe_allow_html=True)
-st.markdown("---")
+    if not file_stats.empty:
+        # 단계별 총 소요 시간 (병렬 처리 시 파일별 시간의 합이라 실제 로딩 시간보다 길 수 있음)
+        st.write("**단계별 소요 시간 합계**")
+        stage_cols = ['다운로드(초)', '파싱(초)', '추출(초)']
+        col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+        col_m1.metric("다운로드", f"{file_stats['다운로드(초)'].sum():.2f}초", f"{file_stats['크기(bytes)'].sum() / 1e6:.1f} MB", delta_color="off")
+        col_m2.metric("파싱", f"{file_stats['파싱(초)'].sum():.2f}초")
+        col_m3.metric("추출", f"{file_stats['추출(초)'].sum():.2f}초")
+        col_m4.metric("실패 파일", f"{file_stats['실패 사유'].notna().sum()}개")
+
+        stage_by_branch = file_stats.groupby('지점명')[stage_cols].sum().reset_index().melt(id_vars='지점명', var_name='단계', value_name='초')
+        fig_stage = px.bar(stage_by_branch, x='초', y='지점명', color='단계', orientation='h',
+                           color_discrete_sequence=['#964F4C', '#B0A696', '#687E8E'], title="지점별 단계 소요 시간")
+        fig_stage.update_layout(height=max(250, 40 * file_stats['지점명'].nunique()), yaxis={'categoryorder': 'total ascending'})
+        st.plotly_chart(fig_stage, use_container_width=True)
+
+        st.write("**파일별 처리 기록** (열 제목을 눌러 정렬)")
+        st.dataframe(
+            file_stats.sort_values('합계(초)', ascending=False), hide_index=True, use_container_width=True,
+            column_config={
+                '크기(bytes)': st.column_config.NumberColumn(format="%d"),
+                '다운로드(초)': st.column_config.NumberColumn(format="%.3f"),
+                '파싱(초)': st.column_config.NumberColumn(format="%.3f"),
+                '추출(초)': st.column_config.NumberColumn(format="%.3f"),
+                '합계(초)': st.column_config.NumberColumn(format="%.3f"),
+            }
+        )
+
 #######################
 # 📈 매출 분석 섹션
 #######################
-display_styled_title_box("📈 매출 분석 📈", background_color="#f5f5f5", font_size="32px", margin_bottom="20px", padding_y="15px")
+if show_section('sales'):
+    st.markdown("<a id='sales-analysis'></a>", unsafe_allow_html=True)
+    st.markdown("---")
+    display_styled_title_box("📈 매출 분석 📈", background_color="#f5f5f5", font_size="32px", margin_bottom="20px", padding_y="15px")
 
-# 색상 매핑 사전 생성 (모든 차트에서 재활용)
-chart_colors_palette = ['#964F4C', '#7A6C60', '#B0A696', '#5E534A', '#DED3BF', '#C0B4A0', '#F0E6D8', '#687E8E']
-color_map_항목1_매출 = {cat: chart_colors_palette[i % len(chart_colors_palette)] for i, cat in enumerate(매출['항목1'].unique())}
-
-# 1~2번 차트
-col_chart1, col_chart2 = st.columns(2)
-with col_chart1:
-    display_styled_title_box("매출 항목 비율", background_color="#f5f5f5", font_size="22px", margin_bottom="20px")
-    if 매출.empty:
-        st.warning("매출 데이터가 없어 '매출 항목 비율' 차트를 표시할 수 없습니다.")
-    else:
-        pie1 = px.pie(
-            매출.groupby('항목1')['금액'].sum().reset_index(),
-            names='항목1', values='금액', hole=0,
-            color='항목1', color_discrete_map=color_map_항목1_매출
-        )
-        pie1.update_traces(
-            marker=dict(line=dict(color='#cccccc', width=1)),
-            hovertemplate="항목 : %{label}<br>금액: %{value:,.0f}원<extra></extra>",
-            textinfo='label+percent', texttemplate='%{label}<br>%{percent}', textfont_size=15
-        )
-        pie1.update_layout(
-            legend=dict(orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5),
-            height=550, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
-        )
-        st.plotly_chart(pie1, use_container_width=True)
+    # 색상 매핑 사전 생성 (모든 차트에서 재활용)
+    chart_colors_palette = ['#964F4C', '#7A6C60', '#B0A696', '#5E534A', '#DED3BF', '#C0B4A0', '#F0E6D8', '#687E8E']
+    color_map_항목1_매출 = {cat: chart_colors_palette[i % len(chart_colors_palette)] for i, cat in enumerate(매출['항목1'].unique())}
+    sales_figs = sales_section_figures(view_key, 매출, 요일별_뷰, {'항목1_매출': color_map_항목1_매출, '지점': color_map_지점, '월': color_map_월, '요일': color_map_요일})
 
-with col_chart2:
-    display_styled_title_box("매출 항목 월별 트렌드", background_color="#f5f5f5", font_size="22px", margin_bottom="20px")
-    if 매출.empty:
-        st.warning("매출 데이터가 없어 '매출 항목 월별 트렌드' 차트를 표시할 수 없습니다.")
-    else:
-        line_data = 매출.groupby(['월', '항목1'])['금액'].sum().reset_index()
-        line = px.line(line_data, x='월', y='금액', color='항목1', markers=True, color_discrete_map=color_map_항목1_매출)
-        line.update_traces(
-            text=line_data['금액'].apply(lambda x: f'{x:,.0f}'),
-            texttemplate='%{text}', textposition='top center',
-            hovertemplate="항목 : %{fullData.name}<br>금액: %{y:,.0f}원<extra></extra>"
-        )
-        line.update_layout(
-            height=550, legend=dict(title_text='', orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5),
-            yaxis_tickformat=',', paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
-        )
-        st.plotly_chart(line, use_container_width=True)
+    # 1~2번 차트
+    col_chart1, col_chart2 = st.columns(2)
+    with col_chart1:
+        display_styled_title_box("매출 항목 비율", background_color="#f5f5f5", font_size="22px", margin_bottom="20px")
+        show_chart(sales_figs['pie1'], "매출 데이터가 없어 '매출 항목 비율' 차트를 표시할 수 없습니다.")
 
-st.markdown("---")
+    with col_chart2:
+        display_styled_title_box("매출 항목 월별 트렌드", background_color="#f5f5f5", font_size="22px", margin_bottom="20px")
+        show_chart(sales_figs['line'], "매출 데이터가 없어 '매출 항목 월별 트렌드' 차트를 표시할 수 없습니다.")
 
-# 3~5번 차트
-col_chart3, col_chart4, col_chart5 = st.columns(3)
-with col_chart3:
-    display_styled_title_box("지점별 월 평균 매출 비교", background_color="#f5f5f5", font_size="22px", margin_bottom="20px")
-    if 매출.empty:
-        st.warning("매출 데이터가 없어 '지점별 월 평균 매출 비교' 차트를 표시할 수 없습니다.")
-    else:
-        월별_매출 = 매출.groupby(['지점명', '월'])['금액'].sum().reset_index()
-        평균매출_지점별 = 월별_매출.groupby('지점명')['금액'].mean().reset_index()
-        bar1 = px.bar(평균매출_지점별, x='지점명', y='금액', text='금액', color='지점명', color_discrete_map=color_map_지점)
-        bar1.update_traces(texttemplate='%{text:,.0f}원', textposition='outside', hovertemplate="지점: %{x}<br>월 평균 매출: %{y:,.0f}원<extra></extra>", textangle=0)
-        bar1.update_layout(height=550, xaxis_tickangle=0, bargap=0.5, showlegend=False, yaxis_tickformat=',', paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-        st.plotly_chart(bar1, use_container_width=True)
+    st.markdown("---")
 
-with col_chart4:
-    display_styled_title_box("월별 매출 추이", background_color="#f5f5f5", font_size="22px", margin_bottom="20px")
-    if 매출.empty:
-        st.warning("매출 데이터가 없어 '월별 매출 추이' 차트를 표시할 수 없습니다.")
-    else:
-        monthly_sales = 매출.groupby('월')['금액'].sum().reset_index()
-        total_sales_monthly = monthly_sales['금액'].sum()
-        monthly_sales['비중'] = (monthly_sales['금액'] / total_sales_monthly).fillna(0)
+    # 3~5번 차트
+    col_chart3, col_chart4, col_chart5 = st.columns(3)
+    with col_chart3:
+        display_styled_title_box("지점별 월 평균 매출 비교", background_color="#f5f5f5", font_size="22px", margin_bottom="20px")
+        show_chart(sales_figs['bar1'], "매출 데이터가 없어 '지점별 월 평균 매출 비교' 차트를 표시할 수 없습니다.")
 
-        # 첫 번째 월 색상 가져오기 (테마 반영)
-        line_color = next(iter(color_map_월.values())) if 'color_map_월' in globals() and color_map_월 else '#1f77b4'
+    with col_chart4:
+        display_styled_title_box("월별 매출 추이", background_color="#f5f5f5", font_size="22px", margin_bottom="20px")
+        show_chart(sales_figs['line_chart'], "매출 데이터가 없어 '월별 매출 추이' 차트를 표시할 수 없습니다.")
 
-        line_chart = px.line(monthly_sales, x='월', y='금액', markers=True)
-        line_chart.update_traces(
-            mode='lines+markers+text',
-            texttemplate='%{y:,.0f}원',
-            textposition='top center',
-            hovertemplate="월: %{x}<br>금액: %{y:,.0f}원<br>비중: %{customdata[0]:.1%}<extra></extra>",
-            customdata=monthly_sales[['비중']],
-            line=dict(color=line_color, width=2)  # 테마 색상 반영
-        )
-        line_chart.update_layout(
-            height=550,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            xaxis_title="월",
-            yaxis_title="매출 금액 (원)",
-            yaxis_tickformat=',',
-            xaxis={'categoryorder':'array', 'categoryarray':['1월','2월','3월','4월','5월','6월','7월','8월','9월','10월','11월','12월']},
-            showlegend=False
-        )
-        st.plotly_chart(line_chart, use_container_width=True)
 
+    with col_chart5:
+        display_styled_title_box("요일별 매출", background_color="#f5f5f5", font_size="22px", margin_bottom="20px")
+        show_chart(sales_figs['bar3'], "매출 데이터가 없어 '요일별 매출' 차트를 표시할 수 없습니다.")
 
-with col_chart5:
-    display_styled_title_box("요일별 매출", background_color="#f5f5f5", font_size="22px", margin_bottom="20px")
-    매출_요일별 = 매출[~((매출['지점명'] == '대전공장') & (매출['항목1'] == '납품매출'))]  # 원본 덮어쓰기 방지
-    if 매출_요일별.empty:
-        st.warning("매출 데이터가 없어 '요일별 매출' 차트를 표시할 수 없습니다.")
-    else:
-        ordered_weekdays = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일']
-        daily_sales = 매출_요일별.groupby('요일')['금액'].sum().reindex(ordered_weekdays).reset_index()
-        total_sales_daily = daily_sales['금액'].sum()
-        daily_sales['비중'] = (daily_sales['금액'] / total_sales_daily).fillna(0)
-        bar3 = px.bar(daily_sales, x='요일', y='금액', color='요일', color_discrete_map=color_map_요일, custom_data=['비중'])
-        bar3.update_traces(marker=dict(line=dict(color='#cccccc', width=1)), texttemplate='%{y:,.0f}원', textposition='outside', hovertemplate="요일: %{x}<br>금액: %{y:,.0f}원<br>비중: %{customdata[0]:.1%}<extra></extra>")
-        bar3.update_layout(height=550, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', xaxis_title="요일", yaxis_title="매출 금액 (원)", xaxis={'categoryorder':'array', 'categoryarray': ordered_weekdays}, showlegend=False)
-        st.plotly_chart(bar3, use_container_width=True)
+####################################################################################################
+# 📅 일별 매출 탐색 (OKPOS 일별 매출, 일/주/월 + 이동평균)
+####################################################################################################
+# 단위/계열/이동평균/채널을 바꾸면 이 fragment 만 다시 실행
+@st.fragment
+def daily_sales_explorer(일별_뷰, view_key):
+    st.markdown("<a id='daily-sales-explorer'></a>", unsafe_allow_html=True)
+    st.markdown("---")
+    display_styled_title_box("📅 일별 매출 탐색 📅", background_color="#f5f5f5", font_size="32px", margin_bottom="20px", padding_y="15px")
+    # 요일별 매출 차트와 같이 대전공장 납품매출 제외
+    일별_뷰 = 일별_뷰[~((일별_뷰['지점명'] == '대전공장') & (일별_뷰['항목1'] == '납품매출'))]
+    if 일별_뷰.empty:
+        st.warning("일별 매출 데이터가 없어 탐색 차트를 표시할 수 없습니다.")
+        return
+
+    채널목록 = sorted(일별_뷰['항목1'].astype(str).unique())
+    col_freq, col_series, col_window, col_channel = st.columns([1, 1.2, 1, 2])
+    단위 = col_freq.radio("단위", list(EXPLORER_FREQS), horizontal=True, key="explorer_freq")
+    계열 = col_series.radio("계열", list(EXPLORER_SERIES), horizontal=True, key="explorer_series")
+    이동평균 = col_window.selectbox("이동평균", [1, 3, 7, 14, 28], format_func=lambda w: "없음" if w == 1 else f"{w}{'개월' if 단위 == '월' else 단위} 평균", key="explorer_window")
+    선택_채널 = col_channel.multiselect("채널", 채널목록, default=채널목록, key="explorer_channels")
+
+    by = EXPLORER_SERIES[계열]
+    names = sorted(일별_뷰[by].astype(str).unique()) if by else ['전체']
+    colors = {name: chart_colors_palette[i % len(chart_colors_palette)] for i, name in enumerate(names)}
+    fig, (원본_점수, 전송_점수, webgl) = explorer_figure(
+        view_key + ('탐색', tuple(선택_채널)), 일별_뷰[일별_뷰['항목1'].isin(선택_채널)], EXPLORER_FREQS[단위], by, 이동평균, colors)
+    if fig is None:
+        st.warning("선택한 채널의 매출 데이터가 없습니다.")
+        return
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"{원본_점수:,}개 점 중 {전송_점수:,}개 전송 (구간별 최솟값/최댓값 유지)" + (" · WebGL" if webgl else ""))
+
+if show_section('explorer'):
+    daily_sales_explorer(일별_큐브[cube_view_mask(일별_큐브, 선택_지점, start_month, end_month)], view_key)
 
 ####################################################################################################
 # 💸 지출 분석 섹션
 ####################################################################################################
-st.markdown("<a id='expense-analysis'></a>", unsafe_allow_html=True)
-st.markdown("---")
+# --- 1) 지점 × 월 손익표 (지출/순수익 섹션 공용, 필터별 1회 계산) ---
+if show_section('expense') or show_section('profit'):
+    df_pnl, pnl_cost_items = get_pnl_table(view_key, 매출, 지출)
+    df_pnl_sales = df_pnl[df_pnl['매출월']]
 
-st.markdown("<br>", unsafe_allow_html=True)
-display_styled_title_box(
-    "💸 지출 분석 💸",
-    background_color="#f5f5f5", font_size="32px",
-    margin_bottom="20px", padding_y="15px"
-)
+if show_section('expense'):
+    st.markdown("<a id='expense-analysis'></a>", unsafe_allow_html=True)
+    st.markdown("---")
 
-# --- 1) df_expense_analysis 생성 (매출+지출 병합) ---
-df_expense_analysis = pd.DataFrame()
-if not 매출.empty:
-    # 매출 그룹화
-    총매출_월별_지점별 = (
-        매출.groupby(['지점명','월'])['금액']
-        .sum().reset_index()
-        .rename(columns={'금액':'총매출'})
-    )
-    배달매출_월별_지점별 = (
-        매출[매출['항목1'].isin(['배달매출','포장매출'])]
-        .groupby(['지점명','월'])['금액']
-        .sum().reset_index()
-        .rename(columns={'금액':'배달매출_총액'})
-    )
-    홀매출_월별_지점별 = (
-        매출[매출['항목1']=='홀매출']
-        .groupby(['지점명','월'])['금액']
-        .sum().reset_index()
-        .rename(columns={'금액':'홀매출_총액'})
+    st.markdown("<br>", unsafe_allow_html=True)
+    display_styled_title_box(
+        "💸 지출 분석 💸",
+        background_color="#f5f5f5", font_size="32px",
+        margin_bottom="20px", padding_y="15px"
     )
 
-    # 지출 그룹화
-    지출_원본 = pd.DataFrame()
-    if not 지출.empty:
-        지출_원본 = (
-            지출.groupby(['지점명','월','항목1'])['금액']
-            .sum().unstack(fill_value=0).reset_index()
-        )
-    # 필요한 컬럼 보강
-    for col in ALL_POSSIBLE_EXPENSE_CATEGORIES:
-        if col not in 지출_원본.columns:
-            지출_원본[col] = 0
-
-    # 병합
-    df_expense_analysis = 총매출_월별_지점별
-    df_expense_analysis = df_expense_analysis.merge(
-        배달매출_월별_지점별, on=['지점명','월'], how='left'
-    ).fillna(0)
-    df_expense_analysis = df_expense_analysis.merge(
-        홀매출_월별_지점별, on=['지점명','월'], how='left'
-    ).fillna(0)
-    df_expense_analysis = df_expense_analysis.merge(
-        지출_원본, on=['지점명','월'], how='left'
-    ).fillna(0)
-
-    # ✅ 공장(대전공장) 완전 제외
-    df_expense_analysis = df_expense_analysis[
-        df_expense_analysis['지점명'] != '대전공장'
-    ]
-
-# --- 2) 지출 분석 가능 여부 체크 & 시각화 ---
-필수_컬럼 = ['총매출','홀매출_총액','배달매출_총액']
-if df_expense_analysis.empty or not all(c in df_expense_analysis.columns for c in 필수_컬럼):
-    st.warning("지출 분석을 위한 데이터가 부족하여 차트를 표시할 수 없습니다.")
-else:
-    
-    col_h_exp1, col_h_exp2 = st.columns(2)
-    with col_h_exp1:
-        display_styled_title_box("홀매출 지출 항목 비율", font_size="22px", margin_bottom="20px")
-        홀매출_지출_원형_대상_항목 = [item for item in (VARIABLE_COST_ITEMS + FIXED_COST_ITEMS) if item in df_expense_analysis.columns]
-        pie_data_list_h = []
-        홀매출_분석용_비중_series = (df_expense_analysis.get('홀매출_총액', 0) / df_expense_analysis['총매출'].replace(0, 1)).fillna(0)
-        for item in 홀매출_지출_원형_대상_항목:
-            allocated_amount = (df_expense_analysis[item] * 홀매출_분석용_비중_series).sum()
-            if allocated_amount > 0: pie_data_list_h.append({'항목1': item, '금액': allocated_amount})
-        pie_data_h = pd.DataFrame(pie_data_list_h)
-        if pie_data_h.empty or pie_data_h['금액'].sum() == 0:
-            st.warning("홀매출 지출 데이터가 없어 비율 차트를 표시할 수 없습니다.")
-        else:
-            pie_expense_h1 = px.pie(pie_data_h, names='항목1', values='금액', hole=0, color='항목1', color_discrete_map=color_map_항목1_지출)
-            pie_expense_h1.update_traces(marker=dict(line=dict(color='#cccccc', width=1)), hovertemplate="항목 : %{label}<br>금액: %{value:,.0f}원<extra></extra>", textinfo='label+percent', texttemplate='%{label}<br>%{percent}', textfont_size=15)
-            pie_expense_h1.update_layout(legend=dict(orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), height=550, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-            st.plotly_chart(pie_expense_h1, use_container_width=True)
-    with col_h_exp2:
-        display_styled_title_box("홀매출 지출 항목 월별 지출", font_size="22px", margin_bottom="20px")
-        df_홀지출_월별_data_list = []
-        df_expense_analysis['홀매출_비중_계산용'] = (df_expense_analysis.get('홀매출_총액', 0) / df_expense_analysis['총매출'].replace(0, 1)).fillna(0)
-        for item in 홀매출_지출_원형_대상_항목:
-            if item in df_expense_analysis.columns:
-                df_temp = df_expense_analysis.groupby('월').apply(lambda x: (x[item] * x['홀매출_비중_계산용']).sum()).reset_index(name='금액')
-                df_홀지출_월별_data_list.append(df_temp.assign(항목1=item))
-        df_홀지출_월별_data = pd.concat(df_홀지출_월별_data_list, ignore_index=True) if df_홀지출_월별_data_list else pd.DataFrame()
-        if df_홀지출_월별_data.empty or df_홀지출_월별_data['금액'].sum() == 0:
-            st.warning("홀매출 월별 지출 데이터가 없어 트렌드 차트를 표시할 수 없습니다.")
-        else:
-            line_expense_h2 = px.line(df_홀지출_월별_data, x='월', y='금액', color='항목1', markers=True, color_discrete_map=color_map_항목1_지출)
-            line_expense_h2.update_traces(text=df_홀지출_월별_data['금액'], texttemplate='%{text:,.0f}', textposition='top center', hovertemplate="항목 : %{fullData.name}<br>금액: %{y:,.0f}원<extra></extra>")
-            line_expense_h2.update_layout(height=550, legend=dict(title_text='', orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis_tickformat=',', paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-            st.plotly_chart(line_expense_h2, use_container_width=True)
+    df_expense_analysis = pd.DataFrame()
+    if not 매출.empty:
+        # ✅ 공장(대전공장) 완전 제외
+        df_expense_analysis = df_pnl_sales[df_pnl_sales['지점명'] != '대전공장']
 
-    st.markdown("---")
-    col_d_exp1, col_d_exp2 = st.columns(2)
-    with col_d_exp1:
-        display_styled_title_box("배달+포장 지출 항목 비율", font_size="22px", margin_bottom="20px")
-        배달매출_지출_원형_데이터_list = []
-        delivery_specific_sum = df_expense_analysis.get('배달비', 0).sum()
-        if delivery_specific_sum > 0: 배달매출_지출_원형_데이터_list.append({'항목1': '배달비', '금액': delivery_specific_sum})
-        기타_지출_항목들_배달관련_원형 = [item for item in (VARIABLE_COST_ITEMS + FIXED_COST_ITEMS) if item in df_expense_analysis.columns]
-        if not df_expense_analysis.empty and '배달매출_총액' in df_expense_analysis.columns:
-            배달매출_비중 = (df_expense_analysis['배달매출_총액'] / df_expense_analysis['총매출'].replace(0, 1)).fillna(0)
-            for item in 기타_지출_항목들_배달관련_원형:
-                allocated_amount = (df_expense_analysis[item] * 배달매출_비중).sum()
-                if allocated_amount > 0: 배달매출_지출_원형_데이터_list.append({'항목1': item, '금액': allocated_amount})
-        pie_data_d = pd.DataFrame(배달매출_지출_원형_데이터_list)
-        if pie_data_d.empty or pie_data_d['금액'].sum() == 0:
-            st.warning("배달+포장 지출 데이터가 없어 비율 차트를 표시할 수 없습니다.")
-        else:
-            pie_expense_d1 = px.pie(pie_data_d, names='항목1', values='금액', hole=0, color='항목1', color_discrete_map=color_map_항목1_지출)
-            pie_expense_d1.update_traces(marker=dict(line=dict(color='#cccccc', width=1)), hovertemplate="항목 : %{label}<br>금액: %{value:,.0f}원<extra></extra>", textinfo='label+percent', texttemplate='%{label}<br>%{percent}', textfont_size=15)
-            pie_expense_d1.update_layout(legend=dict(orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), height=550, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-            st.plotly_chart(pie_expense_d1, use_container_width=True)
-    with col_d_exp2:
-        display_styled_title_box("배달+포장 지출 항목 월별 지출", font_size="22px", margin_bottom="20px")
-        df_temp_line_d_list = []
-        if '배달비' in df_expense_analysis.columns:
-            df_temp = df_expense_analysis.groupby('월')['배달비'].sum().reset_index(name='금액')
-            df_temp_line_d_list.append(df_temp.assign(항목1='배달비'))
-        if '배달매출_총액' in df_expense_analysis.columns:
-            df_expense_analysis['배달매출_비중_계산용'] = (df_expense_analysis['배달매출_총액'] / df_expense_analysis['총매출'].replace(0, 1)).fillna(0)
-            for item in 기타_지출_항목들_배달관련_원형:
-                if item in df_expense_analysis.columns:
-                    df_temp = df_expense_analysis.groupby('월').apply(lambda x: (x[item] * x['배달매출_비중_계산용']).sum()).reset_index(name='금액')
-                    df_temp_line_d_list.append(df_temp.assign(항목1=item))
-        df_temp_line_d = pd.concat(df_temp_line_d_list, ignore_index=True) if df_temp_line_d_list else pd.DataFrame()
-        if df_temp_line_d.empty or df_temp_line_d['금액'].sum() == 0:
-            st.warning("배달+포장 월별 지출 데이터가 없어 트렌드 차트를 표시할 수 없습니다.")
-        else:
-            line_expense_d2 = px.line(df_temp_line_d, x='월', y='금액', color='항목1', markers=True, color_discrete_map=color_map_항목1_지출)
-            line_expense_d2.update_traces(text=df_temp_line_d['금액'], texttemplate='%{text:,.0f}', textposition='top center', hovertemplate="항목 : %{fullData.name}<br>금액: %{y:,.0f}원<extra></extra>")
-            line_expense_d2.update_layout(height=550, legend=dict(title_text='', orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis_tickformat=',', paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-            st.plotly_chart(line_expense_d2, use_container_width=True)
+    # --- 2) 지출 분석 가능 여부 체크 & 시각화 ---
+    필수_컬럼 = ['총매출','홀매출_총액','배달매출_총액']
+    if df_expense_analysis.empty or not all(c in df_expense_analysis.columns for c in 필수_컬럼):
+        st.warning("지출 분석을 위한 데이터가 부족하여 차트를 표시할 수 없습니다.")
+    else:
+        expense_figs = expense_section_figures(view_key, df_expense_analysis, color_map_항목1_지출)
+
+        col_h_exp1, col_h_exp2 = st.columns(2)
+        with col_h_exp1:
+            display_styled_title_box("홀매출 지출 항목 비율", font_size="22px", margin_bottom="20px")
+            show_chart(expense_figs['pie_expense_h1'], "홀매출 지출 데이터가 없어 비율 차트를 표시할 수 없습니다.")
+        with col_h_exp2:
+            display_styled_title_box("홀매출 지출 항목 월별 지출", font_size="22px", margin_bottom="20px")
+            show_chart(expense_figs['line_expense_h2'], "홀매출 월별 지출 데이터가 없어 트렌드 차트를 표시할 수 없습니다.")
+
+        st.markdown("---")
+        col_d_exp1, col_d_exp2 = st.columns(2)
+        with col_d_exp1:
+            display_styled_title_box("배달+포장 지출 항목 비율", font_size="22px", margin_bottom="20px")
+            show_chart(expense_figs['pie_expense_d1'], "배달+포장 지출 데이터가 없어 비율 차트를 표시할 수 없습니다.")
+        with col_d_exp2:
+            display_styled_title_box("배달+포장 지출 항목 월별 지출", font_size="22px", margin_bottom="20px")
+            show_chart(expense_figs['line_expense_d2'], "배달+포장 월별 지출 데이터가 없어 트렌드 차트를 표시할 수 없습니다.")
 
-    st.markdown("<a id='profit-analysis'></a>", unsafe_allow_html=True)
-    
 ####################################################################################################
 # 💰 순수익 분석 섹션 (공장 포함, 매출・지출 기반 계산)
 ####################################################################################################
-st.markdown("---")
-st.markdown("<br>", unsafe_allow_html=True)
-display_styled_title_box("💰 순수익 분석 💰", background_color="#f5f5f5", font_size="32px", margin_bottom="20px", padding_y="15px")
-
-# 공장 포함된 지출 원본 복사
-df_full_expense_analysis = 지출.copy()
-
-if not 매출.empty:
-    # ─ 총매출, 홀매출, 배달매출 계산 ─
-    총매출_월별_지점별 = 매출.groupby(['지점명', '월'])['금액'].sum().reset_index().rename(columns={'금액': '총매출'})
-    배달매출_월별_지점별 = 매출[매출['항목1'].isin(['배달매출', '포장매출'])].groupby(['지점명', '월'])['금액'].sum().reset_index().rename(columns={'금액': '배달매출_총액'})
-    홀매출_월별_지점별 = 매출[매출['항목1'] == '홀매출'].groupby(['지점명', '월'])['금액'].sum().reset_index().rename(columns={'금액': '홀매출_총액'})
-
-    # ─ 지출 집계 ─
-    지출_항목1별_월별_지점별_raw = pd.DataFrame()
-    if not df_full_expense_analysis.empty:
-        지출_항목1별_월별_지점별_raw = df_full_expense_analysis.groupby(['지점명', '월', '항목1'])['금액'].sum().unstack(level='항목1', fill_value=0).reset_index()
-    for col in ALL_POSSIBLE_EXPENSE_CATEGORIES:
-        if col not in 지출_항목1별_월별_지점별_raw.columns:
-            지출_항목1별_월별_지점별_raw[col] = 0
-
-    # ─ 전체 병합 ─
-    df_profit_analysis_recalc = pd.merge(총매출_월별_지점별, 배달매출_월별_지점별, on=['지점명', '월'], how='left').fillna(0)
-    df_profit_analysis_recalc = pd.merge(df_profit_analysis_recalc, 홀매출_월별_지점별, on=['지점명', '월'], how='left').fillna(0)
-    df_profit_analysis_recalc = pd.merge(df_profit_analysis_recalc, 지출_항목1별_월별_지점별_raw, on=['지점명', '월'], how='left').fillna(0)
-
-    # ─ 총순수익 계산 ─
-    df_profit_analysis_recalc['총지출'] = df_profit_analysis_recalc[
-        [item for item in ALL_POSSIBLE_EXPENSE_CATEGORIES if item in df_profit_analysis_recalc.columns]
-    ].sum(axis=1)
-    df_profit_analysis_recalc['총순수익'] = df_profit_analysis_recalc['총매출'] - df_profit_analysis_recalc['총지출']
-    df_profit_analysis_recalc['총순수익률'] = (
-        df_profit_analysis_recalc['총순수익'] / df_profit_analysis_recalc['총매출'].replace(0, 1e-9)
-    ) * 100
-
-    # ─ 홀 순수익 계산 ─
-    if '홀매출_총액' in df_profit_analysis_recalc.columns:
-        df_profit_analysis_recalc['홀매출_분석용'] = df_profit_analysis_recalc['홀매출_총액']
-        홀매출_비중 = (
-            df_profit_analysis_recalc['홀매출_분석용'] / df_profit_analysis_recalc['총매출'].replace(0, 1e-9)
-        ).fillna(0)
-        홀매출_관련_공통비용 = (
-            df_profit_analysis_recalc[
-                [c for c in FIXED_COST_ITEMS + VARIABLE_COST_ITEMS if c in df_profit_analysis_recalc.columns]
-            ].sum(axis=1) * 홀매출_비중
-        )
-        df_profit_analysis_recalc['홀순수익'] = df_profit_analysis_recalc['홀매출_분석용'] - 홀매출_관련_공통비용
-        df_profit_analysis_recalc['홀순수익률'] = (
-            df_profit_analysis_recalc['홀순수익'] / df_profit_analysis_recalc['홀매출_분석용'].replace(0, 1e-9) * 100
-        ).fillna(0)
-
-    # ─ 배달 순수익 계산 ─
-    if '배달매출_총액' in df_profit_analysis_recalc.columns:
-        df_profit_analysis_recalc['배달매출_분석용'] = df_profit_analysis_recalc['배달매출_총액']
-        배달매출_비중 = (
-            df_profit_analysis_recalc['배달매출_분석용'] / df_profit_analysis_recalc['총매출'].replace(0, 1e-9)
-        ).fillna(0)
-        배달매출_관련_공통비용 = (
-            df_profit_analysis_recalc[
-                [c for c in FIXED_COST_ITEMS + VARIABLE_COST_ITEMS if c in df_profit_analysis_recalc.columns]
-            ].sum(axis=1) * 배달매출_비중
-        )
-        배달매출_전용비용 = df_profit_analysis_recalc.get('배달비', 0)
-        df_profit_analysis_recalc['배달순수익'] = (
-            df_profit_analysis_recalc['배달매출_분석용'] - (배달매출_관련_공통비용 + 배달매출_전용비용)
-        )
-        df_profit_analysis_recalc['배달순수익률'] = (
-            df_profit_analysis_recalc['배달순수익'] / df_profit_analysis_recalc['배달매출_분석용'].replace(0, 1e-9) * 100
-        ).fillna(0)
+if show_section('profit'):
+    st.markdown("<a id='profit-analysis'></a>", unsafe_allow_html=True)
+    st.markdown("---")
+    st.markdown("<br>", unsafe_allow_html=True)
+    display_styled_title_box("💰 순수익 분석 💰", background_color="#f5f5f5", font_size="32px", margin_bottom="20px", padding_y="15px")
 
-    # 정렬
-    df_profit_analysis_recalc = df_profit_analysis_recalc.sort_values(by='월')
-else:
-    df_profit_analysis_recalc = pd.DataFrame()
+    # 공장 포함 손익표 (지출 섹션과 같은 표, 매출이 있는 지점-월만)
+    df_profit_analysis_recalc = df_pnl_sales if not 매출.empty else pd.DataFrame()
+    profit_figs = profit_section_figures(view_key, df_profit_analysis_recalc, color_map_지점, chart_colors_palette)
 
 
-col_profit_rate1_1, col_profit_rate1_2, col_profit_rate1_3 = st.columns(3)
-with col_profit_rate1_1:
-    display_styled_title_box("총 순수익률 추이", font_size="22px", margin_bottom="20px")
-    if df_profit_analysis_recalc.empty or '총순수익률' not in df_profit_analysis_recalc or df_profit_analysis_recalc['총순수익률'].isnull().all():
-        st.warning("데이터가 없어 '총 순수익률 추이' 차트를 표시할 수 없습니다.")
-    else:
-        line_total_profit_rate = px.line(df_profit_analysis_recalc, x='월', y='총순수익률', color='지점명', markers=True, custom_data=['총순수익'], color_discrete_map=color_map_지점)
-        line_total_profit_rate.update_traces(texttemplate='%{y:.2f}%', textposition='top center', hovertemplate="<b>지점:</b> %{fullData.name}<br><b>월:</b> %{x}<br><b>순수익률:</b> %{y:.2f}%<br><b>순수익:</b> %{customdata[0]:,.0f}원<extra></extra>")
-        line_total_profit_rate.update_layout(height=550, legend=dict(title_text="", orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis=dict(ticksuffix="%", tickformat=",.2f"), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-        st.plotly_chart(line_total_profit_rate, use_container_width=True)
-
-# 공장 제외 후 홀 순수익률 차트
-with col_profit_rate1_2:
-    display_styled_title_box("홀 순수익률 추이", font_size="22px", margin_bottom="20px")
-    df_hall_only = df_profit_analysis_recalc[~df_profit_analysis_recalc['지점명'].str.contains('공장', na=False)]
-    if df_hall_only.empty or '홀순수익률' not in df_hall_only or df_hall_only['홀순수익률'].isnull().all():
-        st.warning("데이터가 없어 '홀 순수익률 추이' 차트를 표시할 수 없습니다.")
-    else:
-        line_hall_profit_rate = px.line(df_hall_only, x='월', y='홀순수익률', color='지점명', markers=True, custom_data=['홀순수익'], color_discrete_map=color_map_지점)
-        line_hall_profit_rate.update_traces(texttemplate='%{y:.2f}%', textposition='top center', hovertemplate="<b>지점:</b> %{fullData.name}<br><b>월:</b> %{x}<br><b>순수익률:</b> %{y:.2f}%<br><b>순수익:</b> %{customdata[0]:,.0f}원<extra></extra>")
-        line_hall_profit_rate.update_layout(height=550, legend=dict(title_text="", orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis=dict(ticksuffix="%"), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-        st.plotly_chart(line_hall_profit_rate, use_container_width=True)
-
-# 공장 제외 후 배달 순수익률 차트
-with col_profit_rate1_3:
-    display_styled_title_box("배달+포장 순수익률 추이", font_size="22px", margin_bottom="20px")
-    df_delivery_only = df_profit_analysis_recalc[~df_profit_analysis_recalc['지점명'].str.contains('공장', na=False)]
-    if df_delivery_only.empty or '배달순수익률' not in df_delivery_only or df_delivery_only['배달순수익률'].isnull().all():
-        st.warning("데이터가 없어 '배달 순수익률 추이' 차트를 표시할 수 없습니다.")
-    else:
-        line_delivery_profit_rate = px.line(df_delivery_only, x='월', y='배달순수익률', color='지점명', markers=True, custom_data=['배달순수익'], color_discrete_map=color_map_지점)
-        line_delivery_profit_rate.update_traces(texttemplate='%{y:.2f}%', textposition='top center', hovertemplate="<b>지점:</b> %{fullData.name}<br><b>월:</b> %{x}<br><b>순수익률:</b> %{y:.2f}%<br><b>순수익:</b> %{customdata[0]:,.0f}원<extra></extra>")
-        line_delivery_profit_rate.update_layout(height=550, legend=dict(title_text="", orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis=dict(ticksuffix="%"), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-        st.plotly_chart(line_delivery_profit_rate, use_container_width=True)
+    col_profit_rate1_1, col_profit_rate1_2, col_profit_rate1_3 = st.columns(3)
+    with col_profit_rate1_1:
+        display_styled_title_box("총 순수익률 추이", font_size="22px", margin_bottom="20px")
+        show_chart(profit_figs['line_total_profit_rate'], "데이터가 없어 '총 순수익률 추이' 차트를 표시할 수 없습니다.")
 
-st.markdown("---")
-col_profit_cost_1, col_profit_cost_2, col_profit_cost_3 = st.columns(3)
-with col_profit_cost_1:
-    display_styled_title_box("매출 손익분기점 분석", font_size="22px", margin_bottom="20px")
-    if df_profit_analysis_recalc.empty:
-        st.warning("데이터가 없어 '매출 손익분기점 분석' 차트를 표시할 수 없습니다.")
-    else:
-        df_profit_analysis_recalc['총변동비_계산'] = df_profit_analysis_recalc[[c for c in VARIABLE_COST_ITEMS + DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS if c in df_profit_analysis_recalc.columns]].sum(axis=1)
-        df_profit_analysis_recalc['총고정비_계산'] = df_profit_analysis_recalc[[c for c in FIXED_COST_ITEMS if c in df_profit_analysis_recalc.columns]].sum(axis=1)
-        df_profit_analysis_recalc['공헌이익률'] = (1 - (df_profit_analysis_recalc['총변동비_계산'] / df_profit_analysis_recalc['총매출'].replace(0,1e-9))).fillna(0)
-        df_profit_analysis_recalc['손익분기점_매출'] = (df_profit_analysis_recalc['총고정비_계산'] / df_profit_analysis_recalc['공헌이익률'].replace(0,1e-9)).replace([float('inf'), -float('inf')], 0).fillna(0)
-        df_profit_analysis_recalc['안전여유매출액'] = df_profit_analysis_recalc['총매출'] - df_profit_analysis_recalc['손익분기점_매출']
-        
-        df_bep_total = df_profit_analysis_recalc.groupby('월').agg(총매출=('총매출', 'sum'), 손익분기점_매출=('손익분기점_매출', 'sum'), 안전여유매출액=('안전여유매출액', 'sum')).reset_index()
-        
-        fig_bep = go.Figure()
-        fig_bep.add_trace(go.Bar(x=df_bep_total['월'], y=df_bep_total['총매출'], name='총매출', marker_color=chart_colors_palette[0], text=df_bep_total['총매출']))
-        fig_bep.add_trace(go.Bar(x=df_bep_total['월'], y=df_bep_total['손익분기점_매출'], name='손익분기점 매출', marker_color=chart_colors_palette[1], text=df_bep_total['손익분기점_매출']))
-        fig_bep.add_trace(go.Scatter(x=df_bep_total['월'], y=df_bep_total['안전여유매출액'], mode='lines+markers+text', name='안전여유매출액', marker_color=chart_colors_palette[2], line=dict(width=2), text=df_bep_total['안전여유매출액'], textposition="top center"))
-        fig_bep.update_traces(selector=dict(type='bar'), texttemplate='%{text:,.0f}', textangle=0, hovertemplate="<b>월:</b> %{x}<br><b>%{data.name}:</b> %{y:,.0f}원<extra></extra>")
-        fig_bep.update_traces(selector=dict(type='scatter'), texttemplate='%{text:,.0f}', hovertemplate="<b>월:</b> %{x}<br><b>%{data.name}:</b> %{y:,.0f}원<extra></extra>")
-        fig_bep.update_layout(barmode='group', height=550, legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5), yaxis=dict(tickformat=","), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-        st.plotly_chart(fig_bep, use_container_width=True)
+    # 공장 제외 후 홀 순수익률 차트
+    with col_profit_rate1_2:
+        display_styled_title_box("홀 순수익률 추이", font_size="22px", margin_bottom="20px")
+        show_chart(profit_figs['line_hall_profit_rate'], "데이터가 없어 '홀 순수익률 추이' 차트를 표시할 수 없습니다.")
 
-with col_profit_cost_2:
-    display_styled_title_box("식자재 원가율 추이", font_size="22px", margin_bottom="20px")
-    if df_profit_analysis_recalc.empty or '식자재' not in df_profit_analysis_recalc.columns:
-        st.warning("데이터가 없어 '식자재 원가율 추이' 차트를 표시할 수 없습니다.")
-    else:
-        df_profit_analysis_recalc['식자재_원가율'] = (df_profit_analysis_recalc.get('식자재', 0) / df_profit_analysis_recalc['총매출'].replace(0,1e-9) * 100).fillna(0)
-        line_food_cost = px.line(df_profit_analysis_recalc, x='월', y='식자재_원가율', color='지점명', markers=True, color_discrete_map=color_map_지점)
-        line_food_cost.update_traces(texttemplate='%{y:.2f}%', textposition='top center', hovertemplate="<b>지점:</b> %{fullData.name}<br><b>월:</b> %{x}<br><b>원가율:</b> %{y:.2f}%<extra></extra>")
-        line_food_cost.update_layout(height=550, legend=dict(title_text="", orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis=dict(ticksuffix="%"), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-        st.plotly_chart(line_food_cost, use_container_width=True)
+    # 공장 제외 후 배달 순수익률 차트
+    with col_profit_rate1_3:
+        display_styled_title_box("배달+포장 순수익률 추이", font_size="22px", margin_bottom="20px")
+        show_chart(profit_figs['line_delivery_profit_rate'], "데이터가 없어 '배달 순수익률 추이' 차트를 표시할 수 없습니다.")
 
-with col_profit_cost_3:
-    display_styled_title_box("인건비 원가율 추이", font_size="22px", margin_bottom="20px")
-    if df_profit_analysis_recalc.empty or '인건비' not in df_profit_analysis_recalc.columns:
-        st.warning("데이터가 없어 '인건비 원가율 추이' 차트를 표시할 수 없습니다.")
-    else:
-        df_profit_analysis_recalc['인건비_원가율'] = (df_profit_analysis_recalc.get('인건비', 0) / df_profit_analysis_recalc['총매출'].replace(0,1e-9) * 100).fillna(0)
-        line_labor_cost = px.line(df_profit_analysis_recalc, x='월', y='인건비_원가율', color='지점명', markers=True, color_discrete_map=color_map_지점)
-        line_labor_cost.update_traces(texttemplate='%{y:.2f}%', textposition='top center', hovertemplate="<b>지점:</b> %{fullData.name}<br><b>월:</b> %{x}<br><b>원가율:</b> %{y:.2f}%<extra></extra>")
-        line_labor_cost.update_layout(height=550, legend=dict(title_text="", orientation="h", yanchor="bottom", y=1.15, xanchor="center", x=0.5), yaxis=dict(ticksuffix="%"), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-        st.plotly_chart(line_labor_cost, use_container_width=True)
+    st.markdown("---")
+    col_profit_cost_1, col_profit_cost_2, col_profit_cost_3 = st.columns(3)
+    with col_profit_cost_1:
+        display_styled_title_box("매출 손익분기점 분석", font_size="22px", margin_bottom="20px")
+        show_chart(profit_figs['fig_bep'], "데이터가 없어 '매출 손익분기점 분석' 차트를 표시할 수 없습니다.")
+
+    with col_profit_cost_2:
+        display_styled_title_box("식자재 원가율 추이", font_size="22px", margin_bottom="20px")
+        show_chart(profit_figs['line_food_cost'], "데이터가 없어 '식자재 원가율 추이' 차트를 표시할 수 없습니다.")
+
+    with col_profit_cost_3:
+        display_styled_title_box("인건비 원가율 추이", font_size="22px", margin_bottom="20px")
+        show_chart(profit_figs['line_labor_cost'], "데이터가 없어 '인건비 원가율 추이' 차트를 표시할 수 없습니다.")
 
 # ============================================
 # 📊 시뮬레이션 분석 섹션 (변동액 0 안정화 + 라인그래프 복귀)
-# - df_filtered 기반
+# - 필터된 월별 큐브(월별_뷰) 기반
 # - 대전공장 제외 유지
 # - '활동월(매출 존재 (지점,연월))' 평균 방식 유지
 # ============================================
@@ -899,19 +856,19 @@ import math
 st.session_state.setdefault("sim_run", False)
 st.session_state.setdefault("sim_result", {})  # 계산 결과 저장용 dict
 
+# ---------- 선택한 화면이 아니면 계산/렌더링 생략 (시뮬레이션이 마지막 섹션) ----------
+if not show_section('simulation'):
+    st.stop()
+
 # ---------- 준비/가드 ----------
-_df = globals().get("df_filtered", None)
-if _df is None or _df.empty:
+if 월별_뷰.empty:
     st.warning("시뮬레이션을 위한 데이터가 없습니다. 사이드바에서 기간/지점을 조정해 주세요.")
     st.stop()
 
-# 대전공장 제외
-if '지점명' in _df.columns:
-    df_sim = _df[_df['지점명'] != '대전공장'].copy()
-else:
-    df_sim = _df.copy()
+# 대전공장 제외 (필터된 큐브에서 파생)
+sim_mask = 월별_뷰['지점명'] != '대전공장'
 
-if df_sim.empty:
+if not sim_mask.any():
     st.warning("대전공장은 시뮬레이션 시행이 어렵습니다.")
     st.stop()
 
@@ -938,7 +895,6 @@ def _default_title_box(text, background_color="#f5f5f5", font_size="22px", margi
     )
 display_styled_title_box = globals().get("display_styled_title_box", _default_title_box)
 
-_to_num = lambda x: pd.to_numeric(x, errors="coerce")
 
 def _is_close(a, b, tol=1e-9):
     return abs(float(a) - float(b)) <= tol
@@ -965,427 +921,503 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# ---------- 소계/합계류 제거 ----------
-_summary_pat = r"소계|총계|합계|전체|총액|이월금액|일계"
-for col in ['항목2', '항목1']:
-    if col in df_sim.columns:
-        df_sim = df_sim[~df_sim[col].astype(str).str.contains(_summary_pat, na=False, regex=True)]
-
-# ---------- 매출/지출 분리 ----------
-매출_df = df_sim[df_sim['분류'] == '매출'].copy()
-지출_df = df_sim[df_sim['분류'] == '지출'].copy()
-
-# ---------- '활동월(매출 존재)' 기반 분모 ----------
-if {'지점명', '연월'}.issubset(매출_df.columns) and not 매출_df.empty:
-    active_pairs = 매출_df[['지점명', '연월']].dropna().drop_duplicates()
-    n_active_store_months = int(len(active_pairs)) if len(active_pairs) > 0 else 1
-else:
-    months_selected = sorted(df_sim['연월'].unique()) if '연월' in df_sim.columns else []
-    num_months = len(months_selected) if len(months_selected) > 0 else 1
-    num_stores = df_sim['지점명'].nunique() if '지점명' in df_sim.columns else 1
-    n_active_store_months = max(1, num_months * num_stores)
-
-# ---------- 기준(현재) 값 ----------
-base_total_revenue = _to_num(매출_df['금액']).sum() / n_active_store_months
-
-항목1_series = 매출_df['항목1'].astype(str) if '항목1' in 매출_df.columns else pd.Series(dtype=str)
-base_hall_revenue = _to_num(매출_df.loc[항목1_series.eq('홀매출'), '금액']).sum() / n_active_store_months
-base_delivery_takeout_revenue = _to_num(
-    매출_df.loc[항목1_series.isin(['배달매출', '포장매출']), '금액']
-).sum() / n_active_store_months
-
-base_hall_ratio = (base_hall_revenue / base_total_revenue * 100) if base_total_revenue > 0 else 0.0
-
-present_cost_cats = sorted(지출_df['항목1'].dropna().astype(str).unique()) if '항목1' in 지출_df.columns else []
-merged_cost_cats = list(dict.fromkeys(ALL_POSSIBLE_EXPENSE_CATEGORIES + present_cost_cats))
-
-base_costs = {}
-for cat in merged_cost_cats:
-    cat_sum = _to_num(지출_df.loc[지출_df['항목1'].astype(str).eq(cat), '금액']).sum()
-    base_costs[cat] = float(cat_sum / n_active_store_months)
-
-base_total_cost = sum(base_costs.values())
-base_profit = base_total_revenue - base_total_cost
-base_profit_margin = (base_profit / base_total_revenue * 100) if base_total_revenue > 0 else 0.0
-
-# ---------- 현재 상태 요약 ----------
-st.subheader("📋 현재 상태 요약")
-st.markdown(f"""
-<div class="kpi-container">
-    <div><div class="kpi-label">평균 총매출</div><div class="kpi-value">{base_total_revenue:,.0f} 원</div></div>
-    <div><div class="kpi-label">평균 총비용</div><div class="kpi-value">{base_total_cost:,.0f} 원</div></div>
-    <div><div class="kpi-label">평균 순수익</div><div class="kpi-value">{base_profit:,.0f} 원</div></div>
-    <div><div class="kpi-label">평균 순수익률</div><div class="kpi-value">{base_profit_margin:.1f}%</div></div>
-</div>
-""", unsafe_allow_html=True)
+# ---------- 시뮬레이션 본문 (fragment) ----------
+# 슬라이더/입력값을 바꾸면 이 함수만 다시 실행 (데이터 로딩/필터/매출·지출·순수익 차트는 다시 그리지 않음)
+# 인자(월별_뷰, view_key)는 마지막 전체 실행 때 값이 그대로 쓰임
+@st.fragment
+def simulation_section(월별_뷰, view_key):
+    sim_mask = 월별_뷰['지점명'] != '대전공장'
 
-# ---------- 시뮬레이션 조건 ----------
-st.markdown("---")
-st.subheader("⚙️ 시뮬레이션 조건 설정")
-
-sim_rev_col, sim_hall_col = st.columns(2)
-with sim_rev_col:
-    sim_revenue = custom_slider(
-        label="예상 월평균 매출 (원)",
-        min_value=0.0, max_value=150_000_000.0,
-        default_value=float(base_total_revenue), step=100_000.0,
-        help_text=f"현재 지점당 '활동월' 월평균 매출: {base_total_revenue:,.0f} 원",
-        key="sim_revenue", format_str="%.0f"
-    )
-with sim_hall_col:
-    sim_hall_ratio_pct = custom_slider(
-        label="예상 홀매출 비율 (%)",
-        min_value=0.0, max_value=100.0,
-        default_value=float(base_hall_ratio), step=0.1,
-        help_text=f"현재 홀매출 비율: {base_hall_ratio:.1f}%",
-        key="sim_hall_ratio", format_str="%.1f"
-    )
+    # ---------- 소계/합계류 제거 (항목1/항목2 패턴은 큐브 생성 시 요약행 플래그로 계산됨) ----------
+    sim_mask &= ~월별_뷰['요약행']
 
-sim_delivery_ratio_pct = 100.0 - sim_hall_ratio_pct
+    # ---------- 시뮬레이션용 손익표 (같은 손익 엔진, 대전공장/소계류 제외) ----------
+    sim_pnl, sim_cost_items = get_pnl_table(view_key + ('시뮬레이션',), 월별_뷰[sim_mask & (월별_뷰['분류'] == '매출')], 월별_뷰[sim_mask & (월별_뷰['분류'] == '지출')])
 
-# ---------- 성장계수 (기본값=1.0로 고정) ----------
-if base_total_revenue > 0 and not _is_close(sim_revenue, base_total_revenue):
-    live_total_revenue_growth = sim_revenue / base_total_revenue
-else:
-    live_total_revenue_growth = 1.0
+    # ---------- '활동월(매출 존재)' 기반 분모 ----------
+    if sim_pnl['매출월'].any():
+        n_active_store_months = int(sim_pnl['매출월'].sum())
+    else:
+        months_selected = sorted(월별_뷰.loc[sim_mask, '연월'].unique())
+        num_months = len(months_selected) if len(months_selected) > 0 else 1
+        num_stores = 월별_뷰.loc[sim_mask, '지점명'].nunique() or 1
+        n_active_store_months = max(1, num_months * num_stores)
 
-_est_delivery_takeout = sim_revenue * (sim_delivery_ratio_pct / 100.0)
-if base_delivery_takeout_revenue > 0 and not _is_close(_est_delivery_takeout, base_delivery_takeout_revenue):
-    live_delivery_takeout_revenue_growth = _est_delivery_takeout / base_delivery_takeout_revenue
-else:
-    live_delivery_takeout_revenue_growth = 1.0
+    # ---------- 기준(현재) 값 ----------
+    base_total_revenue = sim_pnl['총매출'].sum() / n_active_store_months
+    base_hall_revenue = sim_pnl['홀매출_총액'].sum() / n_active_store_months
+    base_delivery_takeout_revenue = sim_pnl['배달매출_총액'].sum() / n_active_store_months
 
-# ---------- 비용 상세 조정 ----------
-st.markdown("---")
-with st.expander("항목별 비용 상세 조정 (선택)"):
-    cost_adjustments = {}
-    preferred = ['식자재', '소모품', '배달비', '인건비', '광고비', '고정비']
-    extra = [c for c in merged_cost_cats if c not in preferred]
-    ordered_cost_items = [c for c in preferred if c in merged_cost_cats] + extra
-
-    for i in range(0, len(ordered_cost_items), 2):
-        col1, col2 = st.columns(2)
-
-        def _one(col, item):
-            if item not in base_costs: 
-                return
-            with col:
-                base_cost_item = float(base_costs.get(item, 0.0))
-                cost_adjustments[item] = custom_slider(
-                    label=f"{item} 조정률 (%)",
-                    min_value=-50.0, max_value=50.0,
-                    default_value=0.0, step=0.1,
-                    help_text=f"현재 월평균 {item} 비용(활동월 기준): {base_cost_item:,.0f} 원",
-                    key=f"slider_{item}"
-                )
-                if item in VARIABLE_COST_ITEMS:
-                    growth_factor = live_total_revenue_growth
-                elif item in DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS:
-                    growth_factor = live_delivery_takeout_revenue_growth
-                else:
-                    growth_factor = 1.0
-
-                if _is_close(cost_adjustments[item], 0.0) and _is_close(growth_factor, 1.0):
-                    adjustment_amount = 0.0
-                else:
-                    final_sim_cost = base_cost_item * growth_factor * (1 + cost_adjustments[item] / 100.0)
-                    adjustment_amount = final_sim_cost - base_cost_item
-
-                sign = "+" if adjustment_amount >= 0 else ""
-                color = "#3D9970" if adjustment_amount >= 0 else "#FF4136"
-                st.markdown(
-                    f"<p style='color:{color}; text-align:right; font-size: 0.9rem;'>"
-                    f"변동액: {sign}{adjustment_amount:,.0f} 원</p>",
-                    unsafe_allow_html=True
-                )
+    base_hall_ratio = (base_hall_revenue / base_total_revenue * 100) if base_total_revenue > 0 else 0.0
 
-        _one(col1, ordered_cost_items[i])
-        if i + 1 < len(ordered_cost_items):
-            _one(col2, ordered_cost_items[i+1])
-
-# ---------- 로열티 ----------
-royalty_rate = custom_slider(
-    label="👑 로열티 설정 (매출 대비 %)",
-    min_value=0.0, max_value=10.0,
-    default_value=0.0, step=0.1,
-    help_text="전체 예상 매출액 대비 로열티 비율을 설정합니다.",
-    key="royalty_rate"
-)
-st.success(f"예상 로열티 금액 (월): **{sim_revenue * (royalty_rate / 100.0):,.0f} 원**")
-st.markdown("<br>", unsafe_allow_html=True)
+    merged_cost_cats = list(dict.fromkeys(ALL_POSSIBLE_EXPENSE_CATEGORIES + sorted(sim_cost_items)))
 
-# ---------- 실행 버튼 ----------
-btn = st.button("🚀 시뮬레이션 실행", use_container_width=True)
-if btn:
-    sim_costs = {}
+    base_costs = {}
+    for cat in merged_cost_cats:
+        base_costs[cat] = float(sim_pnl[cat].sum() / n_active_store_months)
 
-    # sim_revenue 보정: 외부에서 계산 안돼 있으면 기본 계산식 사용
-    try:
-        sim_revenue  # 이미 어딘가에서 계산되어 있으면 사용
-    except NameError:
-        sim_revenue = float(base_total_revenue * float(live_total_revenue_growth))
-
-    # 1) 매출 비례 항목
-    for item in VARIABLE_COST_ITEMS:
-        if item in base_costs:
-            gf = float(live_total_revenue_growth)
-            adj = float(cost_adjustments.get(item, 0.0))
-            factor = gf * (1 + adj / 100.0) if not (_is_close(gf, 1.0) and _is_close(adj, 0.0)) else 1.0
-            sim_costs[item] = float(base_costs[item]) * factor
-
-    # 2) 배달/포장 비례 항목
-    for item in DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS:
-        if item in base_costs:
-            gf = float(live_delivery_takeout_revenue_growth)
-            adj = float(cost_adjustments.get(item, 0.0))
-            factor = gf * (1 + adj / 100.0) if not (_is_close(gf, 1.0) and _is_close(adj, 0.0)) else 1.0
-            sim_costs[item] = float(base_costs[item]) * factor
-
-    # 3) 고정 항목
-    for item in FIXED_COST_ITEMS:
-        if item in base_costs:
-            adj = float(cost_adjustments.get(item, 0.0))
-            factor = (1 + adj / 100.0) if not _is_close(adj, 0.0) else 1.0
-            sim_costs[item] = float(base_costs[item]) * factor
-
-    # 4) 기타(정의 밖) → 고정 취급
-    defined = set(VARIABLE_COST_ITEMS) | set(DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS) | set(FIXED_COST_ITEMS)
-    for item in base_costs:
-        if item not in defined:
-            adj = float(cost_adjustments.get(item, 0.0))
-            factor = (1 + adj / 100.0) if not _is_close(adj, 0.0) else 1.0
-            sim_costs[item] = float(base_costs[item]) * factor
-
-    # 5) 로열티
-    royalty_rate = float(royalty_rate)  # 혹시 몰라서 형변환
-    sim_costs['로열티'] = float(sim_revenue) * (royalty_rate / 100.0)
-
-    sim_total_cost = float(sum(sim_costs.values()))
-    sim_profit = float(sim_revenue - sim_total_cost)
-    sim_profit_margin = float((sim_profit / sim_revenue * 100.0) if sim_revenue > 0 else 0.0)
-
-    # ✅ 세션에 결과 저장 + 플래그 on
-    st.session_state["sim_result"] = {
-        "sim_revenue": float(sim_revenue),
-        "sim_costs": sim_costs,
-        "sim_total_cost": sim_total_cost,
-        "sim_profit": sim_profit,
-        "sim_profit_margin": sim_profit_margin,
-        "base_total_revenue": float(base_total_revenue),
-        "base_total_cost": float(base_total_cost),
-        "base_profit": float(base_profit),
-        "base_profit_margin": float(base_profit_margin),
-        "base_costs": base_costs
-    }
-    st.session_state["sim_run"] = True
+    base_total_cost = sum(base_costs.values())
+    base_profit = base_total_revenue - base_total_cost
+    base_profit_margin = (base_profit / base_total_revenue * 100) if base_total_revenue > 0 else 0.0
 
-# --- 결과 시각화 ---
-st.markdown("---")
-st.subheader("📈 시뮬레이션 결과 보고서")
-
-theme_color_map = {'현재': '#B0A696', '시뮬레이션': '#964F4C'}
-cost_item_color_map = {
-    '식자재': '#964F4C', '인건비': '#7A6C60', '배달비': '#B0A696',
-    '고정비': '#5E534A', '소모품': '#DED3BF', '광고비': '#C0B4A0',
-    '로열티': '#687E8E'
-}
-
-# ✅ 세션 결과 불러오기
-sim_run = st.session_state.get("sim_run", False)
-res = st.session_state.get("sim_result", {})
-
-if sim_run and res:
-    # 언패킹
-    sim_revenue = res["sim_revenue"]
-    sim_costs = res["sim_costs"]
-    sim_total_cost = res["sim_total_cost"]
-    sim_profit = res["sim_profit"]
-    sim_profit_margin = res["sim_profit_margin"]
-    base_total_revenue = res["base_total_revenue"]
-    base_total_cost = res["base_total_cost"]
-    base_profit = res["base_profit"]
-    base_profit_margin = res["base_profit_margin"]
-    base_costs = res["base_costs"]
-
-    row1_col1, row1_col2 = st.columns([2, 1])
-
-    with row1_col1:
-        # ⛳️ '종합 비교' 상단 타이틀 제거하고 두 섹션으로 분리
-        r1_sub_col1, r1_sub_col2 = st.columns(2)
-
-        # === 총매출 비교 ===
-        with r1_sub_col1:
-            display_styled_title_box("총매출 비교", font_size="22px", margin_bottom="12px")
-            df_revenue = pd.DataFrame({'구분': ['현재', '시뮬레이션'], '금액': [base_total_revenue, sim_revenue]})
-            fig_revenue = px.bar(
-                df_revenue, x='구분', y='금액', color='구분', text_auto=True,
-                title=None,  # 내부 차트 제목 제거 (위 박스 타이틀만 사용)
-                color_discrete_map=theme_color_map
-            )
-            fig_revenue.update_traces(
-                texttemplate='%{y:,.0f}',
-                hovertemplate="<b>%{x}</b><br>금액: %{y:,.0f}원<extra></extra>"
-            )
-            fig_revenue.update_layout(
-                height=380, showlegend=False, yaxis_title="금액(원)",
-                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                margin=dict(l=10, r=10, t=10, b=24)
-            )
-            # x축 라벨(현재/시뮬레이션)은 유지, 축 제목만 제거
-            fig_revenue.update_xaxes(title=None, showgrid=False)
-            st.plotly_chart(fig_revenue, use_container_width=True, key="sim_revenue_bar")
-
-        # === 총지출 비교 ===
-        with r1_sub_col2:
-            display_styled_title_box("총지출 비교", font_size="22px", margin_bottom="12px")
-            df_cost = pd.DataFrame({'구분': ['현재', '시뮬레이션'], '금액': [base_total_cost, sim_total_cost]})
-            fig_cost = px.bar(
-                df_cost, x='구분', y='금액', color='구분', text_auto=True,
-                title=None,  # 내부 차트 제목 제거
-                color_discrete_map=theme_color_map
-            )
-            fig_cost.update_traces(
-                texttemplate='%{y:,.0f}',
-                hovertemplate="<b>%{x}</b><br>금액: %{y:,.0f}원<extra></extra>"
-            )
-            fig_cost.update_layout(
-                height=380, showlegend=False, yaxis_title="금액(원)",
-                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                margin=dict(l=10, r=10, t=10, b=24)
-            )
-            fig_cost.update_xaxes(title=None, showgrid=False)
-            st.plotly_chart(fig_cost, use_container_width=True, key="sim_cost_bar")
-
-    # === 순수익률 비교 (두 점 연결, 선 색 테마 적용, 간격 적당히) ===
-    with row1_col2:
-        display_styled_title_box("순수익률 비교", font_size="22px", margin_bottom="12px")
-
-        # 간격 조절
-        x_vals    = [0.05, 0.30]
-        tickvals = x_vals
-        ticktext = ['현재', '시뮬레이션']
-
-        y_rates  = [float(base_profit_margin), float(sim_profit_margin)]
-        y_profit = [float(base_profit), float(sim_profit)]
-        texts    = [f"{v:.1f}%" for v in y_rates]
-
-        point_colors = [theme_color_map['현재'], theme_color_map['시뮬레이션']]
-        line_color   = theme_color_map['시뮬레이션']
-        customdata   = [[lbl, prf] for lbl, prf in zip(ticktext, y_profit)]
-
-        fig_profit_rate = go.Figure()
-        fig_profit_rate.add_trace(go.Scatter(
-            x=x_vals,
-            y=y_rates,
-            mode='lines+markers+text',
-            text=texts,  # 점 위에는 퍼센트 표시
-            textposition='top center',
-            marker=dict(size=8, line=dict(width=1, color='#333'), color=point_colors),
-            line=dict(width=3, color=line_color),
-            hovertemplate="<b>%{customdata[0]}</b><br>수익률: %{y:.1f}%<br>수익금액: %{customdata[1]:,.0f}원<extra></extra>",
-            customdata=customdata,
-            showlegend=False
-        ))
+    # ---------- 현재 상태 요약 ----------
+    st.subheader("📋 현재 상태 요약")
+    st.markdown(f"""
+    <div class="kpi-container">
+        <div><div class="kpi-label">평균 총매출</div><div class="kpi-value">{base_total_revenue:,.0f} 원</div></div>
+        <div><div class="kpi-label">평균 총비용</div><div class="kpi-value">{base_total_cost:,.0f} 원</div></div>
+        <div><div class="kpi-label">평균 순수익</div><div class="kpi-value">{base_profit:,.0f} 원</div></div>
+        <div><div class="kpi-label">평균 순수익률</div><div class="kpi-value">{base_profit_margin:.1f}%</div></div>
+    </div>
+    """, unsafe_allow_html=True)
 
-        fig_profit_rate.update_layout(
-            height=380,
-            yaxis_title="순수익률 (%)",
-            xaxis_title=None,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            showlegend=False,
-            margin=dict(l=10, r=10, t=20, b=28)
+    # ---------- 시뮬레이션 조건 ----------
+    st.markdown("---")
+    st.subheader("⚙️ 시뮬레이션 조건 설정")
+
+    sim_rev_col, sim_hall_col = st.columns(2)
+    with sim_rev_col:
+        sim_revenue = custom_slider(
+            label="예상 월평균 매출 (원)",
+            min_value=0.0, max_value=150_000_000.0,
+            default_value=float(base_total_revenue), step=100_000.0,
+            help_text=f"현재 지점당 '활동월' 월평균 매출: {base_total_revenue:,.0f} 원",
+            key="sim_revenue", format_str="%.0f"
         )
-        fig_profit_rate.update_xaxes(
-            type='linear',
-            range=[-0.05, 0.40],  # 보기 좋은 범위
-            tickmode='array',
-            tickvals=tickvals,
-            ticktext=ticktext,    # x축에 '현재','시뮬레이션' 유지
-            showgrid=False,
-            zeroline=False
+    with sim_hall_col:
+        sim_hall_ratio_pct = custom_slider(
+            label="예상 홀매출 비율 (%)",
+            min_value=0.0, max_value=100.0,
+            default_value=float(base_hall_ratio), step=0.1,
+            help_text=f"현재 홀매출 비율: {base_hall_ratio:.1f}%",
+            key="sim_hall_ratio", format_str="%.1f"
         )
-        st.plotly_chart(fig_profit_rate, use_container_width=True, key="sim_profit_line")
 
+    sim_delivery_ratio_pct = 100.0 - sim_hall_ratio_pct
+
+    # ---------- 성장계수 (기본값=1.0로 고정) ----------
+    if base_total_revenue > 0 and not _is_close(sim_revenue, base_total_revenue):
+        live_total_revenue_growth = sim_revenue / base_total_revenue
+    else:
+        live_total_revenue_growth = 1.0
+
+    _est_delivery_takeout = sim_revenue * (sim_delivery_ratio_pct / 100.0)
+    if base_delivery_takeout_revenue > 0 and not _is_close(_est_delivery_takeout, base_delivery_takeout_revenue):
+        live_delivery_takeout_revenue_growth = _est_delivery_takeout / base_delivery_takeout_revenue
+    else:
+        live_delivery_takeout_revenue_growth = 1.0
+
+    # ---------- 비용 상세 조정 ----------
     st.markdown("---")
-    row2_col1, row2_col2 = st.columns(2)
-
-    with row2_col1:
-        display_styled_title_box("현재 비용 구조", font_size="22px", margin_bottom="12px")
-        base_costs_for_pie = {k: float(v) for k, v in base_costs.items() if float(v) > 0}
-        if base_costs_for_pie:
-            r2_c1_sub1, r2_c1_sub2 = st.columns(2)
-            with r2_c1_sub1:
-                pie_data = pd.DataFrame(list(base_costs_for_pie.items()), columns=['항목', '금액'])
-                fig_pie_base = px.pie(pie_data, names='항목', values='금액')
-                pie_colors = [cost_item_color_map.get(label, '#CCCCCC') for label in pie_data['항목']]
-                fig_pie_base.update_traces(
-                    marker=dict(colors=pie_colors), textinfo='percent+label', textfont_size=14,
-                    hovertemplate="<b>항목:</b> %{label}<br><b>금액:</b> %{value:,.0f}원<extra></extra>"
-                )
-                fig_pie_base.update_layout(
-                    height=400, showlegend=False, margin=dict(l=20, r=20, t=16, b=16),
-                    paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
-                )
-                st.plotly_chart(fig_pie_base, use_container_width=True, key="base_cost_pie")
+    with st.expander("항목별 비용 상세 조정 (선택)"):
+        cost_adjustments = {}
+        preferred = ['식자재', '소모품', '배달비', '인건비', '광고비', '고정비']
+        extra = [c for c in merged_cost_cats if c not in preferred]
+        ordered_cost_items = [c for c in preferred if c in merged_cost_cats] + extra
+
+        for i in range(0, len(ordered_cost_items), 2):
+            col1, col2 = st.columns(2)
+
+            def _one(col, item):
+                if item not in base_costs: 
+                    return
+                with col:
+                    base_cost_item = float(base_costs.get(item, 0.0))
+                    cost_adjustments[item] = custom_slider(
+                        label=f"{item} 조정률 (%)",
+                        min_value=-50.0, max_value=50.0,
+                        default_value=0.0, step=0.1,
+                        help_text=f"현재 월평균 {item} 비용(활동월 기준): {base_cost_item:,.0f} 원",
+                        key=f"slider_{item}"
+                    )
+                    if item in VARIABLE_COST_ITEMS:
+                        growth_factor = live_total_revenue_growth
+                    elif item in DELIVERY_SPECIFIC_VARIABLE_COST_ITEMS:
+                        growth_factor = live_delivery_takeout_revenue_growth
+                    else:
+                        growth_factor = 1.0
+
+                    if _is_close(cost_adjustments[item], 0.0) and _is_close(growth_factor, 1.0):
+                        adjustment_amount = 0.0
+                    else:
+                        final_sim_cost = base_cost_item * growth_factor * (1 + cost_adjustments[item] / 100.0)
+                        adjustment_amount = final_sim_cost - base_cost_item
+
+                    sign = "+" if adjustment_amount >= 0 else ""
+                    color = "#3D9970" if adjustment_amount >= 0 else "#FF4136"
+                    st.markdown(
+                        f"<p style='color:{color}; text-align:right; font-size: 0.9rem;'>"
+                        f"변동액: {sign}{adjustment_amount:,.0f} 원</p>",
+                        unsafe_allow_html=True
+                    )
+
+            _one(col1, ordered_cost_items[i])
+            if i + 1 < len(ordered_cost_items):
+                _one(col2, ordered_cost_items[i+1])
+
+    # ---------- 로열티 ----------
+    royalty_rate = custom_slider(
+        label="👑 로열티 설정 (매출 대비 %)",
+        min_value=0.0, max_value=10.0,
+        default_value=0.0, step=0.1,
+        help_text="전체 예상 매출액 대비 로열티 비율을 설정합니다.",
+        key="royalty_rate"
+    )
+    st.success(f"예상 로열티 금액 (월): **{sim_revenue * (royalty_rate / 100.0):,.0f} 원**")
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # ---------- 실행 버튼 ----------
+    # 한 번 실행한 뒤에는 조건을 바꿀 때마다(fragment 재실행) 결과를 바로 다시 계산
+    btn = st.button("🚀 시뮬레이션 실행", use_container_width=True)
+    if btn or st.session_state["sim_run"]:
+        # 시나리오 엔진 (민감도 분석과 같은 계산): 매출 비례 → 배달/포장 비례 → 고정 → 기타(고정 취급) → 로열티
+        sim_base = {'base_total_revenue': base_total_revenue, 'base_delivery_takeout_revenue': base_delivery_takeout_revenue, 'base_costs': base_costs}
+        sim_scenario = {'revenue': sim_revenue, 'hall_ratio_pct': sim_hall_ratio_pct, 'royalty_rate': royalty_rate, 'adjustments': cost_adjustments}
+        scenario_result = evaluate_scenarios(**sim_base, **sim_scenario)
+
+        sim_costs = {item: float(cost) for item, cost in scenario_result['costs'].items()}
+        sim_total_cost = float(scenario_result['total_cost'])
+        sim_profit = float(scenario_result['profit'])
+        sim_profit_margin = float(scenario_result['profit_margin'])
+
+        # ✅ 세션에 결과 저장 + 플래그 on
+        st.session_state["sim_result"] = {
+            "sim_revenue": float(sim_revenue),
+            "sim_costs": sim_costs,
+            "sim_total_cost": sim_total_cost,
+            "sim_profit": sim_profit,
+            "sim_profit_margin": sim_profit_margin,
+            "base_total_revenue": float(base_total_revenue),
+            "base_total_cost": float(base_total_cost),
+            "base_profit": float(base_profit),
+            "base_profit_margin": float(base_profit_margin),
+            "base_costs": base_costs
+        }
+        st.session_state["sim_run"] = True
+
+    # --- 결과 시각화 ---
+    st.markdown("---")
+    st.subheader("📈 시뮬레이션 결과 보고서")
+
+    theme_color_map = {'현재': '#B0A696', '시뮬레이션': '#964F4C'}
+    cost_item_color_map = {
+        '식자재': '#964F4C', '인건비': '#7A6C60', '배달비': '#B0A696',
+        '고정비': '#5E534A', '소모품': '#DED3BF', '광고비': '#C0B4A0',
+        '로열티': '#687E8E'
+    }
 
-            with r2_c1_sub2:
-                df_base_costs = pd.DataFrame(list(base_costs_for_pie.items()), columns=['항목', '금액']).sort_values('금액', ascending=False)
-                fig_bar_base = px.bar(
-                    df_base_costs, x='항목', y='금액', text_auto=True,
-                    color='항목', color_discrete_map=cost_item_color_map
+    # ✅ 세션 결과 불러오기
+    sim_run = st.session_state.get("sim_run", False)
+    res = st.session_state.get("sim_result", {})
+
+    if sim_run and res:
+        # 언패킹
+        sim_revenue = res["sim_revenue"]
+        sim_costs = res["sim_costs"]
+        sim_total_cost = res["sim_total_cost"]
+        sim_profit = res["sim_profit"]
+        sim_profit_margin = res["sim_profit_margin"]
+        base_total_revenue = res["base_total_revenue"]
+        base_total_cost = res["base_total_cost"]
+        base_profit = res["base_profit"]
+        base_profit_margin = res["base_profit_margin"]
+        base_costs = res["base_costs"]
+
+        row1_col1, row1_col2 = st.columns([2, 1])
+
+        with row1_col1:
+            # ⛳️ '종합 비교' 상단 타이틀 제거하고 두 섹션으로 분리
+            r1_sub_col1, r1_sub_col2 = st.columns(2)
+
+            # === 총매출 비교 ===
+            with r1_sub_col1:
+                display_styled_title_box("총매출 비교", font_size="22px", margin_bottom="12px")
+                df_revenue = pd.DataFrame({'구분': ['현재', '시뮬레이션'], '금액': [base_total_revenue, sim_revenue]})
+                fig_revenue = px.bar(
+                    df_revenue, x='구분', y='금액', color='구분', text_auto=True,
+                    title=None,  # 내부 차트 제목 제거 (위 박스 타이틀만 사용)
+                    color_discrete_map=theme_color_map
                 )
-                fig_bar_base.update_traces(
+                fig_revenue.update_traces(
                     texttemplate='%{y:,.0f}',
-                    hovertemplate="<b>항목:</b> %{x}<br><b>금액:</b> %{y:,.0f}원<extra></extra>",
-                    textangle=0
+                    hovertemplate="<b>%{x}</b><br>금액: %{y:,.0f}원<extra></extra>"
                 )
-                fig_bar_base.update_layout(
-                    height=400, yaxis_title="금액(원)", xaxis_title=None, showlegend=False,
+                fig_revenue.update_layout(
+                    height=380, showlegend=False, yaxis_title="금액(원)",
                     paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                    margin=dict(l=10, r=10, t=24, b=28)
+                    margin=dict(l=10, r=10, t=10, b=24)
                 )
-                st.plotly_chart(fig_bar_base, use_container_width=True, key="base_cost_bar_2")
-        else:
-            st.info("현재 비용 데이터가 없습니다.")
-
-    with row2_col2:
-        display_styled_title_box("시뮬레이션 비용 구조", font_size="22px", margin_bottom="12px")
-        sim_costs_for_pie = {k: float(v) for k, v in sim_costs.items() if float(v) > 0}
-        if sim_costs_for_pie:
-            r2_c2_sub1, r2_c2_sub2 = st.columns(2)
-            with r2_c2_sub1:
-                pie_data_sim = pd.DataFrame(list(sim_costs_for_pie.items()), columns=['항목', '금액'])
-                fig_pie_sim = px.pie(pie_data_sim, names='항목', values='금액')
-                pie_colors_sim = [cost_item_color_map.get(label, '#CCCCCC') for label in pie_data_sim['항목']]
-                fig_pie_sim.update_traces(
-                    marker=dict(colors=pie_colors_sim), textinfo='percent+label', textfont_size=14,
-                    hovertemplate="<b>항목:</b> %{label}<br><b>금액:</b> %{value:,.0f}원<extra></extra>"
+                # x축 라벨(현재/시뮬레이션)은 유지, 축 제목만 제거
+                fig_revenue.update_xaxes(title=None, showgrid=False)
+                st.plotly_chart(fig_revenue, use_container_width=True, key="sim_revenue_bar")
+
+            # === 총지출 비교 ===
+            with r1_sub_col2:
+                display_styled_title_box("총지출 비교", font_size="22px", margin_bottom="12px")
+                df_cost = pd.DataFrame({'구분': ['현재', '시뮬레이션'], '금액': [base_total_cost, sim_total_cost]})
+                fig_cost = px.bar(
+                    df_cost, x='구분', y='금액', color='구분', text_auto=True,
+                    title=None,  # 내부 차트 제목 제거
+                    color_discrete_map=theme_color_map
                 )
-                fig_pie_sim.update_layout(
-                    height=400, showlegend=False, margin=dict(l=20, r=20, t=16, b=16),
-                    paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
-                )
-                st.plotly_chart(fig_pie_sim, use_container_width=True, key="sim_cost_pie")
-
-            with r2_c2_sub2:
-                df_sim_costs = pd.DataFrame(list(sim_costs_for_pie.items()), columns=['항목', '금액']).sort_values('금액', ascending=False)
-                fig_bar_sim = px.bar(
-                    df_sim_costs, x='항목', y='금액', text_auto=True,
-                    color='항목', color_discrete_map=cost_item_color_map
-                )
-                fig_bar_sim.update_traces(
+                fig_cost.update_traces(
                     texttemplate='%{y:,.0f}',
-                    hovertemplate="<b>항목:</b> %{x}<br><b>금액:</b> %{y:,.0f}원<extra></extra>",
-                    textangle=0
+                    hovertemplate="<b>%{x}</b><br>금액: %{y:,.0f}원<extra></extra>"
                 )
-                fig_bar_sim.update_layout(
-                    height=400, yaxis_title="금액(원)", xaxis_title=None, showlegend=False,
+                fig_cost.update_layout(
+                    height=380, showlegend=False, yaxis_title="금액(원)",
                     paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                    margin=dict(l=10, r=10, t=24, b=28)
+                    margin=dict(l=10, r=10, t=10, b=24)
+                )
+                fig_cost.update_xaxes(title=None, showgrid=False)
+                st.plotly_chart(fig_cost, use_container_width=True, key="sim_cost_bar")
+
+        # === 순수익률 비교 (두 점 연결, 선 색 테마 적용, 간격 적당히) ===
+        with row1_col2:
+            display_styled_title_box("순수익률 비교", font_size="22px", margin_bottom="12px")
+
+            # 간격 조절
+            x_vals    = [0.05, 0.30]
+            tickvals = x_vals
+            ticktext = ['현재', '시뮬레이션']
+
+            y_rates  = [float(base_profit_margin), float(sim_profit_margin)]
+            y_profit = [float(base_profit), float(sim_profit)]
+            texts    = [f"{v:.1f}%" for v in y_rates]
+
+            point_colors = [theme_color_map['현재'], theme_color_map['시뮬레이션']]
+            line_color   = theme_color_map['시뮬레이션']
+            customdata   = [[lbl, prf] for lbl, prf in zip(ticktext, y_profit)]
+
+            fig_profit_rate = go.Figure()
+            fig_profit_rate.add_trace(go.Scatter(
+                x=x_vals,
+                y=y_rates,
+                mode='lines+markers+text',
+                text=texts,  # 점 위에는 퍼센트 표시
+                textposition='top center',
+                marker=dict(size=8, line=dict(width=1, color='#333'), color=point_colors),
+                line=dict(width=3, color=line_color),
+                hovertemplate="<b>%{customdata[0]}</b><br>수익률: %{y:.1f}%<br>수익금액: %{customdata[1]:,.0f}원<extra></extra>",
+                customdata=customdata,
+                showlegend=False
+            ))
+
+            fig_profit_rate.update_layout(
+                height=380,
+                yaxis_title="순수익률 (%)",
+                xaxis_title=None,
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                showlegend=False,
+                margin=dict(l=10, r=10, t=20, b=28)
+            )
+            fig_profit_rate.update_xaxes(
+                type='linear',
+                range=[-0.05, 0.40],  # 보기 좋은 범위
+                tickmode='array',
+                tickvals=tickvals,
+                ticktext=ticktext,    # x축에 '현재','시뮬레이션' 유지
+                showgrid=False,
+                zeroline=False
+            )
+            st.plotly_chart(fig_profit_rate, use_container_width=True, key="sim_profit_line")
+
+        st.markdown("---")
+        row2_col1, row2_col2 = st.columns(2)
+
+        with row2_col1:
+            display_styled_title_box("현재 비용 구조", font_size="22px", margin_bottom="12px")
+            base_costs_for_pie = {k: float(v) for k, v in base_costs.items() if float(v) > 0}
+            if base_costs_for_pie:
+                r2_c1_sub1, r2_c1_sub2 = st.columns(2)
+                with r2_c1_sub1:
+                    pie_data = pd.DataFrame(list(base_costs_for_pie.items()), columns=['항목', '금액'])
+                    fig_pie_base = px.pie(pie_data, names='항목', values='금액')
+                    pie_colors = [cost_item_color_map.get(label, '#CCCCCC') for label in pie_data['항목']]
+                    fig_pie_base.update_traces(
+                        marker=dict(colors=pie_colors), textinfo='percent+label', textfont_size=14,
+                        hovertemplate="<b>항목:</b> %{label}<br><b>금액:</b> %{value:,.0f}원<extra></extra>"
+                    )
+                    fig_pie_base.update_layout(
+                        height=400, showlegend=False, margin=dict(l=20, r=20, t=16, b=16),
+                        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
+                    )
+                    st.plotly_chart(fig_pie_base, use_container_width=True, key="base_cost_pie")
+
+                with r2_c1_sub2:
+                    df_base_costs = pd.DataFrame(list(base_costs_for_pie.items()), columns=['항목', '금액']).sort_values('금액', ascending=False)
+                    fig_bar_base = px.bar(
+                        df_base_costs, x='항목', y='금액', text_auto=True,
+                        color='항목', color_discrete_map=cost_item_color_map
+                    )
+                    fig_bar_base.update_traces(
+                        texttemplate='%{y:,.0f}',
+                        hovertemplate="<b>항목:</b> %{x}<br><b>금액:</b> %{y:,.0f}원<extra></extra>",
+                        textangle=0
+                    )
+                    fig_bar_base.update_layout(
+                        height=400, yaxis_title="금액(원)", xaxis_title=None, showlegend=False,
+                        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                        margin=dict(l=10, r=10, t=24, b=28)
+                    )
+                    st.plotly_chart(fig_bar_base, use_container_width=True, key="base_cost_bar_2")
+            else:
+                st.info("현재 비용 데이터가 없습니다.")
+
+        with row2_col2:
+            display_styled_title_box("시뮬레이션 비용 구조", font_size="22px", margin_bottom="12px")
+            sim_costs_for_pie = {k: float(v) for k, v in sim_costs.items() if float(v) > 0}
+            if sim_costs_for_pie:
+                r2_c2_sub1, r2_c2_sub2 = st.columns(2)
+                with r2_c2_sub1:
+                    pie_data_sim = pd.DataFrame(list(sim_costs_for_pie.items()), columns=['항목', '금액'])
+                    fig_pie_sim = px.pie(pie_data_sim, names='항목', values='금액')
+                    pie_colors_sim = [cost_item_color_map.get(label, '#CCCCCC') for label in pie_data_sim['항목']]
+                    fig_pie_sim.update_traces(
+                        marker=dict(colors=pie_colors_sim), textinfo='percent+label', textfont_size=14,
+                        hovertemplate="<b>항목:</b> %{label}<br><b>금액:</b> %{value:,.0f}원<extra></extra>"
+                    )
+                    fig_pie_sim.update_layout(
+                        height=400, showlegend=False, margin=dict(l=20, r=20, t=16, b=16),
+                        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
+                    )
+                    st.plotly_chart(fig_pie_sim, use_container_width=True, key="sim_cost_pie")
+
+                with r2_c2_sub2:
+                    df_sim_costs = pd.DataFrame(list(sim_costs_for_pie.items()), columns=['항목', '금액']).sort_values('금액', ascending=False)
+                    fig_bar_sim = px.bar(
+                        df_sim_costs, x='항목', y='금액', text_auto=True,
+                        color='항목', color_discrete_map=cost_item_color_map
+                    )
+                    fig_bar_sim.update_traces(
+                        texttemplate='%{y:,.0f}',
+                        hovertemplate="<b>항목:</b> %{x}<br><b>금액:</b> %{y:,.0f}원<extra></extra>",
+                        textangle=0
+                    )
+                    fig_bar_sim.update_layout(
+                        height=400, yaxis_title="금액(원)", xaxis_title=None, showlegend=False,
+                        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                        margin=dict(l=10, r=10, t=24, b=28)
+                    )
+                    st.plotly_chart(fig_bar_sim, use_container_width=True, key="sim_cost_bar_2")
+            else:
+                st.info("시뮬레이션 비용 데이터가 없습니다.")
+
+        # --- 민감도 분석 (시나리오 엔진으로 조건 격자/낮음·높음을 한 번에 계산, 나머지 조건은 현재 설정) ---
+        st.markdown("---")
+        st.subheader("🔬 민감도 분석")
+        lever_labels = {'revenue': "월평균 매출", 'hall_ratio_pct': "홀매출 비율", 'royalty_rate': "로열티"}
+        lever_labels.update({item: f"{item} 조정률" for item in ordered_cost_items})
+        lever_ranges = {
+            'revenue': (sim_revenue * 0.7, sim_revenue * 1.3) if sim_revenue > 0 else (0.0, 150_000_000.0),
+            'hall_ratio_pct': (0.0, 100.0), 'royalty_rate': (0.0, 10.0),
+        }
+        lever_ranges.update({item: (-50.0, 50.0) for item in ordered_cost_items})
+        lever_swings = {
+            'revenue': (sim_revenue * 0.9, sim_revenue * 1.1),
+            'hall_ratio_pct': (max(0.0, sim_hall_ratio_pct - 10.0), min(100.0, sim_hall_ratio_pct + 10.0)),
+            'royalty_rate': (max(0.0, royalty_rate - 1.0), min(10.0, royalty_rate + 1.0)),
+        }
+        lever_swings.update({item: (max(-50.0, cost_adjustments.get(item, 0.0) - 10.0), min(50.0, cost_adjustments.get(item, 0.0) + 10.0))
+                             for item in ordered_cost_items})
+
+        heat_col, tornado_col = st.columns([3, 2])
+        with heat_col:
+            display_styled_title_box("순수익률 히트맵", font_size="22px", margin_bottom="12px")
+            axis_x_col, axis_y_col = st.columns(2)
+            x_lever = axis_x_col.selectbox("가로축", list(lever_labels), format_func=lever_labels.get, key="sensitivity_x")
+            y_lever = axis_y_col.selectbox("세로축", [lever for lever in lever_labels if lever != x_lever], format_func=lever_labels.get, key="sensitivity_y")
+            x_values = np.linspace(*lever_ranges[x_lever], SENSITIVITY_GRID_POINTS)
+            y_values = np.linspace(*lever_ranges[y_lever], SENSITIVITY_GRID_POINTS)
+            grid = sensitivity_grid(sim_base, sim_scenario, x_lever, x_values, y_lever, y_values)
+            fig_heat = go.Figure(go.Heatmap(
+                x=x_values, y=y_values, z=grid['profit_margin'], zmid=0,
+                colorscale=[[0.0, '#FF4136'], [0.5, '#F5F5F5'], [1.0, '#3D9970']], colorbar=dict(ticksuffix="%"),
+                hovertemplate=f"{lever_labels[x_lever]}: %{{x:,.1f}}<br>{lever_labels[y_lever]}: %{{y:,.1f}}<br>순수익률: %{{z:.1f}}%<extra></extra>"
+            ))
+            fig_heat.add_trace(go.Scatter(
+                x=[lever_value(sim_scenario, x_lever)], y=[lever_value(sim_scenario, y_lever)], mode='markers', name='현재 조건',
+                marker=dict(symbol='x', size=12, color='#333'), hovertemplate="현재 조건<extra></extra>", showlegend=False
+            ))
+            fig_heat.update_layout(
+                height=480, xaxis_title=lever_labels[x_lever], yaxis_title=lever_labels[y_lever],
+                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', margin=dict(l=10, r=10, t=10, b=28)
+            )
+            st.plotly_chart(fig_heat, use_container_width=True, key="sensitivity_heatmap")
+            st.caption(f"{grid['profit_margin'].size:,}개 조건 조합 · 그 밖의 조건은 현재 설정")
+
+        with tornado_col:
+            display_styled_title_box("순수익률 영향도", font_size="22px", margin_bottom="12px")
+            tornado_rows, current_margin = tornado(sim_base, sim_scenario, lever_swings)
+            tornado_rows = tornado_rows[::-1]  # 영향이 큰 조건이 위로
+            fig_tornado = go.Figure()
+            for idx, (side, color) in enumerate((("낮춤", '#B0A696'), ("높임", '#964F4C')), start=1):
+                fig_tornado.add_trace(go.Bar(
+                    y=[lever_labels[row[0]] for row in tornado_rows], x=[row[idx] - current_margin for row in tornado_rows],
+                    base=current_margin, orientation='h', name=side, marker_color=color,
+                    customdata=[row[idx] for row in tornado_rows],
+                    hovertemplate="%{y} " + side + "<br>순수익률: %{customdata:.1f}%<extra></extra>"
+                ))
+            fig_tornado.add_vline(x=current_margin, line_width=1, line_color='#333')
+            fig_tornado.update_layout(
+                barmode='overlay', height=480, xaxis=dict(ticksuffix="%", title="순수익률"),
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', margin=dict(l=10, r=10, t=10, b=28)
+            )
+            st.plotly_chart(fig_tornado, use_container_width=True, key="sensitivity_tornado")
+            st.caption("매출 ±10%, 홀매출 비율 ±10%p, 로열티 ±1%p, 비용 조정률 ±10%p")
+
+        # --- 몬테카를로 리스크 분석 (지점별 과거 월간 변동을 현재 조건에 적용) ---
+        st.markdown("---")
+        st.subheader("🎲 리스크 분석 (몬테카를로)")
+        if st.toggle("과거 월별 변동으로 확률 분석", key="risk_mode",
+                     help="선택 기간 지점별 매출·홀매출 비중·비용 항목의 월간 변동을 추정해 현재 조건에 무작위로 적용합니다."):
+            risk_n_col, risk_seed_col = st.columns(2)
+            n_samples = risk_n_col.selectbox("표본 수", RISK_SAMPLE_SIZES, index=1, format_func=lambda n: f"{n:,}개", key="risk_samples")
+            risk_seed = int(risk_seed_col.number_input("시드 (같은 시드면 같은 결과)", min_value=0, value=RISK_DEFAULT_SEED, step=1, key="risk_seed"))
+
+            started = time.perf_counter()
+            variation = fit_monthly_variation(sim_pnl, list(base_costs))
+            if not variation['branches']:
+                st.warning(f"변동을 추정할 수 있는 지점이 없습니다. 지점별로 매출이 있는 달이 {MIN_FIT_MONTHS}개월 이상 필요합니다.")
+            else:
+                risk = evaluate_scenarios(**sim_base, **sample_scenarios(variation, sim_scenario, n_samples, risk_seed))
+                bep_revenue = break_even_revenue(scenario_result)
+                summary = risk_summary(risk)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+
+                bep_text = f"{bep_revenue:,.0f} 원" if np.isfinite(bep_revenue) else "—"
+                st.markdown(f"""
+                <div class="kpi-container">
+                    <div><div class="kpi-label">손실 확률</div><div class="kpi-value">{summary['loss_probability'] * 100:.1f}%</div></div>
+                    <div><div class="kpi-label">순수익률 P10 / P50 / P90</div><div class="kpi-value">{summary['p10']:.1f}% / {summary['p50']:.1f}% / {summary['p90']:.1f}%</div></div>
+                    <div><div class="kpi-label">손익분기 매출 (로열티 {royalty_rate:.1f}% 포함)</div><div class="kpi-value">{bep_text}</div></div>
+                    <div><div class="kpi-label">손익분기 매출 이상 확률</div><div class="kpi-value">{summary['above_bep_probability'] * 100:.1f}%</div></div>
+                </div>
+                """, unsafe_allow_html=True)
+
+                # 분포는 서버에서 구간별 개수로 집계해 전송 (표본 전체를 보내지 않음), 양 끝 0.5% 는 축 범위에서 제외
+                margins = risk['profit_margin']
+                counts, edges = np.histogram(margins, bins=60, range=tuple(np.percentile(margins, [0.5, 99.5])))
+                centers = (edges[:-1] + edges[1:]) / 2
+                fig_risk = go.Figure(go.Bar(
+                    x=centers, y=counts / len(margins) * 100, width=edges[1] - edges[0],
+                    marker_color=np.where(centers < 0, '#B0A696', '#964F4C'),
+                    hovertemplate="순수익률: %{x:.1f}%<br>비중: %{y:.2f}%<extra></extra>"
+                ))
+                for label, value in (('P10', summary['p10']), ('P50', summary['p50']), ('P90', summary['p90'])):
+                    fig_risk.add_vline(x=value, line_width=1, line_dash='dash', line_color='#333',
+                                       annotation_text=f"{label} {value:.1f}%", annotation_position='top')
+                fig_risk.update_layout(
+                    height=380, xaxis=dict(title="순수익률", ticksuffix="%"), yaxis=dict(title="표본 비중", ticksuffix="%"),
+                    showlegend=False, bargap=0, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                    margin=dict(l=10, r=10, t=30, b=28)
                 )
-                st.plotly_chart(fig_bar_sim, use_container_width=True, key="sim_cost_bar_2")
-        else:
-            st.info("시뮬레이션 비용 데이터가 없습니다.")
-else:
-    st.info("조건을 조정한 뒤, ‘🚀 시뮬레이션 실행’을 눌러 결과를 확인하세요.")
+                st.plotly_chart(fig_risk, use_container_width=True, key="risk_histogram")
+                st.caption(f"지점 {len(variation['branches'])}곳 · 활동월 {sum(months for months, _ in variation['branches'])}개로 변동 추정 · "
+                           f"표본 {n_samples:,}개 · 시드 {risk_seed} · {elapsed_ms:.0f} ms")
+    else:
+        st.info("조건을 조정한 뒤, ‘🚀 시뮬레이션 실행’을 눌러 결과를 확인하세요.")
+
+simulation_section(월별_뷰, view_key)
@@ -0,0 +1,168 @@
+import json
+import os
+
+import httplib2
+import pandas as pd
+import pytest
+from googleapiclient.errors import HttpError
+
+from data_loader import (
+    build_ledger, list_drive_tree, load_snapshot, LocalDataSource, new_sync_store, new_timings, refresh_from_source,
+    snapshot_root, sync_files, write_snapshot
+)
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+XLSX_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+class FailingDriveService:
+    """루트 조회에는 지점 폴더 하나와 파일 하나를 돌려주고, 그 다음 조회부터 HttpError (조회 도중 끊긴 Drive)"""
+    def __init__(self):
+        self.calls = 0
+
+    def files(self):
+        return self
+
+    def list(self, **kwargs):
+        self.calls += 1
+        return self
+
+    def execute(self):
+        if self.calls > 1:
+            raise HttpError(httplib2.Response({'status': 503}), b'backend error')
+        return {'files': [{'id': 'fld1', 'name': '지점01', 'mimeType': FOLDER_MIME_TYPE, 'parents': ['root']},
+                          {'id': 'fil1', 'name': '안내.xlsx', 'mimeType': XLSX_MIME_TYPE, 'parents': ['root']}]}
+
+class FailingListSource(LocalDataSource):
+    def list_files(self):
+        return list_drive_tree(FailingDriveService(), 'root')
+
+def synced_store():
+    store = new_sync_store()
+    store['files'] = {'fil9': {'kind': '정산표', 'frame': None, 'row_count': 0}}
+    store['manifest'] = {'fil9': ('2024-01-28T00:00:00.000Z', 'md5', '20480')}
+    return store
+
+def test_listing_error_propagates():
+    with pytest.raises(HttpError):
+        list_drive_tree(FailingDriveService(), 'root')
+
+def test_listing_error_keeps_synced_files(tmp_path):
+    store = synced_store()
+    with pytest.raises(HttpError):
+        refresh_from_source(store, FailingListSource(tmp_path), {'snapshot_dir': None})
+    assert list(store['files']) == ['fil9']
+    assert list(store['manifest']) == ['fil9']
+
+def test_parse_error_recorded_for_session(tmp_path):
+    (tmp_path / '정산표' / '지점01').mkdir(parents=True)
+    (tmp_path / '정산표' / '지점01' / '24.01.xlsx').write_bytes(b'not a workbook')
+    source, store = LocalDataSource(tmp_path), new_sync_store()
+    timings = new_timings()
+    sync_files(source, source.list_files(), store, parse_workers=1, timings=timings)
+    assert timings['files_failed'] == 1
+    (result,) = store['files'].values()
+    assert result['telemetry']['path'] == '정산표/지점01/24.01.xlsx'
+    assert result['telemetry']['error']
+    assert store['manifest'] == {}
+
+class FlakySource(LocalDataSource):
+    """failing 에 든 파일 ID 는 내려받기 실패 (OSError)"""
+    def __init__(self, root):
+        super().__init__(root)
+        self.failing = set()
+
+    def read_bytes(self, file):
+        if file['id'] in self.failing:
+            raise OSError("connection reset")
+        return super().read_bytes(file)
+
+@pytest.fixture
+def synced(tmp_path):
+    generate_workbooks = pytest.importorskip('benchmarks.generate_workbooks')
+    generate_workbooks.generate_dataset(tmp_path, branches=2, months=2, rows=5)
+    source, store = FlakySource(tmp_path), new_sync_store()
+    files = source.list_files()
+    sync_files(source, files, store, parse_workers=1)
+    assert all(result['frame'] is not None for result in store['files'].values())
+    return source, store, files
+
+def resync(source, store, files):
+    # 반환: (반영된 변경 파일 수, 내려받은 파일 수)
+    timings = new_timings()
+    changed = sync_files(source, files, store, parse_workers=1, timings=timings)
+    return changed, timings['files_fetched']
+
+def test_unchanged_files_are_skipped(synced):
+    source, store, files = synced
+    assert resync(source, store, files) == (0, 0)
+
+@pytest.mark.parametrize('field', ['modifiedTime', 'md5Checksum'])
+def test_changed_signature_is_downloaded_again(synced, field):
+    source, store, files = synced
+    changed_id = files[0]['id']
+    files = [dict(file, **{field: 'changed'}) if file['id'] == changed_id else file for file in files]
+    assert resync(source, store, files) == (1, 1)
+    assert store['manifest'][changed_id][:2] == (files[0]['modifiedTime'], files[0]['md5Checksum'])
+    assert resync(source, store, files) == (0, 0)
+
+def test_deleted_file_is_removed(synced, tmp_path):
+    source, store, files = synced
+    removed_id = files[0]['id']
+    os.remove(tmp_path / removed_id)
+    assert resync(source, store, source.list_files()) == (1, 0)
+    assert removed_id not in store['files'] and removed_id not in store['manifest']
+
+def test_failed_redownload_keeps_last_good_rows(synced):
+    source, store, files = synced
+    changed_id = files[0]['id']
+    last_good = store['files'][changed_id]['frame']
+    files = [dict(file, modifiedTime='changed') if file['id'] == changed_id else file for file in files]
+    source.failing.add(changed_id)
+    resync(source, store, files)
+    result = store['files'][changed_id]
+    assert result['frame'] is last_good
+    assert result['telemetry']['error'].startswith("다운로드 실패")
+    assert changed_id not in store['manifest']
+    # 다음 동기화에서 다시 시도
+    source.failing.clear()
+    assert resync(source, store, files) == (1, 1)
+    assert store['files'][changed_id]['telemetry']['error'] is None
+
+def test_snapshot_round_trip(synced, tmp_path):
+    source, store, files = synced
+    snapshot_dir = tmp_path / 'snapshot'
+    write_snapshot(store, snapshot_dir)
+    restored = new_sync_store()
+    assert load_snapshot(restored, snapshot_dir)
+    assert restored['manifest'] == store['manifest']
+    assert {file_id: result['row_count'] for file_id, result in restored['files'].items()} == \
+           {file_id: result['row_count'] for file_id, result in store['files'].items()}
+
+    ledger, file_counts, processed_rows, _ = build_ledger(store)
+    restored_ledger, restored_counts, restored_rows, _ = build_ledger(restored)
+    assert (restored_counts, restored_rows) == (file_counts, processed_rows)
+    for column in ['지점명', '분류', '항목1', '항목2', '파일ID']:
+        assert isinstance(restored_ledger[column].dtype, pd.CategoricalDtype)
+    assert restored_ledger['금액'].dtype == 'int64'
+    assert pd.api.types.is_datetime64_any_dtype(restored_ledger['날짜'])
+    order = ['파일ID', '날짜', '분류', '항목1', '항목2', '금액']
+    pd.testing.assert_frame_equal(restored_ledger.sort_values(order, ignore_index=True), ledger.sort_values(order, ignore_index=True))
+    # 복원한 store 로 다시 동기화해도 바뀐 파일이 없음
+    assert resync(source, restored, files) == (0, 0)
+
+def test_snapshot_with_other_schema_version_is_rejected(synced, tmp_path):
+    _, store, _ = synced
+    snapshot_dir = tmp_path / 'snapshot'
+    write_snapshot(store, snapshot_dir)
+    root = snapshot_root(snapshot_dir)
+    with open(os.path.join(root, 'CURRENT')) as f:
+        manifest_path = os.path.join(root, f.read().strip(), 'manifest.json')
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest['schema_version'] -= 1
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    restored = new_sync_store()
+    assert not load_snapshot(restored, snapshot_dir)
+    assert restored['files'] == {} and restored['manifest'] == {}
+    assert not load_snapshot(new_sync_store(), tmp_path / 'missing')
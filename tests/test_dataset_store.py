@@ -0,0 +1,88 @@
+import gc
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from analytics import CUBE_NAMES
+from data_loader import LocalDataSource, build_ledger, new_sync_store, refresh_files, sync_files
+from dataset_store import Dataset, DatasetStore, empty_dataset
+
+class FakeDataset:
+    def __init__(self, age=0.0):
+        self.as_of = time.time() - age
+        self.version = f"v{self.as_of}"
+
+    def age(self):
+        return time.time() - self.as_of
+
+def test_scheduler_refreshes_cold_loaded_scope():
+    store = DatasetStore()
+    scope = ('지점01',)
+    reloaded = threading.Event()
+    def reload():
+        reloaded.set()
+        return FakeDataset()
+    store.refresh_if_stale(lambda: FakeDataset(age=10.0), max_age=5.0, scope=scope, reload_fn=reload)
+    store.start_scheduler(0.05)
+    assert reloaded.wait(2.0)
+
+def test_failed_refresh_is_logged_and_kept(caplog):
+    store = DatasetStore()
+    published = store.refresh_if_stale(lambda: FakeDataset(), max_age=5.0)
+    def fail():
+        raise RuntimeError("Drive 503")
+    assert store.refresh_async(fail)
+    store._workers[None].join(2.0)
+    assert store.current() is published
+    assert store.last_error()[1] == "Drive 503"
+    assert "백그라운드 데이터 갱신 오류" in caplog.text
+
+def test_failed_full_refresh_visible_to_scope():
+    store = DatasetStore()
+    store.refresh_if_stale(lambda: FakeDataset(), max_age=5.0)
+    def fail():
+        raise RuntimeError("Drive 503")
+    assert store.refresh_async(fail)
+    store._workers[None].join(2.0)
+    assert store.last_error(('지점01',))[1] == "Drive 503"
+
+def test_leases_counted_per_dataset_instance():
+    # 내용이 같은(버전이 같은) 두 데이터셋도 lease 수는 따로 셈
+    store = DatasetStore()
+    first = store.publish(empty_dataset())
+    first_lease = store.acquire()
+    second = store.publish(empty_dataset())
+    second_lease = store.acquire()
+    assert first.version == second.version and first.id != second.id
+    assert store.stats()['leases'] == {first.id: 1, second.id: 1}
+    del first_lease
+    gc.collect()
+    assert store.stats()['leases'] == {second.id: 1}
+    assert second_lease.dataset is second
+
+def sorted_frame(df):
+    return df.sort_values(list(df.columns), ignore_index=True)
+
+@pytest.mark.parametrize('target', [{'branch': '지점01'}, {'month': '2023-02'}, {'file_path': 'OKPOS/지점02/23.01.xlsx'}])
+def test_partial_refresh_matches_full_rebuild(tmp_path, target):
+    generate_workbooks = pytest.importorskip('benchmarks.generate_workbooks')
+    generate_workbooks.generate_dataset(tmp_path, branches=3, months=2, rows=5, seed=0)
+    source, store = LocalDataSource(tmp_path), new_sync_store()
+    sync_files(source, source.list_files(), store, parse_workers=1)
+    dataset = Dataset(*build_ledger(store))
+
+    # 모든 파일 내용이 바뀐 뒤 대상 파일만 부분 새로고침 → 같은 store 로 처음부터 만든 데이터셋과 같아야 함
+    generate_workbooks.generate_dataset(tmp_path, branches=3, months=2, rows=5, seed=1)
+    changed_ids, frames, file_counts, processed_rows, file_stats = refresh_files(
+        store, source, {'snapshot_dir': None, 'parse_workers': 1}, **target)
+    assert changed_ids
+    spliced = dataset.splice(changed_ids, frames, file_counts, processed_rows, file_stats)
+    rebuilt = Dataset(*build_ledger(store))
+
+    assert (spliced.file_counts, spliced.processed_rows) == (rebuilt.file_counts, rebuilt.processed_rows)
+    pd.testing.assert_frame_equal(sorted_frame(spliced.ledger), sorted_frame(rebuilt.ledger))
+    for name in CUBE_NAMES:
+        pd.testing.assert_frame_equal(sorted_frame(spliced.cubes[name]), sorted_frame(rebuilt.cubes[name]))
+    assert not sorted_frame(spliced.ledger).equals(sorted_frame(dataset.ledger))
@@ -0,0 +1,34 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from extractors import OKPOS_READ_COLUMNS, SETTLEMENT_READ_COLUMNS, read_okpos_sheet, iter_settlement_sheets, parse_workbook
+
+pytest.importorskip('xlrd')
+
+# 열이 모자란 .xls 시트 (OKPOS: A~B 열만, 정산표: 표지 시트 A~B 열, 월 시트 B~F 열만)
+DATA_DIR = Path(__file__).parent / 'data'
+
+def read_fixture(name):
+    return (DATA_DIR / name).read_bytes()
+
+def test_narrow_okpos_xls_fills_missing_columns():
+    df = read_okpos_sheet(io.BytesIO(read_fixture('narrow_okpos.xls')), 'xlrd')
+    assert list(df.columns) == OKPOS_READ_COLUMNS
+    assert df[[34, 36, 38]].isna().all().all()
+
+def test_narrow_settlement_xls_fills_missing_columns():
+    sheets = dict(iter_settlement_sheets(io.BytesIO(read_fixture('narrow_settlement.xls')), 'xlrd', reduced_read=True))
+    assert list(sheets) == ['표지', '24.01']
+    for df in sheets.values():
+        assert list(df.columns) == SETTLEMENT_READ_COLUMNS
+
+def test_narrow_xls_workbooks_parse_without_error():
+    kind, rows, error = parse_workbook(read_fixture('narrow_okpos.xls'), 'OKPOS.xls', '/지점01/OKPOS.xls', '지점01')[:3]
+    assert (kind, error) == ('OKPOS', None)
+
+    kind, rows, error = parse_workbook(read_fixture('narrow_settlement.xls'), '정산표.xls', '/지점01/정산표.xls', '지점01', reduced_read=True)[:3]
+    assert (kind, error) == ('정산표', None)
+    assert [row[3:] for row in rows] == [['인건비', '직원3', 3000.0], ['식자재', '김', 1500.0],
+                                         ['인건비', '직원4', 4000.0], ['식자재', '김', 2000.0]]
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from simulation import break_even_revenue, evaluate_scenarios, fit_monthly_variation, risk_summary, sample_scenarios
+
+BASE = {'base_total_revenue': 50_000_000.0, 'base_delivery_takeout_revenue': 20_000_000.0,
+        'base_costs': {'식자재': 15_000_000.0, '소모품': 1_000_000.0, '배달비': 3_000_000.0, '인건비': 12_000_000.0, '고정비': 8_000_000.0}}
+SCENARIO = {'revenue': 52_000_000.0, 'hall_ratio_pct': 55.0, 'royalty_rate': 3.0, 'adjustments': {'인건비': 5.0}}
+
+def monthly_pnl():
+    # 지점 2곳 × 8개월, 매출/홀매출 비중/비용이 달마다 흔들리는 손익표
+    rng = np.random.default_rng(0)
+    rows = []
+    for branch in ('지점01', '지점02'):
+        for month in range(8):
+            revenue = 50_000_000.0 * rng.uniform(0.7, 1.3)
+            hall = revenue * rng.uniform(0.4, 0.8)
+            rows.append({'지점명': branch, '연월': f"2024-{month + 1:02d}", '매출월': True, '총매출': revenue,
+                         '홀매출_총액': hall, '배달매출_총액': revenue - hall,
+                         **{item: cost * rng.uniform(0.8, 1.2) for item, cost in BASE['base_costs'].items()}})
+    return pd.DataFrame(rows)
+
+def risk_result(seed):
+    fit = fit_monthly_variation(monthly_pnl(), list(BASE['base_costs']))
+    return evaluate_scenarios(**BASE, **sample_scenarios(fit, SCENARIO, 5000, seed))
+
+def test_same_seed_same_summary():
+    assert risk_summary(risk_result(7)) == risk_summary(risk_result(7))
+    assert risk_summary(risk_result(7)) != risk_summary(risk_result(8))
+
+def test_above_bep_matches_profit():
+    # 표본마다 그 표본의 비용으로 계산한 손익분기 매출과 비교 → 순이익 >= 0 인 표본 비율과 같음
+    risk = risk_result(7)
+    summary = risk_summary(risk)
+    assert 0 < summary['loss_probability'] < 1
+    assert summary['above_bep_probability'] == float(np.mean(risk['profit'] >= 0))
+    assert summary['above_bep_probability'] == 1 - summary['loss_probability']
+
+def test_delivery_cost_scales_with_delivery_revenue():
+    # 배달비는 배달/포장 매출에 비례: 손익분기 매출에서 순이익이 0
+    result = evaluate_scenarios(**BASE, **SCENARIO)
+    bep = break_even_revenue(result)
+    at_bep = evaluate_scenarios(**BASE, **dict(SCENARIO, revenue=bep))
+    assert abs(float(at_bep['profit'])) < 1e-3